@@ -1,15 +1,25 @@
 #!/usr/bin/env python3
 """
 Analyze Instagram images and organize them into website structure
+
+Run: python3 analyze-and-organize.py [--profile] [--metrics-json FILE]
 """
 
-import json
+import argparse
 import os
 from pathlib import Path
-import shutil
 
-def organize_images():
+import instrumentation
+from catalog_db import open_store
+from catalog_shards import report_shards
+from catalog_store import INSTAGRAM_ID_START
+from image_scanner import scan_images
+from image_store import ImageStore, LINK_METHODS
+from instrumentation import METRICS
+
+def organize_images(link='auto', remove_originals=False):
     """Organize images from main folder into subfolders and update JSON files"""
+    image_store = ImageStore(link=link)
     
     images_dir = Path('assets/images')
     tours_dir = images_dir / 'tours'
@@ -21,9 +31,11 @@ def organize_images():
     destinations_dir.mkdir(exist_ok=True)
     gallery_dir.mkdir(exist_ok=True)
     
-    # Find all images in main folder
-    images = sorted([f for f in images_dir.iterdir() 
-                     if f.is_file() and f.suffix.lower() in ['.jpg', '.jpeg', '.png']])
+    # Find all images in main folder (one scandir pass; the split below
+    # needs the total, so the records are collected and sorted by name)
+    with METRICS.phase('scan') as phase:
+        images = sorted(scan_images(images_dir, report=None), key=lambda record: record.name)
+        phase.add(files=len(images))
     
     if not images:
         print("No images found to organize")
@@ -39,101 +51,106 @@ def organize_images():
     destinations_images = images[len(tours_images):len(tours_images) + max(1, total_images // 4)]  # 1/4 for destinations
     gallery_images = images[len(tours_images) + len(destinations_images):]  # Rest for gallery
     
-    # Move and organize tours
-    new_tours = []
-    for idx, img in enumerate(tours_images, 1):
-        new_name = f"tour-{idx:02d}.jpg"
-        dest_path = tours_dir / new_name
-        shutil.copy2(img, dest_path)
-        print(f"📸 {img.name} → tours/{new_name}")
+    # Linking hashes each image into the store, so this is the I/O-heavy part
+    with METRICS.phase('link') as phase:
+        # Move and organize tours
+        new_tours = []
+        for idx, img in enumerate(tours_images, 1):
+            new_name = f"tour-{idx:02d}.jpg"
+            dest_path = tours_dir / new_name
+            image_store.place(img.path, dest_path)
+            print(f"📸 {img.name} → tours/{new_name}")
         
-        tour = {
-            "id": 100 + idx,  # Start from 100 to avoid conflicts
-            "title": f"Amazing Tour Experience {idx}",
-            "subtitle": "Weekend Getaway",
-            "price": 599,
-            "duration": "2-3 days",
-            "difficulty": "Easy",
-            "image": f"assets/images/tours/{new_name}",
-            "description": "Discover breathtaking destinations and create unforgettable memories. This tour offers a perfect blend of adventure, culture, and relaxation for your weekend escape.",
-            "highlights": [
-                "Scenic views",
-                "Cultural experiences",
-                "Memorable moments",
-                "Photo opportunities"
-            ],
-            "includes": [
-                "Accommodation",
-                "Meals",
-                "Guided tours",
-                "Transportation"
-            ],
-            "category": "Cultural"
-        }
-        new_tours.append(tour)
-    
-    # Move and organize destinations
-    new_destinations = []
-    for idx, img in enumerate(destinations_images, 1):
-        new_name = f"destination-{idx:02d}.jpg"
-        dest_path = destinations_dir / new_name
-        shutil.copy2(img, dest_path)
-        print(f"📸 {img.name} → destinations/{new_name}")
+            tour = {
+                "title": f"Amazing Tour Experience {idx}",
+                "subtitle": "Weekend Getaway",
+                "price": 599,
+                "duration": "2-3 days",
+                "difficulty": "Easy",
+                "image": f"assets/images/tours/{new_name}",
+                "description": "Discover breathtaking destinations and create unforgettable memories. This tour offers a perfect blend of adventure, culture, and relaxation for your weekend escape.",
+                "highlights": [
+                    "Scenic views",
+                    "Cultural experiences",
+                    "Memorable moments",
+                    "Photo opportunities"
+                ],
+                "includes": [
+                    "Accommodation",
+                    "Meals",
+                    "Guided tours",
+                    "Transportation"
+                ],
+                "category": "Cultural"
+            }
+            new_tours.append(tour)
+    
+        # Move and organize destinations
+        new_destinations = []
+        for idx, img in enumerate(destinations_images, 1):
+            new_name = f"destination-{idx:02d}.jpg"
+            dest_path = destinations_dir / new_name
+            image_store.place(img.path, dest_path)
+            print(f"📸 {img.name} → destinations/{new_name}")
         
-        destination = {
-            "id": 100 + idx,
-            "name": f"Beautiful Destination {idx}",
-            "region": "Various",
-            "image": f"assets/images/destinations/{new_name}",
-            "description": "A stunning destination offering unique experiences and breathtaking scenery. Perfect for travelers seeking adventure and discovery.",
-            "bestTime": "Year-round",
-            "highlights": [
-                "Scenic beauty",
-                "Cultural richness",
-                "Adventure opportunities",
-                "Photography spots"
-            ]
-        }
-        new_destinations.append(destination)
-    
-    # Move and organize gallery
-    new_gallery = []
-    for idx, img in enumerate(gallery_images, 1):
-        new_name = f"gallery-{idx:02d}.jpg"
-        dest_path = gallery_dir / new_name
-        shutil.copy2(img, dest_path)
-        print(f"📸 {img.name} → gallery/{new_name}")
+            destination = {
+                "name": f"Beautiful Destination {idx}",
+                "region": "Various",
+                "image": f"assets/images/destinations/{new_name}",
+                "description": "A stunning destination offering unique experiences and breathtaking scenery. Perfect for travelers seeking adventure and discovery.",
+                "bestTime": "Year-round",
+                "highlights": [
+                    "Scenic beauty",
+                    "Cultural richness",
+                    "Adventure opportunities",
+                    "Photography spots"
+                ]
+            }
+            new_destinations.append(destination)
+    
+        # Move and organize gallery
+        new_gallery = []
+        for idx, img in enumerate(gallery_images, 1):
+            new_name = f"gallery-{idx:02d}.jpg"
+            dest_path = gallery_dir / new_name
+            image_store.place(img.path, dest_path)
+            print(f"📸 {img.name} → gallery/{new_name}")
         
-        gallery_item = {
-            "src": f"assets/images/gallery/{new_name}",
-            "category": "tours",
-            "title": f"Gallery Photo {idx}"
-        }
-        new_gallery.append(gallery_item)
+            gallery_item = {
+                "src": f"assets/images/gallery/{new_name}",
+                "category": "tours",
+                "title": f"Gallery Photo {idx}"
+            }
+            new_gallery.append(gallery_item)
+    
+        phase.add(files=image_store.report.files, bytes=image_store.report.bytes_total)
+    
+    image_store.report.print_summary()
+    
+    # The originals now live on in the store, so they can go
+    if remove_originals:
+        for img in images:
+            os.unlink(img.path)
+        print(f"🧹 Removed {len(images)} originals from {images_dir}/")
     
     # Update JSON files
     print("\n📝 Updating JSON files...\n")
     
-    # Update tours.json
-    tours_file = Path('data/tours.json')
-    tours_data = json.loads(tours_file.read_text(encoding='utf-8'))
-    tours_data['tours'].extend(new_tours)
-    tours_file.write_text(json.dumps(tours_data, indent=2, ensure_ascii=False), encoding='utf-8')
-    print(f"✅ Added {len(new_tours)} tours")
-    
-    # Update destinations.json
-    dest_file = Path('data/destinations.json')
-    dest_data = json.loads(dest_file.read_text(encoding='utf-8'))
-    dest_data['destinations'].extend(new_destinations)
-    dest_file.write_text(json.dumps(dest_data, indent=2, ensure_ascii=False), encoding='utf-8')
-    print(f"✅ Added {len(new_destinations)} destinations")
-    
-    # Update gallery.json
-    gallery_file = Path('data/gallery.json')
-    gallery_data = json.loads(gallery_file.read_text(encoding='utf-8'))
-    gallery_data['galleryImages'].extend(new_gallery)
-    gallery_file.write_text(json.dumps(gallery_data, indent=2, ensure_ascii=False), encoding='utf-8')
-    print(f"✅ Added {len(new_gallery)} gallery items")
+    # Instagram items get ids from 100 up, allocated without reusing old ones
+    catalogs = open_store()
+    with METRICS.phase('merge') as phase:
+        added_tours = [t for t in new_tours if catalogs['tours'].add(t, min_id=INSTAGRAM_ID_START)]
+        added_destinations = [d for d in new_destinations if catalogs['destinations'].add(d, min_id=INSTAGRAM_ID_START)]
+        added_gallery = [g for g in new_gallery if catalogs['gallery'].add(g)]
+        phase.add(items=len(added_tours) + len(added_destinations) + len(added_gallery))
+    with METRICS.phase('write') as phase:
+        committed = catalogs.commit()
+        phase.add(files=len(committed))
+    with METRICS.phase('shards'):
+        report_shards(catalogs, committed)
+    print(f"✅ Added {len(added_tours)} tours")
+    print(f"✅ Added {len(added_destinations)} destinations")
+    print(f"✅ Added {len(added_gallery)} gallery items")
     
     print("\n" + "="*60)
     print("✅ Organization complete!")
@@ -144,5 +161,16 @@ def organize_images():
     print("\n💡 Tip: You can now update titles and descriptions in the JSON files")
 
 if __name__ == '__main__':
-    organize_images()
+    parser = argparse.ArgumentParser(description="Organize images into tours/, destinations/ and gallery/")
+    parser.add_argument('--link', default='auto', choices=('auto',) + LINK_METHODS,
+                        help="how category files link to the image store (default: first method that works)")
+    parser.add_argument('--remove-originals', action='store_true',
+                        help="delete the source images from assets/images/ once organized")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure(args)
+    try:
+        organize_images(link=args.link, remove_originals=args.remove_originals)
+    finally:
+        instrumentation.finish(args)
 
@@ -4,6 +4,16 @@
  */
 
 class DataLoader {
+  static VERSION_FILE = 'data/version.json';
+  static SEARCH_INDEX = 'data/search/index.json';
+  // Terms that only start with the word being typed score this much of an exact match
+  static SEARCH_PREFIX_WEIGHT = 0.5;
+  static CACHE_PREFIX = 'dataloader:';
+
+  // filePath -> Promise of parsed JSON, shared by every caller on the page
+  static requests = new Map();
+  static version = null;
+
   /**
    * Get the base path for the site (handles GitHub Pages subdirectory)
    */
@@ -43,17 +53,110 @@ class DataLoader {
     return basePath + cleanPath;
   }
 
-  static async loadJSON(filePath) {
-    try {
-      const resolvedPath = this.resolvePath(filePath);
-      const response = await fetch(resolvedPath);
+  /**
+   * Load a JSON file, at most once per page
+   * Concurrent callers share one request, and responses are kept in
+   * sessionStorage with their ETag/Last-Modified so other pages can reuse
+   * them until data/version.json changes.
+   */
+  static loadJSON(filePath, { partial = false } = {}) {
+    // Data inlined into the page by build_site.py needs no request. A
+    // partial payload (e.g. only the home page's featured tours) is only
+    // served to callers that asked for it; everyone else fetches the file
+    const preloaded = window.__PRELOADED_DATA__ && window.__PRELOADED_DATA__[filePath];
+    if (preloaded && (!preloaded.partial || partial)) {
+      return Promise.resolve(preloaded);
+    }
+
+    if (!this.requests.has(filePath)) {
+      const request = this.fetchJSON(filePath).catch(error => {
+        // Let a later call retry instead of repeating the failure
+        this.requests.delete(filePath);
+        console.error(`Error loading ${filePath}:`, error);
+        throw error;
+      });
+      this.requests.set(filePath, request);
+    }
+    return this.requests.get(filePath);
+  }
+
+  /**
+   * Fingerprinted name of a data file from build_assets.py, if known
+   */
+  static fingerprintedPath(filePath) {
+    const manifest = window.__ASSET_MANIFEST__;
+    return (manifest && manifest[filePath]) || null;
+  }
+
+  static async fetchJSON(filePath) {
+    // A fingerprinted file never changes, so the HTTP cache can keep it as is
+    const fingerprinted = this.fingerprintedPath(filePath);
+    if (fingerprinted) {
+      const response = await fetch(this.resolvePath(fingerprinted));
       if (!response.ok) {
-        throw new Error(`Failed to load ${resolvedPath}: ${response.statusText}`);
+        throw new Error(`Failed to load ${fingerprinted}: ${response.statusText}`);
       }
       return await response.json();
+    }
+
+    const resolvedPath = this.resolvePath(filePath);
+    const version = filePath === this.VERSION_FILE ? null : await this.loadVersion();
+    const cached = this.readCache(resolvedPath);
+
+    // Same content version: no request at all
+    if (cached && version && cached.version === version) {
+      return cached.data;
+    }
+
+    // Otherwise revalidate what we have; a 304 costs no body
+    const headers = {};
+    if (cached && cached.etag) headers['If-None-Match'] = cached.etag;
+    if (cached && cached.lastModified) headers['If-Modified-Since'] = cached.lastModified;
+    const response = await fetch(resolvedPath, { headers, cache: 'no-store' });
+
+    if (response.status === 304 && cached) {
+      this.writeCache(resolvedPath, { ...cached, version });
+      return cached.data;
+    }
+    if (!response.ok) {
+      throw new Error(`Failed to load ${resolvedPath}: ${response.statusText}`);
+    }
+    const data = await response.json();
+    this.writeCache(resolvedPath, {
+      version,
+      etag: response.headers.get('ETag'),
+      lastModified: response.headers.get('Last-Modified'),
+      data
+    });
+    return data;
+  }
+
+  /**
+   * Content version written by the organizer scripts (null if missing)
+   */
+  static loadVersion() {
+    if (!this.version) {
+      this.version = this.loadJSON(this.VERSION_FILE)
+        .then(data => data.version || null)
+        .catch(() => null);
+    }
+    return this.version;
+  }
+
+  static readCache(resolvedPath) {
+    try {
+      const entry = sessionStorage.getItem(this.CACHE_PREFIX + resolvedPath);
+      return entry ? JSON.parse(entry) : null;
     } catch (error) {
-      console.error(`Error loading ${filePath}:`, error);
-      throw error;
+      return null;
+    }
+  }
+
+  static writeCache(resolvedPath, entry) {
+    try {
+      sessionStorage.setItem(this.CACHE_PREFIX + resolvedPath, JSON.stringify(entry));
+    } catch (error) {
+      // Storage full or disabled: the in-page memo still applies
     }
   }
 
@@ -61,18 +164,54 @@ class DataLoader {
     return await this.loadJSON('data/company.json');
   }
 
-  static async loadTours() {
-    const data = await this.loadJSON('data/tours.json');
+  static async loadTours({ partial = false } = {}) {
+    const data = await this.loadJSON('data/tours.json', { partial });
     return data.tours;
   }
 
-  static async loadDestinations() {
-    const data = await this.loadJSON('data/destinations.json');
+  /**
+   * Load a single tour from its shard (data/tours/<id>.json)
+   * Falls back to the full catalog if shards have not been generated
+   */
+  static async loadTour(id) {
+    try {
+      return await this.loadJSON(`data/tours/${id}.json`);
+    } catch (error) {
+      const tours = await this.loadTours();
+      return tours.find(t => t.id === id) || null;
+    }
+  }
+
+  /**
+   * Load the tours of one category from its shard
+   */
+  static async loadToursByCategory(category) {
+    try {
+      const data = await this.loadJSON(`data/tours/by-category/${this.slugify(category)}.json`);
+      return data.tours;
+    } catch (error) {
+      const tours = await this.loadTours();
+      return tours.filter(t => t.category === category);
+    }
+  }
+
+  /**
+   * Load the tours precomputed as related to a tour (data/related-tours.json)
+   */
+  static async loadRelatedTours(id) {
+    const index = await this.loadJSON('data/related-tours.json');
+    const ids = index.related[String(id)] || [];
+    const tours = await Promise.all(ids.map(relatedId => this.loadTour(relatedId)));
+    return tours.filter(Boolean);
+  }
+
+  static async loadDestinations({ partial = false } = {}) {
+    const data = await this.loadJSON('data/destinations.json', { partial });
     return data.destinations;
   }
 
-  static async loadTestimonials() {
-    const data = await this.loadJSON('data/testimonials.json');
+  static async loadTestimonials({ partial = false } = {}) {
+    const data = await this.loadJSON('data/testimonials.json', { partial });
     return data.testimonials;
   }
 
@@ -81,6 +220,96 @@ class DataLoader {
     return data.galleryImages;
   }
 
+  /**
+   * Load the gallery shard index (page counts overall and per category)
+   */
+  static async loadGalleryIndex() {
+    return await this.loadJSON('data/gallery/index.json');
+  }
+
+  /**
+   * Load one page of gallery images, optionally for a single category
+   */
+  static async loadGalleryPage(page, category = 'all') {
+    const path = category === 'all'
+      ? `data/gallery/page-${page}.json`
+      : `data/gallery/by-category/${this.slugify(category)}/page-${page}.json`;
+    const data = await this.loadJSON(path);
+    return data.galleryImages;
+  }
+
+  /**
+   * Search tours and destinations with the index built by search_index.py
+   * Only the shards of the query's words are loaded. The last word also
+   * matches longer terms while it is being typed ("beac" finds "beachfront").
+   * Returns [{ type: 'tour' | 'destination', id, score }], best first.
+   */
+  static async search(query, { limit = 10, type = null } = {}) {
+    const index = await this.loadJSON(this.SEARCH_INDEX);
+    const stopWords = new Set(index.stopWords);
+    const shards = new Set(index.shards);
+    const words = this.tokenize(query);
+    const typing = words.length > 0 && !/\s$/.test(query) ? words[words.length - 1] : null;
+    const scores = new Map();
+
+    await Promise.all([...new Set(words)].map(async word => {
+      const prefix = word === typing;
+      const shard = word.slice(0, index.prefixLength);
+      if ((!prefix && stopWords.has(word)) || !shards.has(shard)) return;
+      const terms = await this.loadJSON(`data/search/${shard}.json`);
+      const matches = prefix
+        ? Object.keys(terms).filter(term => term.startsWith(word))
+        : (Object.prototype.hasOwnProperty.call(terms, word) ? [word] : []);
+
+      // BM25; a document counts once per query word, with its best matching term
+      const best = new Map();
+      for (const term of matches) {
+        const postings = terms[term];
+        const idf = Math.log(1 + (index.documents - postings.length + 0.5) / (postings.length + 0.5));
+        const weight = term === word ? 1 : this.SEARCH_PREFIX_WEIGHT;
+        for (const [doc, tf, length] of postings) {
+          const norm = tf + index.k1 * (1 - index.b + index.b * length / index.averageLength);
+          const score = weight * idf * tf * (index.k1 + 1) / norm;
+          if (score > (best.get(doc) || 0)) best.set(doc, score);
+        }
+      }
+      for (const [doc, score] of best) {
+        scores.set(doc, (scores.get(doc) || 0) + score);
+      }
+    }));
+
+    return [...scores]
+      .map(([doc, score]) => ({ type: index.kinds[doc[0]], id: Number(doc.slice(1)), score }))
+      .filter(result => !type || result.type === type)
+      .sort((a, b) => b.score - a.score || a.id - b.id)
+      .slice(0, limit);
+  }
+
+  /**
+   * Split text into search terms (matches search_index.tokenize)
+   */
+  static tokenize(text) {
+    const normalized = String(text).toLowerCase().normalize('NFKD').replace(/[\u0300-\u036f]/g, '');
+    return (normalized.match(/[a-z0-9]+/g) || []).filter(term => term.length >= 2).map(term => this.stem(term));
+  }
+
+  /**
+   * Fold plurals onto the singular (matches search_index.stem)
+   */
+  static stem(term) {
+    if (term.length > 4 && term.endsWith('ies')) return term.slice(0, -3) + 'y';
+    if (term.length > 4 && /(?:ches|shes|sses|xes)$/.test(term)) return term.slice(0, -2);
+    if (term.length > 3 && term.endsWith('s') && !/(?:ss|us|is)$/.test(term)) return term.slice(0, -1);
+    return term;
+  }
+
+  /**
+   * Turn a category name into its shard file name (matches catalog_shards.slugify)
+   */
+  static slugify(text) {
+    return String(text).toLowerCase().replace(/[^a-z0-9]+/g, '-').replace(/^-+|-+$/g, '');
+  }
+
   static formatPrice(price) {
     return new Intl.NumberFormat('en-US', {
       style: 'currency',
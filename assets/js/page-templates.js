@@ -4,6 +4,43 @@
  */
 
 const PageTemplates = {
+  /**
+   * Render an image, as a <picture> with resized AVIF/WebP/JPEG sources
+   * when the entry has a srcset block (see build_derivatives.py), and with
+   * width/height when known so the browser reserves space (see image_metadata.py).
+   * A build-time preview is painted as the background until the image arrives
+   * (see build_placeholders.py).
+   * With lazy, the placeholder is shown and the real src/srcset wait in
+   * data- attributes for SharedUtils.observeLazyImages.
+   */
+  renderImage(entry, src, alt, attrs = '', placeholder = '', sizes = null, lazy = false) {
+    if (entry.placeholder) {
+      const preview = `background: ${entry.placeholder.color} url('${entry.placeholder.preview}') center / cover no-repeat;`;
+      attrs = attrs.includes('style="')
+        ? attrs.replace('style="', `style="${preview} `)
+        : `${attrs}${attrs ? ' ' : ''}style="${preview}"`;
+    }
+    const extra = (attrs ? ` ${attrs}` : '') +
+      (entry.width && entry.height ? ` width="${entry.width}" height="${entry.height}"` : '') +
+      (placeholder ? ` onerror="SharedUtils.handleImageError(this, '${placeholder}')"` : '');
+    const deferred = lazy && placeholder;
+    // The placeholder is escaped for the onerror string; unescape it for src
+    const source = deferred ? `src="${placeholder.replace(/\\'/g, "'")}" data-src="${src}"` : `src="${src}"`;
+    const srcsetAttr = deferred ? 'data-srcset' : 'srcset';
+    if (!entry.srcset) {
+      return `<img ${source} alt="${alt}"${extra}>`;
+    }
+
+    const imageSizes = sizes || entry.sizes || '100vw';
+    const { 'image/jpeg': jpegSrcset, ...otherTypes } = entry.srcset;
+    const sources = Object.entries(otherTypes)
+      .map(([type, srcset]) => `<source type="${type}" ${srcsetAttr}="${srcset}" sizes="${imageSizes}">`)
+      .join('');
+    const imgSrcset = jpegSrcset ? ` ${srcsetAttr}="${jpegSrcset}" sizes="${imageSizes}"` : '';
+
+    return `<picture>${sources}<img ${source}${imgSrcset} alt="${alt}"${extra}></picture>`;
+  },
+
   /**
    * Render tour card
    */
@@ -16,11 +53,11 @@ const PageTemplates = {
       highlightCount = 3
     } = options;
 
-    const placeholder = SharedUtils.createImagePlaceholder(400, 200, tour.title);
+    const placeholder = SharedUtils.imagePlaceholder(tour, 400, 200, tour.title);
     
     return `
       <div class="card" id="${options.id || `tour-${tour.id}`}">
-        <img src="${tour.image}" alt="${tour.title}" class="card-image" onerror="this.src='${placeholder}'">
+        ${this.renderImage(tour, tour.image, tour.title, 'class="card-image"', placeholder)}
         <div class="card-content">
           <h3 class="card-title">${tour.title}</h3>
           <p class="card-subtitle">${tour.subtitle}${showMeta ? ` • ${tour.difficulty} • ${tour.category}` : ''}</p>
@@ -53,11 +90,11 @@ const PageTemplates = {
    */
   renderDestinationCard(dest, options = {}) {
     const { showHighlights = true, showBestTime = true } = options;
-    const placeholder = SharedUtils.createImagePlaceholder(400, 200, dest.name);
+    const placeholder = SharedUtils.imagePlaceholder(dest, 400, 200, dest.name);
     
     return `
       <div class="card" id="${options.id || `dest-${dest.id}`}">
-        <img src="${dest.image}" alt="${dest.name}" class="card-image" onerror="this.src='${placeholder}'">
+        ${this.renderImage(dest, dest.image, dest.name, 'class="card-image"', placeholder)}
         <div class="card-content">
           <h3 class="card-title">${dest.name}</h3>
           <p class="card-subtitle">${dest.region}</p>
@@ -109,18 +146,32 @@ const PageTemplates = {
 
   /**
    * Render gallery item
+   * lazy: leave loading the image to SharedUtils.observeLazyImages
    */
-  renderGalleryItem(img) {
-    const placeholder = SharedUtils.createImagePlaceholder(400, 400, img.title);
+  renderGalleryItem(img, options = {}) {
+    const { lazy = false } = options;
+    const placeholder = SharedUtils.imagePlaceholder(img, 400, 400, img.title);
+    const attrs = lazy ? 'decoding="async"' : 'loading="lazy" decoding="async"';
     
     return `
       <div class="gallery-item">
-        <img src="${img.src}" alt="${img.title}" onerror="this.src='${placeholder}'">
+        ${this.renderImage(img, img.src, img.title, attrs, placeholder, null, lazy)}
         <div class="gallery-overlay">
           <p style="margin: 0; font-weight: 500;">${img.title}</p>
         </div>
       </div>
     `;
+  },
+
+  /**
+   * Render one gallery shard page as its own grid block
+   */
+  renderGalleryPage(images, page, options = {}) {
+    return `
+      <div class="gallery-grid gallery-page" data-page="${page}">
+        ${images.map(img => this.renderGalleryItem(img, options)).join('')}
+      </div>
+    `;
   }
 };
 
@@ -74,6 +74,77 @@ const SharedUtils = {
     }
   },
 
+  /**
+   * Fallback image for an entry: its build-time preview if it has one
+   * (see build_placeholders.py), otherwise a generated SVG
+   */
+  imagePlaceholder(entry, width, height, text) {
+    return entry.placeholder ? entry.placeholder.preview : this.createImagePlaceholder(width, height, text);
+  },
+
+  /**
+   * Swap a broken image for its placeholder
+   * Drops any <picture> sources first, as they take precedence over src
+   */
+  handleImageError(img, placeholder) {
+    img.onerror = null;
+    const picture = img.parentElement;
+    if (picture && picture.tagName === 'PICTURE') {
+      picture.querySelectorAll('source').forEach(source => source.remove());
+    }
+    img.removeAttribute('srcset');
+    img.src = placeholder;
+  },
+
+  // Shared by every lazily rendered image on the page
+  lazyImageObserver: null,
+
+  /**
+   * Start loading images rendered with lazy: true (data-src) under root
+   * as they come within a few hundred pixels of the viewport
+   */
+  observeLazyImages(root = document) {
+    if (!this.lazyImageObserver) {
+      this.lazyImageObserver = new IntersectionObserver(entries => {
+        entries.forEach(entry => {
+          if (entry.isIntersecting) {
+            this.lazyImageObserver.unobserve(entry.target);
+            this.loadLazyImage(entry.target);
+          }
+        });
+      }, { rootMargin: '300px 0px' });
+    }
+    root.querySelectorAll('img[data-src]').forEach(img => this.lazyImageObserver.observe(img));
+  },
+
+  /**
+   * Stop watching the images under root, e.g. before removing them
+   */
+  unobserveLazyImages(root) {
+    if (this.lazyImageObserver) {
+      root.querySelectorAll('img[data-src]').forEach(img => this.lazyImageObserver.unobserve(img));
+    }
+  },
+
+  /**
+   * Move a lazy image's data-srcset/data-src (and its <picture> sources') into place
+   */
+  loadLazyImage(img) {
+    const picture = img.parentElement;
+    if (picture && picture.tagName === 'PICTURE') {
+      picture.querySelectorAll('source[data-srcset]').forEach(source => {
+        source.srcset = source.dataset.srcset;
+        source.removeAttribute('data-srcset');
+      });
+    }
+    if (img.dataset.srcset) {
+      img.srcset = img.dataset.srcset;
+      img.removeAttribute('data-srcset');
+    }
+    img.src = img.dataset.src;
+    img.removeAttribute('data-src');
+  },
+
   /**
    * Sort items prioritizing Instagram items (ID >= 100)
    */
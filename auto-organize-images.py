@@ -2,96 +2,91 @@
 """
 Auto-Organize Instagram Images
 Automatically categorizes and adds images to the website based on filenames and folder locations.
+
+Run: python3 auto-organize-images.py [--watch] [--profile] [--metrics-json FILE]
+With --watch it keeps running and adds photos within about a second of
+them being dropped into the tours, destinations or gallery folder.
 """
 
-import json
+import argparse
 import os
 from pathlib import Path
 from datetime import datetime
 import re
 
-def extract_info_from_filename(filename):
+import instrumentation
+from catalog_db import open_store
+from catalog_shards import report_shards
+from file_watcher import RESCAN, InotifyWatcher, batches, open_watcher
+from image_metadata import METADATA_MANIFEST, extract_metadata, load_place_coordinates, nearest_place
+from image_scanner import ImageRecord, scan_images
+from instrumentation import METRICS
+from keyword_classifier import KeywordClassifier
+from scan_manifest import ScanManifest, NEW, MOVED
+
+# Compiled once; the keyword tables live in data/keywords.json
+CLASSIFIER = KeywordClassifier.from_file()
+PLACE_COORDINATES = load_place_coordinates()
+
+# Default pricing based on category
+CATEGORY_PRICES = {
+    'Beach': 499,
+    'Adventure': 699,
+    'Cultural': 599,
+    'Luxury': 899,
+    'Nature': 549
+}
+
+# Default duration based on category
+CATEGORY_DURATIONS = {
+    'Beach': '2 days',
+    'Adventure': '3-4 days',
+    'Cultural': '3 days',
+    'Luxury': '2-3 days',
+    'Nature': '3 days'
+}
+
+# Best time to visit based on location
+BEST_TIMES = {
+    'Kerala': 'October to March',
+    'Goa': 'October to May',
+    'Himachal': 'April to June, September to November',
+    'Rajasthan': 'October to March',
+    'Uttarakhand': 'March to June, September to November',
+}
+
+REGIONS = {
+    'Kerala': 'South India',
+    'Goa': 'West India',
+    'Himachal': 'North India',
+    'Rajasthan': 'Northwest India',
+    'Uttarakhand': 'North India',
+}
+
+def extract_info_from_filename(filename, metadata=None):
     """Extract location, tour type, and category from filename"""
     name = Path(filename).stem.lower()  # Remove extension
+    return apply_metadata(info_from_matches(name, CLASSIFIER.classify(name)), metadata)
+
+
+def extract_info_from_filenames(filenames):
+    """Batch version of extract_info_from_filename"""
+    names = [Path(filename).stem.lower() for filename in filenames]
+    return [info_from_matches(name, matches)
+            for name, matches in zip(names, CLASSIFIER.classify_many(names))]
+
+
+def info_from_matches(name, matches):
+    """Build the info dict from the classifier's matches for a name"""
+    locations = [value for _, value in matches['locations']]
+    categories = matches['categories']
+    activities = [value for _, value in matches['activities']]
     
-    # Location keywords
-    locations = {
-        'kerala': 'Kerala, India',
-        'goa': 'Goa, India',
-        'himachal': 'Himachal Pradesh, India',
-        'rajasthan': 'Rajasthan, India',
-        'uttarakhand': 'Uttarakhand, India',
-        'ladakh': 'Ladakh, India',
-        'manali': 'Manali, Himachal Pradesh',
-        'mcleod': 'McLeod Ganj, Himachal Pradesh',
-        'rishikesh': 'Rishikesh, Uttarakhand',
-        'jaipur': 'Jaipur, Rajasthan',
-        'udaipur': 'Udaipur, Rajasthan',
-        'jaisalmer': 'Jaisalmer, Rajasthan',
-        'alleppey': 'Alappuzha, Kerala',
-        'kumarakom': 'Kumarakom, Kerala',
-        'munnar': 'Munnar, Kerala',
-        'coorg': 'Coorg, Karnataka',
-        'ooty': 'Ooty, Tamil Nadu',
-        'darjeeling': 'Darjeeling, West Bengal',
-    }
-    
-    # Category detection from filename
-    categories = {
-        'beach': 'Beach',
-        'coastal': 'Beach',
-        'sea': 'Beach',
-        'ocean': 'Beach',
-        'mountain': 'Adventure',
-        'trek': 'Adventure',
-        'hiking': 'Adventure',
-        'adventure': 'Adventure',
-        'camping': 'Adventure',
-        'temple': 'Cultural',
-        'heritage': 'Cultural',
-        'palace': 'Cultural',
-        'fort': 'Cultural',
-        'culture': 'Cultural',
-        'backwater': 'Cultural',
-        'houseboat': 'Cultural',
-        'safari': 'Adventure',
-        'wildlife': 'Nature',
-        'forest': 'Nature',
-        'jungle': 'Nature',
-        'nature': 'Nature',
-        'hill': 'Nature',
-        'valley': 'Nature',
-        'city': 'Cultural',
-        'urban': 'Cultural',
-    }
-    
-    # Activity keywords
-    activities = {
-        'sunset': 'Sunset views',
-        'sunrise': 'Sunrise views',
-        'water': 'Water activities',
-        'sports': 'Sports activities',
-        'cruise': 'Cruise experience',
-        'camp': 'Camping',
-        'trek': 'Trekking',
-    }
-    
-    detected_location = None
-    detected_category = 'Cultural'  # Default
-    highlights = []
-    
-    # Detect location
-    for key, location in locations.items():
-        if key in name:
-            detected_location = location
-            break
-    
-    # Detect category
-    for key, category in categories.items():
-        if key in name:
-            detected_category = category
-            highlights.append(key.title())
-            break
+    # The first match in table order wins, as before
+    detected_location = locations[0] if locations else None
+    detected_category = categories[0][1] if categories else 'Cultural'  # Default
+    highlights = [categories[0][0].title()] if categories else []
+    highlights += [a for a in activities if a not in highlights]
     
     # Extract numbers for tour identification
     numbers = re.findall(r'\d+', name)
@@ -101,14 +96,35 @@ def extract_info_from_filename(filename):
         'location': detected_location,
         'category': detected_category,
         'highlights': highlights[:3] if highlights else ['Scenic views', 'Photo opportunities'],
-        'tour_number': tour_num
+        'tour_number': tour_num,
+        'locations': locations,
+        'categories': list(dict.fromkeys(value for _, value in categories)),
+        'activities': activities
     }
 
 
-def generate_tour_from_image(image_path, folder_path):
+def apply_metadata(info, metadata):
+    """Fall back to the photo's GPS position when the filename names no place"""
+    if metadata and not info['location']:
+        place = nearest_place(metadata.get('gps'), PLACE_COORDINATES)
+        if place:
+            info['location'] = place
+            info['locations'] = [place]
+    return info
+
+
+def with_dimensions(item, metadata):
+    """Record the image size so cards can reserve space before it loads"""
+    if metadata and 'width' in metadata:
+        item['width'] = metadata['width']
+        item['height'] = metadata['height']
+    return item
+
+
+def generate_tour_from_image(image_path, folder_path, metadata=None):
     """Generate tour entry from image"""
     filename = os.path.basename(image_path)
-    info = extract_info_from_filename(filename)
+    info = extract_info_from_filename(filename, metadata)
     
     # Clean title from filename
     title_parts = Path(filename).stem.replace('-', ' ').replace('_', ' ').title().split()
@@ -116,29 +132,11 @@ def generate_tour_from_image(image_path, folder_path):
     title_parts = [w for w in title_parts if w.lower() not in ['the', 'of', 'and', 'in', 'at', 'on', 'tour', 'photo', 'image', 'img']]
     title = ' '.join(title_parts[:4]) or filename.replace('.jpg', '').replace('-', ' ').title()
     
-    # Default pricing based on category
-    prices = {
-        'Beach': 499,
-        'Adventure': 699,
-        'Cultural': 599,
-        'Luxury': 899,
-        'Nature': 549
-    }
-    
-    # Default duration based on category
-    durations = {
-        'Beach': '2 days',
-        'Adventure': '3-4 days',
-        'Cultural': '3 days',
-        'Luxury': '2-3 days',
-        'Nature': '3 days'
-    }
-    
     tour = {
         "title": title,
-        "subtitle": f"{durations.get(info['category'], '2-3 days')}",
-        "price": prices.get(info['category'], 599),
-        "duration": durations.get(info['category'], '2-3 days'),
+        "subtitle": f"{CATEGORY_DURATIONS.get(info['category'], '2-3 days')}",
+        "price": CATEGORY_PRICES.get(info['category'], 599),
+        "duration": CATEGORY_DURATIONS.get(info['category'], '2-3 days'),
         "difficulty": "Easy" if info['category'] != 'Adventure' else "Moderate",
         "image": str(image_path).replace('\\', '/'),
         "description": f"Experience the beauty of {info['location'] or 'this destination'}. Perfect for a weekend getaway with stunning views and memorable experiences.",
@@ -152,37 +150,21 @@ def generate_tour_from_image(image_path, folder_path):
         "category": info['category']
     }
     
-    return tour
+    return with_dimensions(tour, metadata)
 
 
-def generate_destination_from_image(image_path, folder_path):
+def generate_destination_from_image(image_path, folder_path, metadata=None):
     """Generate destination entry from image"""
     filename = os.path.basename(image_path)
-    info = extract_info_from_filename(filename)
+    info = extract_info_from_filename(filename, metadata)
     
     if not info['location']:
         return None
     
-    # Best time to visit based on location
-    best_times = {
-        'Kerala': 'October to March',
-        'Goa': 'October to May',
-        'Himachal': 'April to June, September to November',
-        'Rajasthan': 'October to March',
-        'Uttarakhand': 'March to June, September to November',
-    }
-    
     location_name = info['location'].split(',')[0] if info['location'] else 'Destination'
-    best_time = next((t for k, t in best_times.items() if k in location_name), 'Year-round')
+    best_time = next((t for k, t in BEST_TIMES.items() if k in location_name), 'Year-round')
     
-    region_map = {
-        'Kerala': 'South India',
-        'Goa': 'West India',
-        'Himachal': 'North India',
-        'Rajasthan': 'Northwest India',
-        'Uttarakhand': 'North India',
-    }
-    region = next((r for k, r in region_map.items() if k in location_name), 'India')
+    region = next((r for k, r in REGIONS.items() if k in location_name), 'India')
     
     destination = {
         "name": location_name,
@@ -193,160 +175,234 @@ def generate_destination_from_image(image_path, folder_path):
         "highlights": info['highlights'] + ['Local culture', 'Scenic beauty'] if len(info['highlights']) < 4 else info['highlights'][:4]
     }
     
-    return destination
+    return with_dimensions(destination, metadata)
+
+
+def is_new_image(record, manifest, renames):
+    """Check a scanned image against the scan manifest, recording renames/moves"""
+    status, previous = manifest.check(record.path, record.stat)
+    if status == MOVED:
+        renames[previous] = record.path
+    return status == NEW
+
+
+def add_to_catalog(catalog, new_items, renames, label, verbose=True):
+    """Apply renames and add new items to a catalog, skipping known images"""
+    renamed = catalog.rename_images(renames)
+    added = [item for item in new_items if catalog.add(item)]
+    
+    if added:
+        print(f"✅ Added {len(added)} new {label} to {catalog.path}")
+    if renamed:
+        print(f"🔁 Updated {renamed} renamed {label} images")
+    if not verbose:
+        return added
+    if not new_items and not renamed:
+        print(f"ℹ️  No new {label} images found")
+    elif not added and not renamed:
+        print(f"ℹ️  All {label} already exist")
+    return added
+
+
+BASE_PATH = Path('assets/images')
+TOURS_FOLDER = BASE_PATH / 'tours'
+DESTINATIONS_FOLDER = BASE_PATH / 'destinations'
+GALLERY_FOLDER = BASE_PATH / 'gallery'
+WATCHED_FOLDERS = (TOURS_FOLDER, DESTINATIONS_FOLDER, GALLERY_FOLDER)
+
+
+def build_new_items(new_records, metadata_manifest):
+    """Generate (tours, destinations, gallery items) for new images, keyed by folder"""
+    # Headers of all new images are read in one batch (in parallel if many)
+    paths = [record.path for records in new_records.values() for record in records]
+    with METRICS.phase('metadata') as phase:
+        metadata = extract_metadata(paths, metadata_manifest)
+        phase.add(files=len(paths))
+    
+    with METRICS.phase('classify') as phase:
+        new_tours = [generate_tour_from_image(record.path, TOURS_FOLDER, metadata.get(record.path))
+                     for record in new_records[TOURS_FOLDER]]
+        
+        new_destinations = []
+        for record in new_records[DESTINATIONS_FOLDER]:
+            dest = generate_destination_from_image(record.path, DESTINATIONS_FOLDER, metadata.get(record.path))
+            if dest:
+                new_destinations.append(dest)
+        
+        new_gallery_items = []
+        for record in new_records[GALLERY_FOLDER]:
+            info = extract_info_from_filename(record.name)
+            title = record.stem.replace('-', ' ').replace('_', ' ').title()
+            new_gallery_items.append(with_dimensions({
+                "src": record.path,
+                "category": info['category'].lower() if info['category'] else 'tours',
+                "title": title
+            }, metadata.get(record.path)))
+        phase.add(files=len(paths))
+    
+    return new_tours, new_destinations, new_gallery_items
+
+
+def update_catalogs(store, new_items, renames, verbose=True):
+    """Add new items to the three catalogs; returns the added items per catalog"""
+    new_tours, new_destinations, new_gallery_items = new_items
+    return (add_to_catalog(store['tours'], new_tours, renames, 'tours', verbose),
+            add_to_catalog(store['destinations'], new_destinations, renames, 'destinations', verbose),
+            add_to_catalog(store['gallery'], new_gallery_items, renames, 'gallery items', verbose))
 
 
 def scan_and_organize():
     """Main function to scan images and organize them"""
-    base_path = Path('assets/images')
+    manifest = ScanManifest.load()
+    renames = {}
     
     print("🔍 Scanning images and auto-organizing...")
     print("=" * 60)
     
-    # Scan tours folder
-    tours_folder = base_path / 'tours'
-    new_tours = []
-    
-    if tours_folder.exists():
-        print(f"\n📸 Found {len(list(tours_folder.glob('*.jpg')) + list(tours_folder.glob('*.jpeg')) + list(tours_folder.glob('*.png')))} images in tours/")
-        for img_file in tours_folder.glob('*.jpg'):
-            new_tours.append(generate_tour_from_image(img_file, tours_folder))
-        for img_file in tours_folder.glob('*.jpeg'):
-            new_tours.append(generate_tour_from_image(img_file, tours_folder))
-        for img_file in tours_folder.glob('*.png'):
-            new_tours.append(generate_tour_from_image(img_file, tours_folder))
-    
-    # Scan destinations folder
-    destinations_folder = base_path / 'destinations'
-    new_destinations = []
+    print()
+    with METRICS.phase('scan') as phase:
+        scanned = {folder: list(scan_images(folder)) for folder in WATCHED_FOLDERS}
+        phase.add(files=sum(len(records) for records in scanned.values()))
     
-    if destinations_folder.exists():
-        print(f"📸 Found {len(list(destinations_folder.glob('*.jpg')) + list(destinations_folder.glob('*.jpeg')) + list(destinations_folder.glob('*.png')))} images in destinations/")
-        for img_file in destinations_folder.glob('*.jpg'):
-            dest = generate_destination_from_image(img_file, destinations_folder)
-            if dest:
-                new_destinations.append(dest)
-        for img_file in destinations_folder.glob('*.jpeg'):
-            dest = generate_destination_from_image(img_file, destinations_folder)
-            if dest:
-                new_destinations.append(dest)
-        for img_file in destinations_folder.glob('*.png'):
-            dest = generate_destination_from_image(img_file, destinations_folder)
-            if dest:
-                new_destinations.append(dest)
+    with METRICS.phase('hash') as phase:
+        new_records = {folder: [record for record in records if is_new_image(record, manifest, renames)]
+                       for folder, records in scanned.items()}
+        phase.add(files=manifest.hashed_files, bytes=manifest.hashed_bytes)
     
-    # Scan gallery folder
-    gallery_folder = base_path / 'gallery'
-    new_gallery_items = []
-    
-    if gallery_folder.exists():
-        print(f"📸 Found {len(list(gallery_folder.glob('*.jpg')) + list(gallery_folder.glob('*.jpeg')) + list(gallery_folder.glob('*.png')))} images in gallery/")
-        for img_file in gallery_folder.glob('*.jpg'):
-            info = extract_info_from_filename(str(img_file))
-            title = Path(img_file).stem.replace('-', ' ').replace('_', ' ').title()
-            new_gallery_items.append({
-                "src": str(img_file).replace('\\', '/'),
-                "category": info['category'].lower() if info['category'] else 'tours',
-                "title": title
-            })
-        for img_file in gallery_folder.glob('*.jpeg'):
-            info = extract_info_from_filename(str(img_file))
-            title = Path(img_file).stem.replace('-', ' ').replace('_', ' ').title()
-            new_gallery_items.append({
-                "src": str(img_file).replace('\\', '/'),
-                "category": info['category'].lower() if info['category'] else 'tours',
-                "title": title
-            })
-        for img_file in gallery_folder.glob('*.png'):
-            info = extract_info_from_filename(str(img_file))
-            title = Path(img_file).stem.replace('-', ' ').replace('_', ' ').title()
-            new_gallery_items.append({
-                "src": str(img_file).replace('\\', '/'),
-                "category": info['category'].lower() if info['category'] else 'tours',
-                "title": title
-            })
+    metadata_manifest = ScanManifest.load(METADATA_MANIFEST)
+    new_items = build_new_items(new_records, metadata_manifest)
     
     # Update JSON files
     print("\n" + "=" * 60)
     print("📝 Updating JSON files...\n")
     
-    # Update tours.json
-    if new_tours:
-        tours_file = Path('data/tours.json')
-        tours_data = json.loads(tours_file.read_text(encoding='utf-8'))
-        
-        # Get max ID
-        max_id = max([t.get('id', 0) for t in tours_data['tours']]) if tours_data['tours'] else 0
-        
-        # Add IDs to new tours
-        for idx, tour in enumerate(new_tours):
-            tour['id'] = max_id + idx + 1
-        
-        # Check for duplicates and add new ones
-        existing_images = {t['image'] for t in tours_data['tours']}
-        unique_tours = [t for t in new_tours if t['image'] not in existing_images]
-        
-        if unique_tours:
-            tours_data['tours'].extend(unique_tours)
-            tours_file.write_text(json.dumps(tours_data, indent=2, ensure_ascii=False), encoding='utf-8')
-            print(f"✅ Added {len(unique_tours)} new tours to data/tours.json")
-        else:
-            print("ℹ️  All tours already exist")
-    else:
-        print("ℹ️  No new tour images found")
+    store = open_store()
+    with METRICS.phase('merge') as phase:
+        added_tours, added_destinations, added_gallery = update_catalogs(store, new_items, renames)
+        phase.add(items=len(added_tours) + len(added_destinations) + len(added_gallery))
     
-    # Update destinations.json
-    if new_destinations:
-        dest_file = Path('data/destinations.json')
-        dest_data = json.loads(dest_file.read_text(encoding='utf-8'))
-        
-        max_id = max([d.get('id', 0) for d in dest_data['destinations']]) if dest_data['destinations'] else 0
-        
-        for idx, dest in enumerate(new_destinations):
-            dest['id'] = max_id + idx + 1
-        
-        existing_images = {d['image'] for d in dest_data['destinations']}
-        unique_dests = [d for d in new_destinations if d['image'] not in existing_images]
-        
-        if unique_dests:
-            dest_data['destinations'].extend(unique_dests)
-            dest_file.write_text(json.dumps(dest_data, indent=2, ensure_ascii=False), encoding='utf-8')
-            print(f"✅ Added {len(unique_dests)} new destinations to data/destinations.json")
-        else:
-            print("ℹ️  All destinations already exist")
-    else:
-        print("ℹ️  No new destination images found")
-    
-    # Update gallery.json
-    if new_gallery_items:
-        gallery_file = Path('data/gallery.json')
-        gallery_data = json.loads(gallery_file.read_text(encoding='utf-8'))
-        
-        existing_srcs = {g['src'] for g in gallery_data['galleryImages']}
-        unique_gallery = [g for g in new_gallery_items if g['src'] not in existing_srcs]
-        
-        if unique_gallery:
-            gallery_data['galleryImages'].extend(unique_gallery)
-            gallery_file.write_text(json.dumps(gallery_data, indent=2, ensure_ascii=False), encoding='utf-8')
-            print(f"✅ Added {len(unique_gallery)} new items to data/gallery.json")
-        else:
-            print("ℹ️  All gallery items already exist")
-    else:
-        print("ℹ️  No new gallery images found")
+    # One atomic write per changed file, then the manifest, so the manifest
+    # never claims images the JSON files do not reflect yet
+    with METRICS.phase('write') as phase:
+        committed = store.commit()
+        phase.add(files=len(committed))
+    with METRICS.phase('shards'):
+        report_shards(store, committed)
+    manifest.prune(WATCHED_FOLDERS)
+    manifest.save()
+    metadata_manifest.save()
     
     print("\n" + "=" * 60)
     print("✅ Auto-organization complete!")
     print("\n📋 Summary:")
-    print(f"   Tours added: {len(new_tours)}")
-    print(f"   Destinations added: {len(new_destinations)}")
-    print(f"   Gallery items added: {len(new_gallery_items)}")
+    print(f"   Tours added: {len(added_tours)}")
+    print(f"   Destinations added: {len(added_destinations)}")
+    print(f"   Gallery items added: {len(added_gallery)}")
     print("\n💡 Tip: You can now refine the descriptions and details in the JSON files")
 
 
+def catalog_mtimes(store):
+    return {catalog.path: catalog.path.stat().st_mtime_ns for catalog in store.loaded()}
+
+
+def ingest_changes(changed, manifest, metadata_manifest, store):
+    """Classify and add the images in one batch of changed paths"""
+    if RESCAN in changed:
+        # The kernel dropped events: look at everything we know or can see
+        changed = {record.path for folder in WATCHED_FOLDERS for record in scan_images(folder, report=None)}
+        prefixes = tuple(f"{folder.as_posix()}/" for folder in WATCHED_FOLDERS)
+        changed |= {key for key in manifest.entries if key.startswith(prefixes)}
+    
+    renames = {}
+    gone = []
+    new_records = {folder: [] for folder in WATCHED_FOLDERS}
+    with METRICS.phase('hash') as phase:
+        hashed_files, hashed_bytes = manifest.hashed_files, manifest.hashed_bytes
+        for path in sorted(changed):
+            folder = Path(path).parent
+            if folder not in new_records:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                gone.append(path)
+                continue
+            record = ImageRecord(path=path, name=os.path.basename(path), folder=folder.as_posix(), stat=stat)
+            if is_new_image(record, manifest, renames):
+                new_records[folder].append(record)
+        # After the new paths, so moves were matched to their old entries first
+        for path in gone:
+            manifest.forget(path)
+        phase.add(files=manifest.hashed_files - hashed_files, bytes=manifest.hashed_bytes - hashed_bytes)
+    
+    new_items = build_new_items(new_records, metadata_manifest)
+    with METRICS.phase('merge') as phase:
+        added = update_catalogs(store, new_items, renames, verbose=False)
+        phase.add(items=sum(len(items) for items in added))
+    with METRICS.phase('write') as phase:
+        committed = store.commit()
+        phase.add(files=len(committed))
+    with METRICS.phase('shards'):
+        report_shards(store, committed)
+    manifest.save()
+    metadata_manifest.save()
+    return sum(len(items) for items in added), len(renames), len([path for path in gone if path not in renames])
+
+
+def watch_and_organize():
+    """Stay resident and add images to the catalogs as they land in the folders"""
+    scan_and_organize()
+    
+    # Warm state kept across batches: manifests and catalogs (the classifier
+    # and place table are module-level already)
+    manifest = ScanManifest.load()
+    metadata_manifest = ScanManifest.load(METADATA_MANIFEST)
+    store = open_store()
+    mtimes = {}
+    
+    watcher = open_watcher(WATCHED_FOLDERS)
+    mode = 'inotify' if isinstance(watcher, InotifyWatcher) else 'polling'
+    print(f"\n👀 Watching {', '.join(f.as_posix() + '/' for f in WATCHED_FOLDERS)} ({mode}); Ctrl+C to stop")
+    try:
+        for changed in batches(watcher):
+            # Someone edited the JSON by hand: start from their version
+            if catalog_mtimes(store) != mtimes:
+                store = open_store()
+            try:
+                added, moved, removed = ingest_changes(changed, manifest, metadata_manifest, store)
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                # Drop half-applied changes; the files were not committed, and
+                # the batch's images must not stay marked as seen
+                store = open_store()
+                manifest = ScanManifest.load()
+                metadata_manifest = ScanManifest.load(METADATA_MANIFEST)
+                continue
+            finally:
+                mtimes = catalog_mtimes(store)
+            print(f"[{datetime.now():%H:%M:%S}] ✅ {added} added, {moved} moved, {removed} removed "
+                  f"({len(changed)} changed files)")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        watcher.close()
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Add new images in assets/images/ to the JSON files")
+    parser.add_argument('--watch', action='store_true',
+                        help="keep running and add images as they are dropped into the folders")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure(args)
     try:
-        scan_and_organize()
+        if args.watch:
+            watch_and_organize()
+        else:
+            scan_and_organize()
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        instrumentation.finish(args)
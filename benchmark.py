@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Organizer Benchmarks
+Times the image organizer pipeline on generated corpora of 1k, 10k and
+100k images, so changes that make it slower show up as numbers.
+
+Each corpus is a throwaway copy of the site layout in a temporary folder:
+tiny but valid JPEG/PNG files (a few percent of them duplicates) with
+Instagram-style and keyword-rich names, plus tours, destinations and gallery
+catalogs that already list half of the images. Every phase records wall
+time, CPU time and the peak RSS of this process while it ran.
+
+Results are written as JSON. Pass a previous results file as --baseline to
+flag phases that got more than 20% slower; the exit status is 1 if any did.
+
+Run: python3 benchmark.py [--sizes 1000 10000 100000] [--baseline FILE]
+"""
+
+import argparse
+import base64
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_DIR))
+
+from catalog_shards import write_shards  # noqa: E402
+from catalog_store import CatalogStore, dumps  # noqa: E402
+from image_metadata import extract_metadata  # noqa: E402
+from image_scanner import scan_images  # noqa: E402
+from image_store import ImageStore, dedup_folders  # noqa: E402
+from instrumentation import Metrics  # noqa: E402
+from scan_manifest import ScanManifest  # noqa: E402
+
+RESULTS_FILE = REPO_DIR / '.cache' / 'benchmark-results.json'
+RESULTS_VERSION = 1
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+# A phase regresses when it is this much slower than the baseline...
+REGRESSION_THRESHOLD = 0.20
+# ...and slower by at least this many seconds (ignores noise on tiny phases)
+REGRESSION_FLOOR = 0.05
+
+# Where the corpus images go; the rest wait in assets/images/ for analyze-and-organize
+FOLDER_SHARES = {'tours': 0.10, 'destinations': 0.05, 'gallery': 0.75}
+CATALOGED_SHARE = 0.5
+DUPLICATE_SHARE = 0.05
+PNG_SHARE = 0.2
+INSTAGRAM_NAME_SHARE = 0.6
+
+# 8x8 grey JPEG; each copy gets a COM segment to make its content unique
+TINY_JPEG = base64.b64decode(
+    '/9j/4AAQSkZJRgABAQAAAQABAAD/2wBDABsSFBcUERsXFhceHBsgKEIrKCUlKFE6PTBCYFVlZF9VXVtqeJmBanGQc1tdhbWGkJ6jq62r'
+    'Z4C8ybqmx5moq6T/2wBDARweHigjKE4rK06kbl1upKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKSkpKT/'
+    'wAARCAAIAAgDASIAAhEBAxEB/8QAFQABAQAAAAAAAAAAAAAAAAAAAAL/xAAUEAEAAAAAAAAAAAAAAAAAAAAA/8QAFQEBAQAAAAAAAAAA'
+    'AAAAAAAAAgP/xAAUEQEAAAAAAAAAAAAAAAAAAAAA/9oADAMBAAIRAxEAPwCgFAf/2Q==')
+
+
+def tiny_jpeg(tag):
+    return TINY_JPEG[:2] + b'\xff\xfe' + struct.pack('>H', len(tag) + 2) + tag + TINY_JPEG[2:]
+
+
+def _png_chunk(kind, data):
+    return struct.pack('>L', len(data)) + kind + data + struct.pack('>L', zlib.crc32(kind + data))
+
+
+def tiny_png(tag):
+    return (b'\x89PNG\r\n\x1a\n'
+            + _png_chunk(b'IHDR', struct.pack('>LLBBBBB', 1, 1, 8, 2, 0, 0, 0))
+            + _png_chunk(b'tEXt', b'Comment\0' + tag)
+            + _png_chunk(b'IDAT', zlib.compress(b'\x00\x78\x8c\xa0'))
+            + _png_chunk(b'IEND', b''))
+
+
+def image_name(rng, number, words):
+    """An Instagram download name or a keyword-rich one, like the real folders hold"""
+    if rng.random() < INSTAGRAM_NAME_SHARE:
+        return (f"imgi_{number}_{rng.randrange(10**8, 10**9)}_{rng.randrange(10**16, 10**17)}"
+                f"_{rng.randrange(10**18, 10**19)}_n")
+    return '-'.join(rng.sample(words, rng.randint(2, 4))) + f"-{number:06d}"
+
+
+def catalog_entry(folder, path, stem, rng, number):
+    title = stem.replace('-', ' ').replace('_', ' ').title()[:40]
+    category = rng.choice(['Beach', 'Adventure', 'Cultural', 'Nature'])
+    if folder == 'tours':
+        return {'id': number, 'title': title, 'subtitle': '3 days', 'price': rng.randrange(300, 1500),
+                'duration': '3 days', 'difficulty': 'Easy', 'image': path,
+                'description': f"Experience {title}. Perfect for a weekend getaway.",
+                'highlights': ['Scenic views', 'Local cuisine', 'Accommodation'],
+                'includes': ['Accommodation', 'Meals', 'Guided tours', 'Transportation'],
+                'category': category}
+    if folder == 'destinations':
+        return {'id': number, 'name': title, 'region': 'India', 'image': path,
+                'description': f"Discover {title}.", 'bestTime': 'October to March',
+                'highlights': ['Local culture', 'Scenic beauty']}
+    return {'src': path, 'category': category.lower(), 'title': title}
+
+
+def generate_corpus(root, size, seed=1):
+    """Write a corpus of `size` images and matching catalogs under root; returns file counts"""
+    rng = random.Random(seed)
+    root = Path(root)
+    images = root / 'assets' / 'images'
+    data = root / 'data'
+    data.mkdir(parents=True)
+    for name in ('keywords.json', 'company.json', 'testimonials.json'):
+        shutil.copy(REPO_DIR / 'data' / name, data / name)
+    keywords = json.loads((data / 'keywords.json').read_text(encoding='utf-8'))
+    words = sorted({word for table in ('locations', 'categories', 'activities') for word in keywords[table]})
+
+    catalogs = {'tours': [], 'destinations': [], 'gallery': []}
+    counts = {}
+    previous = []
+    number = 0
+    for folder, share in list(FOLDER_SHARES.items()) + [('', 1 - sum(FOLDER_SHARES.values()))]:
+        target = images / folder if folder else images
+        target.mkdir(parents=True, exist_ok=True)
+        count = int(size * share)
+        counts[folder or 'staging'] = count
+        for _ in range(count):
+            number += 1
+            png = rng.random() < PNG_SHARE
+            stem = image_name(rng, number, words)
+            path = target / f"{stem}.{'png' if png else 'jpg'}"
+            if previous and rng.random() < DUPLICATE_SHARE:
+                content = rng.choice(previous)
+            else:
+                tag = f"bench-{number}".encode()
+                content = tiny_png(tag) if png else tiny_jpeg(tag)
+                if len(previous) < 1000:
+                    previous.append(content)
+            path.write_bytes(content)
+            if folder and rng.random() < CATALOGED_SHARE:
+                catalogs[folder].append(catalog_entry(folder, f"assets/images/{folder}/{path.name}",
+                                                      stem, rng, number))
+
+    for name, key in (('tours', 'tours'), ('destinations', 'destinations'), ('gallery', 'galleryImages')):
+        (data / f"{name}.json").write_text(dumps({key: catalogs[name]}), encoding='utf-8')
+    return counts
+
+
+@contextlib.contextmanager
+def timed(metrics, name):
+    """Time one phase with the tools' own output silenced, then print its line"""
+    with metrics.phase(name) as phase, contextlib.redirect_stdout(io.StringIO()):
+        yield phase
+    print(f"   {name:<24} {phase.wall:>9.3f}s  cpu {phase.cpu:>8.3f}s  "
+          f"rss {phase.peak_rss / 2**20:>7.1f} MB")
+
+
+def load_script(module_name, filename):
+    """Import one of the hyphen-named scripts"""
+    spec = importlib.util.spec_from_file_location(module_name, REPO_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_size(size, seed=1, keep=False):
+    """Generate a corpus of `size` images and time every phase on it"""
+    print(f"\n📊 {size} images")
+    metrics = Metrics(f'benchmark-{size}')
+    root = tempfile.mkdtemp(prefix=f'organizer-bench-{size}-')
+    cwd = os.getcwd()
+    try:
+        with timed(metrics, 'generate') as phase:
+            phase.add(files=size)
+            generate_corpus(root, size, seed)
+        os.chdir(root)
+        originals = {path: path.read_text(encoding='utf-8') for path in Path('data').glob('*.json')}
+        auto = load_script('auto_organize_images', 'auto-organize-images.py')
+        analyze = load_script('analyze_and_organize', 'analyze-and-organize.py')
+
+        with timed(metrics, 'scan') as phase:
+            records = [r for folder in auto.WATCHED_FOLDERS for r in scan_images(folder, report=None)]
+            phase.add(files=len(records))
+        manifest = ScanManifest(Path('.cache/bench-scan.json'))
+        with timed(metrics, 'hash') as phase:
+            for r in records:
+                manifest.check(r.path, r.stat)
+            phase.add(files=manifest.hashed_files, bytes=manifest.hashed_bytes)
+        with timed(metrics, 'classify') as phase:
+            auto.extract_info_from_filenames([r.name for r in records])
+            phase.add(files=len(records))
+        metadata_manifest = ScanManifest(Path('.cache/bench-metadata.json'))
+        with timed(metrics, 'metadata') as phase:
+            extract_metadata([r.path for r in records], metadata_manifest)
+            phase.add(files=len(records))
+
+        store = CatalogStore()
+        with timed(metrics, 'merge') as phase:
+            new_records = {folder: [] for folder in auto.WATCHED_FOLDERS}
+            for r in records:
+                catalog = store[Path(r.folder).name]
+                if not catalog.find_by_image(r.path):
+                    new_records[Path(r.folder)].append(r)
+            added = auto.update_catalogs(store, auto.build_new_items(new_records, metadata_manifest),
+                                         {}, verbose=False)
+            phase.add(items=sum(len(items) for items in added))
+        with timed(metrics, 'serialize') as phase:
+            phase.add(bytes=sum(len(dumps(catalog.data).encode('utf-8')) for catalog in store.loaded()))
+        with timed(metrics, 'write') as phase:
+            phase.add(files=len(store.commit()))
+        with timed(metrics, 'shards') as phase:
+            phase.add(files=write_shards(store)[0])
+        with timed(metrics, 'dedup') as phase:
+            report = dedup_folders(ImageStore(), auto.WATCHED_FOLDERS)
+            phase.add(files=report.files, duplicates=report.duplicates)
+
+        # End to end, from the generated catalogs and with no manifests
+        for path, text in originals.items():
+            path.write_text(text, encoding='utf-8')
+        shutil.rmtree('.cache')
+        with timed(metrics, 'scan_and_organize'):
+            auto.scan_and_organize()
+        with timed(metrics, 'scan_and_organize_warm'):
+            auto.scan_and_organize()
+        with timed(metrics, 'organize_images') as phase:
+            analyze.organize_images()
+            phase.add(files=int(size * (1 - sum(FOLDER_SHARES.values()))))
+    finally:
+        os.chdir(cwd)
+        if keep:
+            print(f"   corpus kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+    return {'phases': {name: phase.to_dict() for name, phase in metrics.phases.items()}}
+
+
+def compare(results, baseline, threshold=REGRESSION_THRESHOLD, floor=REGRESSION_FLOOR):
+    """Return [(size, phase, baseline wall, new wall)] for phases that got slower"""
+    regressions = []
+    for size, run in results['runs'].items():
+        base_run = baseline.get('runs', {}).get(size)
+        if not base_run:
+            continue
+        for phase, record in run['phases'].items():
+            base = base_run['phases'].get(phase)
+            if phase == 'generate' or not base:
+                continue
+            if record['wall'] > base['wall'] * (1 + threshold) and record['wall'] - base['wall'] > floor:
+                regressions.append((size, phase, base['wall'], record['wall']))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the image organizer scripts")
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                        help="corpus sizes (default: 1000 10000 100000)")
+    parser.add_argument('--seed', type=int, default=1, help="corpus random seed")
+    parser.add_argument('--out', default=str(RESULTS_FILE), help="results file")
+    parser.add_argument('--baseline', help="earlier results file to compare against")
+    parser.add_argument('--keep', action='store_true', help="keep the generated corpora")
+    args = parser.parse_args()
+
+    results = {
+        'version': RESULTS_VERSION,
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'seed': args.seed,
+        'runs': {str(size): run_size(size, args.seed, args.keep) for size in args.sizes},
+    }
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2), encoding='utf-8')
+    print(f"\n✅ Results written to {out}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding='utf-8'))
+        regressions = compare(results, baseline)
+        for size, phase, before, after in regressions:
+            print(f"❌ {size} images, {phase}: {before:.3f}s → {after:.3f}s (+{(after / before - 1) * 100:.0f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ No regressions against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
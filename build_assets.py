@@ -0,0 +1,430 @@
+#!/usr/bin/env python3
+"""
+Asset Build
+Bundles, minifies and fingerprints a built site (see build_site.py) so every
+asset can be served with a year-long, immutable cache lifetime:
+
+  - the scripts every page loads are concatenated into one minified
+    assets/js/site.<hash>.js, and style.css + responsive.css into
+    assets/css/site.<hash>.css, less the rules no page or script can use
+    (see critical_css.py); other scripts and styles are minified
+  - every image, script, stylesheet and data file gets a fingerprinted
+    name.<hash>.ext next to the original (a hardlink where possible)
+  - references in the pages, styles, scripts and data files are rewritten
+    to the fingerprinted names
+  - text files get .gz siblings, and .br ones too if the brotli module is
+    installed (pip install brotli)
+  - asset-manifest.json maps every original path to its fingerprinted one
+
+The originals stay in place, so paths built at runtime (the data shards
+DataLoader composes from ids) still resolve. Pages get the fingerprinted
+names of the top-level data files as window.__ASSET_MANIFEST__.
+
+Run: python3 build_assets.py [--site DIR]  (build_site.py runs it for you)
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+from catalog_store import atomic_write_text
+from critical_css import prune_css, used_tokens
+from scan_manifest import ScanManifest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SITE_DIR = Path('_site')
+FINGERPRINT_MANIFEST = Path('.cache/fingerprint-manifest.json')
+ASSET_MANIFEST = 'asset-manifest.json'
+HASH_LENGTH = 10
+
+# Loaded by every page, in this order
+SHARED_SCRIPTS = [
+    'assets/js/data-loader.js',
+    'assets/js/shared-utils.js',
+    'assets/js/page-templates.js',
+    'assets/js/main.js',
+    'assets/js/social-icons.js',
+]
+SHARED_STYLES = ['assets/css/style.css', 'assets/css/responsive.css']
+SCRIPT_BUNDLE = 'assets/js/site.js'
+STYLE_BUNDLE = 'assets/css/site.css'
+
+COMPRESSIBLE = {'.html', '.js', '.css', '.json', '.svg', '.txt', '.xml'}
+MIN_COMPRESS_SIZE = 256
+
+REFERENCE_PATTERN = re.compile(r"assets/[^\s\"'(),;<>`\\]+")
+CSS_URL_PATTERN = re.compile(r"url\(\s*(['\"]?)([^'\")]+)\1\s*\)")
+FINGERPRINTED = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}\.\w+$")
+
+
+def fingerprint_name(path, digest):
+    path = Path(path)
+    return str(path.with_name(f"{path.stem}.{digest[:HASH_LENGTH]}{path.suffix}")).replace('\\', '/')
+
+
+# --- Minifiers -------------------------------------------------------------
+
+WHITESPACE = frozenset(' \t\r\n\f\v\u00a0\ufeff')
+WORD_CHARS = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$')
+# After these keywords a / starts a regular expression, not a division
+REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void',
+                  'throw', 'case', 'do', 'else', 'yield', 'await'}
+
+
+def _is_word(char):
+    return char in WORD_CHARS or ord(char) > 127
+
+
+def _scan_quoted(source, i):
+    """Return the end of the string literal starting at source[i]"""
+    quote = source[i]
+    i += 1
+    while i < len(source):
+        if source[i] == '\\':
+            i += 2
+            continue
+        if source[i] == quote or source[i] == '\n':
+            return i + 1
+        i += 1
+    return i
+
+
+def _scan_template(source, i):
+    """Return the end of the template literal at source[i], including ${...} parts"""
+    i += 1
+    while i < len(source):
+        char = source[i]
+        if char == '\\':
+            i += 2
+        elif char == '`':
+            return i + 1
+        elif source.startswith('${', i):
+            i = _scan_braces(source, i + 2)
+        else:
+            i += 1
+    return i
+
+
+def _scan_braces(source, i):
+    """Skip JS code up to the } closing a ${ or {, minding nested literals"""
+    depth = 1
+    while i < len(source) and depth:
+        char = source[i]
+        if char in '\'"':
+            i = _scan_quoted(source, i)
+        elif char == '`':
+            i = _scan_template(source, i)
+        elif source.startswith('//', i):
+            end = source.find('\n', i)
+            i = len(source) if end < 0 else end
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = len(source) if end < 0 else end + 2
+        else:
+            depth += {'{': 1, '}': -1}.get(char, 0)
+            i += 1
+    return i
+
+
+def _scan_regex(source, i):
+    """Return the end of the regular expression literal at source[i], flags included"""
+    i += 1
+    in_class = False
+    while i < len(source) and source[i] != '\n':
+        char = source[i]
+        if char == '\\':
+            i += 2
+            continue
+        if char == '[':
+            in_class = True
+        elif char == ']':
+            in_class = False
+        elif char == '/' and not in_class:
+            i += 1
+            while i < len(source) and _is_word(source[i]):
+                i += 1
+            return i
+        i += 1
+    return i
+
+
+def _js_tokens(source):
+    """Yield (kind, text) with kind 'space', 'newline', 'word', 'literal' or 'punct'"""
+    i = 0
+    n = len(source)
+    previous = None     # last (kind, text) that was not whitespace
+    while i < n:
+        char = source[i]
+        if char in WHITESPACE:
+            start = i
+            while i < n and source[i] in WHITESPACE:
+                i += 1
+            yield ('newline' if '\n' in source[start:i] else 'space'), None
+            continue
+        if source.startswith('//', i):
+            i = source.find('\n', i)
+            i = n if i < 0 else i
+            continue
+        if source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            end = n if end < 0 else end + 2
+            yield ('newline' if '\n' in source[i:end] else 'space'), None
+            i = end
+            continue
+        if char in '\'"':
+            end = _scan_quoted(source, i)
+        elif char == '`':
+            end = _scan_template(source, i)
+        elif char == '/' and (previous is None
+                              or (previous[0] == 'punct' and previous[1] not in ')]')
+                              or (previous[0] == 'word' and previous[1] in REGEX_KEYWORDS)):
+            end = _scan_regex(source, i)
+        elif _is_word(char):
+            end = i + 1
+            while end < n and _is_word(source[end]):
+                end += 1
+            previous = ('word', source[i:end])
+            yield previous
+            i = end
+            continue
+        else:
+            previous = ('punct', char)
+            yield previous
+            i += 1
+            continue
+        previous = ('literal', source[i:end])
+        yield previous
+        i = end
+
+
+def _needs_space(last, first):
+    """Whether dropping whitespace between two characters would change the code"""
+    if _is_word(last) and (_is_word(first) or first == '.'):
+        return True
+    return last + first in ('++', '--', '//', '/*', '+.', '-.', '<!')
+
+
+def minify_js(source):
+    """
+    Remove comments and redundant whitespace from JavaScript. Strings,
+    template literals and regular expressions are kept verbatim, and line
+    breaks are kept wherever automatic semicolon insertion could depend
+    on them.
+    """
+    out = []
+    gap = None
+    for kind, text in _js_tokens(source):
+        if kind in ('space', 'newline'):
+            gap = 'newline' if kind == 'newline' or gap == 'newline' else 'space'
+            continue
+        if gap and out:
+            last = out[-1][-1]
+            if gap == 'newline' and last not in '{;,([' and text[0] not in '})],;.?:':
+                out.append('\n')
+            elif _needs_space(last, text[0]):
+                out.append(' ')
+        gap = None
+        out.append(text)
+    return ''.join(out) + '\n'
+
+
+def minify_css(source):
+    """Remove comments and redundant whitespace from CSS, leaving strings intact"""
+    parts = re.split(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|/\*.*?\*/)""", source, flags=re.S)
+    out = []
+    for index, part in enumerate(parts):
+        if index % 2:
+            if not part.startswith('/*'):
+                out.append(part)
+            continue
+        part = re.sub(r'\s+', ' ', part)
+        part = re.sub(r' ?([{};,>]) ?', r'\1', part)
+        part = re.sub(r': ', ':', part)
+        out.append(part)
+    text = ''.join(out).strip()
+    return text.replace(';}', '}') + '\n'
+
+
+# --- Fingerprinting --------------------------------------------------------
+
+class AssetBuild:
+    """Fingerprinted names for the files of one built site"""
+
+    def __init__(self, site_dir=SITE_DIR):
+        self.site = Path(site_dir)
+        self.assets = {}        # original path -> fingerprinted path (site-relative)
+        self.bundles = {}
+        self.hashes = ScanManifest.load(FINGERPRINT_MANIFEST)
+
+    def _relative(self, path):
+        return path.relative_to(self.site).as_posix()
+
+    def add_file(self, relative):
+        """Fingerprint an existing file by linking it to its hashed name"""
+        path = self.site / relative
+        self.hashes.check(path)
+        target = fingerprint_name(relative, self.hashes.hash_of(path))
+        _link(path, self.site / target)
+        self.assets[relative] = target
+        return target
+
+    def add_text(self, relative, text, keep_original=True):
+        """Write text as a fingerprinted file (and at its original path)"""
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        target = fingerprint_name(relative, digest)
+        atomic_write_text(self.site / target, text)
+        if keep_original:
+            atomic_write_text(self.site / relative, text)
+        self.assets[relative] = target
+        return target
+
+    def rewrite(self, text):
+        """Point asset references in text at their fingerprinted names"""
+        return REFERENCE_PATTERN.sub(lambda m: self.assets.get(m.group(0), m.group(0)), text)
+
+    def rewrite_css(self, text, css_path):
+        """Rewrite url()s, which are relative to the stylesheet, for a stylesheet at css_path"""
+        base = Path(css_path).parent
+
+        def replace(match):
+            url = match.group(2)
+            if re.match(r'(?:[a-z]+:|/|#)', url):
+                return match.group(0)
+            original = os.path.normpath(base / url).replace('\\', '/')
+            target = self.assets.get(original)
+            if not target:
+                return match.group(0)
+            return f"url({match.group(1)}{os.path.relpath(target, base).replace(os.sep, '/')}{match.group(1)})"
+        return CSS_URL_PATTERN.sub(replace, text)
+
+
+def _link(src, dst):
+    """Hardlink dst to src (replacing dst); copy where links are not possible"""
+    tmp = dst.with_name(f".{dst.name}.tmp")
+    if tmp.exists():
+        tmp.unlink()
+    try:
+        os.link(src, tmp)
+    except OSError:
+        tmp.write_bytes(src.read_bytes())
+    os.replace(tmp, dst)
+
+
+def compress_file(path):
+    """Write .gz (and .br) siblings when they are smaller; returns bytes saved"""
+    data = path.read_bytes()
+    saved = 0
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli:
+        variants.append(('.br', brotli.compress(data, quality=11)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            sibling = path.with_name(path.name + suffix)
+            sibling.write_bytes(compressed)
+            saved = max(saved, len(data) - len(compressed))
+    return saved
+
+
+def replace_tags(page, tag_pattern, paths, bundle_tag):
+    """Replace the tags loading `paths` (all present, in order) with one bundle tag"""
+    tags = [re.search(tag_pattern.format(re.escape(path)), page) for path in paths]
+    if not all(tags) or [t.start() for t in tags] != sorted(t.start() for t in tags):
+        return page
+    page = page[:tags[0].start()] + bundle_tag + page[tags[0].end():]
+    for path in paths[1:]:
+        page = re.sub(r'[ \t]*' + tag_pattern.format(re.escape(path)) + r'\n?', '', page, count=1)
+    return page
+
+
+def precompress(site_dir=SITE_DIR):
+    """Write compressed siblings for every text file in the site"""
+    saved = 0
+    compressed = 0
+    for path in sorted(Path(site_dir).rglob('*')):
+        if path.suffix in COMPRESSIBLE and path.is_file() and path.stat().st_size >= MIN_COMPRESS_SIZE:
+            saved += compress_file(path)
+            compressed += 1
+    formats = '.gz and .br' if brotli else '.gz'
+    print(f"✅ {compressed} files precompressed ({formats}, {saved / 1024:.0f} KB saved)")
+    if not brotli:
+        print("💡 Tip: pip install brotli to also write .br files")
+
+
+def build_assets(site_dir=SITE_DIR, pages=None, compress=True):
+    """Bundle, minify, fingerprint and (unless compress is False) precompress the site"""
+    build = AssetBuild(site_dir)
+    site = build.site
+    print("🔏 Fingerprinting assets...")
+
+    # Images first, since styles, scripts, data and pages refer to them
+    images = [p for p in sorted((site / 'assets').rglob('*'))
+              if p.is_file() and p.suffix.lower() not in ('.js', '.css')
+              and not FINGERPRINTED.search(p.name) and not p.name.startswith('.')]
+    for path in images:
+        build.add_file(build._relative(path))
+
+    pages = pages or sorted(site.glob('*.html'))
+    scripts = sorted(build._relative(p) for p in (site / 'assets').rglob('*.js') if not FINGERPRINTED.search(p.name))
+    tokens = used_tokens([page.read_text(encoding='utf-8') for page in pages],
+                         [(site / path).read_text(encoding='utf-8') for path in scripts])
+
+    styles = sorted(build._relative(p) for p in (site / 'assets').rglob('*.css') if not FINGERPRINTED.search(p.name))
+    bundle = minify_css('\n'.join(build.rewrite_css((site / path).read_text(encoding='utf-8'), path)
+                                  for path in SHARED_STYLES if path in styles))
+    pruned, dropped = prune_css(bundle, tokens)
+    print(f"✂️  {dropped} unused CSS rules dropped ({(len(bundle) - len(pruned)) / 1024:.1f} KB)")
+    build.add_text(STYLE_BUNDLE, pruned)
+    build.bundles[STYLE_BUNDLE] = [path for path in SHARED_STYLES if path in styles]
+    for path in styles:
+        build.add_text(path, minify_css(build.rewrite_css((site / path).read_text(encoding='utf-8'), path)))
+
+    # A ; between files, so one ending without a semicolon cannot run into the next
+    bundle = ';\n'.join(build.rewrite((site / path).read_text(encoding='utf-8'))
+                        for path in SHARED_SCRIPTS if path in scripts)
+    build.add_text(SCRIPT_BUNDLE, minify_js(bundle))
+    build.bundles[SCRIPT_BUNDLE] = [path for path in SHARED_SCRIPTS if path in scripts]
+    for path in scripts:
+        build.add_text(path, minify_js(build.rewrite((site / path).read_text(encoding='utf-8'))))
+
+    data_files = sorted(build._relative(p) for p in (site / 'data').rglob('*.json') if not FINGERPRINTED.search(p.name))
+    for path in data_files:
+        text = (site / path).read_text(encoding='utf-8')
+        build.add_text(path, build.rewrite(text), keep_original=True)
+
+    # Pages: one tag per bundle, fingerprinted references, and the names of
+    # the top-level data files for DataLoader
+    data_names = {path: target for path, target in build.assets.items()
+                  if path.startswith('data/') and path.count('/') == 1}
+    manifest_script = ('<script>window.__ASSET_MANIFEST__ = '
+                       f"{json.dumps(data_names, separators=(',', ':'))};</script>\n    ")
+    for page_path in pages:
+        page = page_path.read_text(encoding='utf-8')
+        page = replace_tags(page, r'<link rel="stylesheet" href="{}">', build.bundles[STYLE_BUNDLE],
+                            f'<link rel="stylesheet" href="{STYLE_BUNDLE}">')
+        page = replace_tags(page, r'<script src="{}"></script>', build.bundles[SCRIPT_BUNDLE],
+                            manifest_script + f'<script src="{SCRIPT_BUNDLE}"></script>')
+        atomic_write_text(page_path, build.rewrite(page))
+
+    build.hashes.save()
+    atomic_write_text(site / ASSET_MANIFEST, json.dumps(
+        {'version': 1, 'assets': build.assets, 'bundles': build.bundles}, indent=2))
+    print(f"✅ {len(build.assets)} assets fingerprinted")
+
+    if compress:
+        precompress(site)
+    return build
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Bundle, fingerprint and precompress a built site")
+    parser.add_argument('--site', default=str(SITE_DIR), help="built site directory (default: _site)")
+    args = parser.parse_args()
+    build_assets(args.site)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Responsive Image Derivatives
+Generates resized AVIF/WebP/JPEG versions of every tour, destination and
+gallery image and writes a srcset/sizes block into the matching JSON entry,
+so the cards download an image close to the size they display.
+
+Derivatives are named after the source image's content hash, so unchanged
+images are skipped on the next run. Requires Pillow (pip install Pillow);
+AVIF output is only produced when the installed Pillow can write it.
+
+Run: python3 build_derivatives.py [--workers N]
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from catalog_shards import report_shards
+from catalog_store import CatalogStore
+from scan_manifest import ScanManifest
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+DERIVATIVES_DIR = Path('assets/images/derivatives')
+DERIVATIVES_MANIFEST = Path('.cache/derivatives-manifest.json')
+
+# Cards are ~400px wide; 800/1200 cover 2x/3x screens and the detail page
+WIDTHS = (400, 800, 1200)
+
+# Preferred format first; browsers pick the first <source> they support
+FORMATS = (
+    ('avif', 'image/avif', {'quality': 50}),
+    ('webp', 'image/webp', {'quality': 75, 'method': 6}),
+    ('jpeg', 'image/jpeg', {'quality': 80, 'optimize': True, 'progressive': True}),
+)
+
+# Catalog name -> sizes attribute for its cards
+CATALOG_SIZES = {
+    'tours': '(max-width: 768px) 100vw, 400px',
+    'destinations': '(max-width: 768px) 100vw, 400px',
+    'gallery': '(max-width: 768px) 50vw, 300px',
+}
+
+
+def available_formats():
+    """Formats from FORMATS that the installed Pillow can encode"""
+    extensions = Image.registered_extensions()
+    savable = set(Image.SAVE)
+    return [fmt for fmt in FORMATS
+            if extensions.get(f'.{fmt[0]}', '').upper() in savable]
+
+
+def derivative_path(digest, width, ext):
+    return DERIVATIVES_DIR / f"{digest[:16]}-{width}.{ext}"
+
+
+def target_widths(source_width):
+    """Bucket widths up to the source width (never upscale)"""
+    widths = [w for w in WIDTHS if w < source_width]
+    if len(widths) < len(WIDTHS):
+        widths.append(min(source_width, WIDTHS[-1]))
+    return widths
+
+
+def render_derivatives(source, digest, formats):
+    """
+    Worker: write any missing derivatives for one source image.
+    Returns {mime: [(path, width), ...]}.
+    """
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        widths = target_widths(img.width)
+        result = {}
+        for ext, mime, options in formats:
+            variants = []
+            for width in widths:
+                out = derivative_path(digest, width, ext)
+                if not out.exists():
+                    height = round(img.height * width / img.width)
+                    resized = img.resize((width, height), Image.LANCZOS)
+                    if ext == 'jpeg' and resized.mode not in ('RGB', 'L'):
+                        resized = resized.convert('RGB')
+                    tmp = out.with_name(f".{out.name}.tmp")
+                    resized.save(tmp, format=ext.upper(), **options)
+                    os.replace(tmp, out)
+                variants.append((str(out).replace('\\', '/'), width))
+            result[mime] = variants
+        return result
+
+
+def build_srcset(variants):
+    return {mime: ', '.join(f"{path} {width}w" for path, width in items)
+            for mime, items in variants.items()}
+
+
+def build_derivatives(workers=None):
+    """Generate derivatives for every catalog image and update the JSON files"""
+    if Image is None:
+        print("❌ Pillow is required: pip install Pillow")
+        return False
+
+    formats = available_formats()
+    print(f"🖼️  Formats: {', '.join(fmt[0] for fmt in formats)}; widths: {', '.join(map(str, WIDTHS))}")
+    DERIVATIVES_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = ScanManifest.load(DERIVATIVES_MANIFEST)
+
+    store = CatalogStore()
+    jobs = {}
+    for name in CATALOG_SIZES:
+        catalog = store[name]
+        for entry in catalog:
+            source = entry.get(catalog.image_key)
+            if source and source not in jobs and os.path.isfile(source):
+                manifest.check(source)
+                jobs[source] = manifest.hash_of(source)
+
+    # Sources whose derivatives all exist need no worker at all
+    mimes = {fmt[1] for fmt in formats}
+    done = {}
+    pending = {}
+    for source, digest in jobs.items():
+        entry = manifest.entries[source]
+        previous = entry.get('derivatives')
+        if (previous and entry.get('derived_from') == digest and set(previous) == mimes
+                and all(os.path.exists(p) for items in previous.values() for p, _ in items)):
+            done[source] = previous
+        else:
+            pending[source] = digest
+
+    print(f"📸 {len(jobs)} images, {len(pending)} to process")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {source: pool.submit(render_derivatives, source, digest, formats)
+                   for source, digest in pending.items()}
+        for source, future in futures.items():
+            try:
+                done[source] = future.result()
+            except OSError as e:
+                print(f"⚠️  Skipped {source}: {e}")
+                continue
+            manifest.entries[source]['derivatives'] = done[source]
+            manifest.entries[source]['derived_from'] = pending[source]
+            manifest.dirty = True
+
+    for name, sizes in CATALOG_SIZES.items():
+        catalog = store[name]
+        updated = 0
+        for entry in catalog:
+            variants = done.get(entry.get(catalog.image_key))
+            if variants and catalog.update(entry, srcset=build_srcset(variants), sizes=sizes):
+                updated += 1
+        if updated:
+            print(f"✅ Updated {updated} entries in {catalog.path}")
+
+    report_shards(store, store.commit())
+    manifest.save()
+    print("✅ Derivatives up to date")
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate responsive image derivatives")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+    build_derivatives(workers=args.workers)
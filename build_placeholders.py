@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Image Placeholders
+Computes a dominant colour and a tiny blurred preview for every tour,
+destination and gallery image and stores them in the JSON entries as
+
+  "placeholder": {"color": "#6b8e9f", "preview": "data:image/png;base64,..."}
+
+Cards paint the preview as the image's background, so something close to
+the photo shows instantly while the real image streams in, and a broken
+image falls back to the preview instead of an SVG built in the browser.
+
+Previews are at most PREVIEW_SIZE pixels on their long side (a few hundred
+bytes); the browser's smooth upscaling blurs them. Results are cached by
+content hash and new images are processed in parallel. Requires Pillow
+(pip install Pillow).
+
+Run: python3 build_placeholders.py [--workers N]
+"""
+
+import argparse
+import base64
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from catalog_shards import report_shards
+from catalog_store import CatalogStore
+from scan_manifest import ScanManifest
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+PLACEHOLDER_MANIFEST = Path('.cache/placeholder-manifest.json')
+PLACEHOLDER_CATALOGS = ('tours', 'destinations', 'gallery')
+
+PREVIEW_SIZE = 8
+PALETTE_COLORS = 4
+
+
+def compute_placeholder(source):
+    """Worker: return {'color', 'preview'} for one image"""
+    with Image.open(source) as img:
+        # Let the JPEG decoder scale down while decoding (much faster)
+        img.draft('RGB', (64, 64))
+        img = ImageOps.exif_transpose(img).convert('RGB')
+
+        sample = img.resize((32, 32), Image.BILINEAR)
+        palette_image = sample.quantize(colors=PALETTE_COLORS)
+        _, index = max(palette_image.getcolors())
+        palette = palette_image.getpalette()
+        color = '#{:02x}{:02x}{:02x}'.format(*palette[index * 3:index * 3 + 3])
+
+        preview = img.copy()
+        preview.thumbnail((PREVIEW_SIZE, PREVIEW_SIZE), Image.BILINEAR)
+        # Drop the ICC profile and other metadata, which would dwarf the pixels
+        preview.info = {}
+        buffer = io.BytesIO()
+        preview.save(buffer, format='PNG', optimize=True)
+        data = base64.b64encode(buffer.getvalue()).decode('ascii')
+        return {'color': color, 'preview': f'data:image/png;base64,{data}'}
+
+
+def build_placeholders(workers=None):
+    """Compute placeholders for every catalog image and update the JSON files"""
+    if Image is None:
+        print("❌ Pillow is required: pip install Pillow")
+        return False
+
+    manifest = ScanManifest.load(PLACEHOLDER_MANIFEST)
+    store = CatalogStore()
+    sources = {}
+    for name in PLACEHOLDER_CATALOGS:
+        catalog = store[name]
+        for entry in catalog:
+            source = entry.get(catalog.image_key)
+            if source and source not in sources and os.path.isfile(source):
+                manifest.check(source)
+                sources[source] = manifest.hash_of(source)
+
+    done = {}
+    pending = {}
+    for source, digest in sources.items():
+        entry = manifest.entries[source]
+        if entry.get('placeholder') and entry.get('placeholder_from') == digest:
+            done[source] = entry['placeholder']
+        else:
+            pending[source] = digest
+
+    print(f"🎨 {len(sources)} images, {len(pending)} to process")
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {source: pool.submit(compute_placeholder, source) for source in pending}
+            for source, future in futures.items():
+                try:
+                    done[source] = future.result()
+                except OSError as e:
+                    print(f"⚠️  Skipped {source}: {e}")
+                    continue
+                manifest.entries[source]['placeholder'] = done[source]
+                manifest.entries[source]['placeholder_from'] = pending[source]
+                manifest.dirty = True
+
+    for name in PLACEHOLDER_CATALOGS:
+        catalog = store[name]
+        updated = 0
+        for entry in catalog:
+            placeholder = done.get(entry.get(catalog.image_key))
+            if placeholder and catalog.update(entry, placeholder=placeholder):
+                updated += 1
+        if updated:
+            print(f"✅ Updated {updated} entries in {catalog.path}")
+
+    report_shards(store, store.commit())
+    manifest.save()
+    print("✅ Placeholders up to date")
+    return True
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compute image placeholders for the catalogs")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+    build_placeholders(workers=args.workers)
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Service Worker Build
+Generates _site/sw.js from the asset manifest written by build_assets.py
+and registers it on every page, so repeat visits (and flaky connections)
+are served from the browser's cache:
+
+  pages                   network first, cached copy when offline
+  app shell               precached: the pages, their bundled scripts and
+                          styles, the catalog JSON and the placeholder image
+  fingerprinted files     cache first (their content never changes)
+  other data files        stale-while-revalidate (shards, version.json)
+  images                  a runtime cache holding at most IMAGE_CACHE_ENTRIES,
+                          least recently used evicted; fingerprinted ones
+                          cache first, others network first
+
+The cache names carry a hash of everything precached, so a deploy that
+changes any of it installs a new worker and drops the old caches.
+
+Run: python3 build_service_worker.py [--site DIR]  (build_site.py runs it for you)
+"""
+
+import argparse
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from build_assets import ASSET_MANIFEST, REFERENCE_PATTERN, SITE_DIR
+from catalog_store import atomic_write_text
+
+SERVICE_WORKER = 'sw.js'
+IMAGE_CACHE_ENTRIES = 200
+
+# Catalogs DataLoader reads on most pages; big ones are left to the runtime cache
+PRECACHE_DATA = [
+    'data/company.json', 'data/tours.json', 'data/destinations.json', 'data/testimonials.json',
+    'data/gallery.json', 'data/related-tours.json',
+]
+PRECACHE_MAX_BYTES = 1 << 20
+PLACEHOLDER_IMAGE = 'assets/images/placeholder.svg'
+
+REGISTRATION = """    <script>
+      if ('serviceWorker' in navigator) {
+        window.addEventListener('load', () => navigator.serviceWorker.register('sw.js'));
+      }
+    </script>
+"""
+
+WORKER_TEMPLATE = """// Generated by build_service_worker.py; do not edit
+const VERSION = '__VERSION__';
+const SHELL_CACHE = `shell-${VERSION}`;
+const DATA_CACHE = `data-${VERSION}`;
+const IMAGE_CACHE = 'images';
+const IMAGE_CACHE_ENTRIES = __IMAGE_CACHE_ENTRIES__;
+const PRECACHE = __PRECACHE__;
+const PLACEHOLDER = __PLACEHOLDER__;
+const FINGERPRINTED = /\\.[0-9a-f]{10}\\.\\w+$/;
+const IMAGE = /\\.(?:jpe?g|png|webp|avif|gif|svg)$/i;
+
+self.addEventListener('install', event => {
+  event.waitUntil(
+    caches.open(SHELL_CACHE)
+      .then(cache => cache.addAll(PRECACHE))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener('activate', event => {
+  // Drop the caches of previous deploys; images are shared across deploys
+  const keep = [SHELL_CACHE, DATA_CACHE, IMAGE_CACHE];
+  event.waitUntil(
+    caches.keys()
+      .then(names => Promise.all(names.filter(name => !keep.includes(name)).map(name => caches.delete(name))))
+      .then(() => self.clients.claim())
+  );
+});
+
+self.addEventListener('fetch', event => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== 'GET' || url.origin !== self.location.origin) {
+    return;
+  }
+  if (request.mode === 'navigate') {
+    event.respondWith(networkFirst(request, url));
+  } else if (IMAGE.test(url.pathname)) {
+    event.respondWith(cachedImage(event, request, url));
+  } else if (FINGERPRINTED.test(url.pathname)) {
+    event.respondWith(cacheFirst(request, SHELL_CACHE));
+  } else if (url.pathname.endsWith('.json')) {
+    event.respondWith(staleWhileRevalidate(event, request));
+  }
+});
+
+async function networkFirst(request, url) {
+  try {
+    const response = await fetch(request);
+    if (response.ok) {
+      const cache = await caches.open(SHELL_CACHE);
+      await cache.put(request, response.clone());
+    }
+    return response;
+  } catch (error) {
+    const cached = await caches.match(request, { ignoreSearch: true })
+      || (url.pathname.endsWith('/') && await caches.match('index.html'));
+    if (cached) return cached;
+    throw error;
+  }
+}
+
+async function cacheFirst(request, cacheName) {
+  const cached = await caches.match(request);
+  if (cached) return cached;
+  const response = await fetch(request);
+  if (response.ok) {
+    const cache = await caches.open(cacheName);
+    await cache.put(request, response.clone());
+  }
+  return response;
+}
+
+async function staleWhileRevalidate(event, request) {
+  // DataLoader's conditional headers are for the HTTP cache, not for us
+  const key = new Request(request.url);
+  const cache = await caches.open(DATA_CACHE);
+  const cached = await cache.match(key);
+  const update = fetch(key).then(async response => {
+    if (response.ok) await cache.put(key, response.clone());
+    return response;
+  });
+  if (cached) {
+    event.waitUntil(update.catch(() => {}));
+    return cached;
+  }
+  return update;
+}
+
+async function cachedImage(event, request, url) {
+  const cache = await caches.open(IMAGE_CACHE);
+  const cached = await cache.match(request);
+  if (cached && FINGERPRINTED.test(url.pathname)) {
+    // Re-inserting moves the entry to the end, so keys() is in LRU order.
+    // Clone now: cached itself is returned and its body read meanwhile
+    const copy = cached.clone();
+    event.waitUntil(cache.delete(request).then(() => cache.put(request, copy)));
+    return cached;
+  }
+  // Other images are revalidated; storing the fresh response moves it to the end
+  try {
+    const response = await fetch(request);
+    if (response.ok) {
+      event.waitUntil(cache.put(request, response.clone()).then(() => trimCache(cache, IMAGE_CACHE_ENTRIES)));
+    }
+    return response;
+  } catch (error) {
+    const fallback = cached || (PLACEHOLDER && await caches.match(PLACEHOLDER));
+    if (fallback) return fallback;
+    throw error;
+  }
+}
+
+async function trimCache(cache, maxEntries) {
+  const keys = await cache.keys();
+  await Promise.all(keys.slice(0, Math.max(0, keys.length - maxEntries)).map(key => cache.delete(key)));
+}
+"""
+
+
+def precache_list(site, assets, pages):
+    """Pages, the scripts and styles they load, catalog JSON and the placeholder"""
+    urls = [page.name for page in pages]
+    for page in pages:
+        for ref in REFERENCE_PATTERN.findall(page.read_text(encoding='utf-8')):
+            if re.search(r'\.(?:js|css)$', ref) and ref not in urls:
+                urls.append(ref)
+    for path in PRECACHE_DATA:
+        target = assets.get(path)
+        if target and (site / target).stat().st_size <= PRECACHE_MAX_BYTES:
+            urls.append(target)
+    if PLACEHOLDER_IMAGE in assets:
+        urls.append(assets[PLACEHOLDER_IMAGE])
+    return urls
+
+
+def inject_registration(page):
+    """Register the service worker from a page (once)"""
+    text = page.read_text(encoding='utf-8')
+    if 'serviceWorker.register' in text or '</body>' not in text:
+        return False
+    atomic_write_text(page, text.replace('</body>', REGISTRATION + '</body>', 1))
+    return True
+
+
+def build_service_worker(site_dir=SITE_DIR, pages=None):
+    """Write sw.js for a fingerprinted site and register it on the pages"""
+    site = Path(site_dir)
+    assets = json.loads((site / ASSET_MANIFEST).read_text(encoding='utf-8'))['assets']
+    pages = pages or sorted(site.glob('*.html'))
+    for page in pages:
+        inject_registration(page)
+
+    precache = precache_list(site, assets, pages)
+    # Pages keep their names, so their content goes into the version too
+    digest = hashlib.sha256()
+    for url in precache:
+        digest.update(url.encode('utf-8') + b'\0' + (site / url).read_bytes())
+    worker = (WORKER_TEMPLATE
+              .replace('__VERSION__', digest.hexdigest()[:10])
+              .replace('__IMAGE_CACHE_ENTRIES__', str(IMAGE_CACHE_ENTRIES))
+              .replace('__PRECACHE__', json.dumps(precache, indent=2))
+              .replace('__PLACEHOLDER__', json.dumps(assets.get(PLACEHOLDER_IMAGE))))
+    atomic_write_text(site / SERVICE_WORKER, worker)
+    print(f"📦 {SERVICE_WORKER}: {len(precache)} files precached")
+    return precache
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate the service worker for a built site")
+    parser.add_argument('--site', default=str(SITE_DIR), help="built site directory (default: _site)")
+    args = parser.parse_args()
+    build_service_worker(args.site)
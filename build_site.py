@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Static Site Build
+Builds a deployable copy of the site in _site/ with the tour, destination,
+gallery and testimonial cards pre-rendered into the HTML pages.
+
+Each page also gets the catalog data it needs inlined as
+window.__PRELOADED_DATA__, which DataLoader serves before touching the
+network. The first paint therefore needs no JSON requests, and client-side
+filtering still works on the inlined data. The originals straight under
+assets/images/ are the organizer's input and are left out of the build.
+
+Scripts, styles, images and data files are then bundled, minified and
+fingerprinted for immutable caching (see build_assets.py), each page gets
+its above-the-fold CSS inlined (critical_css.py), and a service worker
+caching everything for repeat visits is generated (build_service_worker.py).
+
+Run: python3 build_site.py [--out DIR] [--no-fingerprint]
+"""
+
+import argparse
+import html
+import json
+import os
+import re
+import shutil
+from html.parser import HTMLParser
+from pathlib import Path
+
+import page_templates as templates
+from build_assets import build_assets, precompress
+from build_service_worker import build_service_worker
+from catalog_shards import GALLERY_PAGE_SIZE, gallery_index
+from catalog_store import CatalogStore
+from critical_css import inline_critical_css
+from image_scanner import is_image_name
+
+SITE_DIR = Path('_site')
+PAGES = [
+    'index.html', 'about.html', 'tours.html', 'tour-detail.html',
+    'destinations.html', 'gallery.html', 'testimonials.html', 'contact.html',
+]
+STATIC_DIRS = ['assets', 'data']
+# Images straight under here are the organizer's unpublished input
+IMAGES_ROOT = Path('assets/images')
+DATA_LOADER_TAG = '<script src="assets/js/data-loader.js"></script>'
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+             'link', 'meta', 'source', 'track', 'wbr'}
+
+
+class _ElementFinder(HTMLParser):
+    """Locate the inner HTML span of the element with a given id"""
+
+    def __init__(self, element_id):
+        super().__init__(convert_charrefs=False)
+        self.element_id = element_id
+        self.tag = None
+        self.depth = 0
+        self.start = None
+        self.end = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.end is not None:
+            return
+        if self.tag is None:
+            if tag not in VOID_TAGS and dict(attrs).get('id') == self.element_id:
+                self.tag = tag
+                self.depth = 1
+                self.start = (self.getpos(), len(self.get_starttag_text()))
+        elif tag == self.tag:
+            self.depth += 1
+
+    def handle_endtag(self, tag):
+        if self.tag == tag and self.end is None:
+            self.depth -= 1
+            if self.depth == 0:
+                self.end = self.getpos()
+
+
+def _offset(line_starts, pos):
+    line, col = pos
+    return line_starts[line - 1] + col
+
+
+def replace_inner_html(page, element_id, inner):
+    """Replace the contents of the element with the given id"""
+    finder = _ElementFinder(element_id)
+    finder.feed(page)
+    finder.close()
+    if finder.start is None or finder.end is None:
+        raise ValueError(f"Element #{element_id} not found")
+    line_starts = [0]
+    for line in page.splitlines(keepends=True):
+        line_starts.append(line_starts[-1] + len(line))
+    start_pos, tag_length = finder.start
+    start = _offset(line_starts, start_pos) + tag_length
+    end = _offset(line_starts, finder.end)
+    return page[:start] + inner + page[end:]
+
+
+def set_social_links(page, social):
+    """Point every data-social link at the company's profile"""
+    def replace(match):
+        url = social.get(match.group(2))
+        if not url:
+            return match.group(0)
+        return re.sub(r'href="[^"]*"', f'href="{html.escape(url)}"', match.group(0), count=1)
+    return re.sub(r'<a\b([^>]*)data-social="(\w+)"([^>]*)>', replace, page)
+
+
+def inline_data(page, data):
+    """Inline catalog data for DataLoader ahead of the data-loader script"""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    # Keep "</script>" inside strings from closing the tag early
+    payload = payload.replace('</', '<\\/')
+    script = f'<script>window.__PRELOADED_DATA__ = {payload};</script>\n    '
+    return page.replace(DATA_LOADER_TAG, script + DATA_LOADER_TAG, 1)
+
+
+def page_content(name, store, company):
+    """Return ({element id: inner html}, {data file: payload}) for a page"""
+    tours = store['tours'].items
+    destinations = store['destinations'].items
+    testimonials = store['testimonials'].items
+    gallery = store['gallery'].items
+
+    if name == 'index.html':
+        featured = templates.get_prioritized_items(tours, 3)
+        popular = templates.get_prioritized_items(destinations, 3)
+        home_testimonials = testimonials[:3]
+        return {
+            'featured-tours': ''.join(templates.render_tour_card(t) for t in featured),
+            'popular-destinations': ''.join(
+                templates.render_destination_card(d, link=f"destinations.html#dest-{d['id']}", link_text='Explore')
+                for d in popular),
+            'home-testimonials': ''.join(templates.render_testimonial_card(t) for t in home_testimonials),
+        }, {
+            # Partial: DataLoader serves these only to the home page's own calls
+            'data/tours.json': {'tours': featured, 'partial': True},
+            'data/destinations.json': {'destinations': popular, 'partial': True},
+            'data/testimonials.json': {'testimonials': home_testimonials, 'partial': True},
+        }
+
+    if name == 'tours.html':
+        return {
+            'tours-container': ''.join(
+                templates.render_tour_card(t, id=f"tour-{t['id']}", show_meta=True,
+                                           show_includes=True, show_book_button=True)
+                for t in templates.sort_by_instagram(tours)),
+        }, {'data/tours.json': {'tours': tours}}
+
+    if name == 'destinations.html':
+        return {
+            'destinations-container': ''.join(
+                templates.render_destination_card(d, id=f"dest-{d['id']}")
+                for d in templates.sort_by_instagram(destinations)),
+        }, {'data/destinations.json': {'destinations': destinations}}
+
+    if name == 'gallery.html':
+        # Only the first shard page; the page fetches the rest as it scrolls
+        first_page = gallery[:GALLERY_PAGE_SIZE]
+        return {
+            'gallery-container': templates.render_gallery_page(first_page, 1),
+        }, {
+            'data/gallery/index.json': gallery_index(gallery),
+            'data/gallery/page-1.json': {'page': 1, 'galleryImages': first_page},
+        }
+
+    if name == 'testimonials.html':
+        return {
+            'testimonials-container': ''.join(
+                templates.render_testimonial_card(t, show_date=True, show_tour=True) for t in testimonials),
+        }, {'data/testimonials.json': {'testimonials': testimonials}}
+
+    if name == 'about.html':
+        return {
+            'year-established': html.escape(str(company.get('yearEstablished', ''))),
+            'mission-statement': html.escape(company.get('mission', '')),
+        }, {}
+
+    if name == 'contact.html':
+        contact = company['contact']
+        email = html.escape(contact['email'])
+        phone = html.escape(contact['phone'])
+        return {
+            'contact-email': f'<a href="mailto:{email}">{email}</a>',
+            'contact-phone': f'<a href="tel:{phone}">{phone}</a>',
+            'contact-address': html.escape(contact['address']),
+            'hours-weekdays': html.escape(contact['businessHours']['weekdays']),
+            'hours-weekends': html.escape(contact['businessHours']['weekends']),
+        }, {
+            # The booking dropdown only needs the titles
+            'data/tours.json': {'tours': [{'id': t['id'], 'title': t['title']} for t in tours], 'partial': True},
+        }
+
+    # tour-detail.html depends on ?id= and is rendered in the browser
+    return {}, {}
+
+
+def render_page(name, source, store, company, version=None):
+    fills, data = page_content(name, store, company)
+    contact = company['contact']
+    fills.update({
+        'footer-email': html.escape(contact['email']),
+        'footer-phone': html.escape(contact['phone']),
+        'footer-address': html.escape(contact['address']),
+    })
+    data['data/company.json'] = company
+    if version:
+        # Lets DataLoader reuse its session cache without asking for version.json
+        data['data/version.json'] = version
+
+    page = source
+    for element_id, inner in fills.items():
+        page = replace_inner_html(page, element_id, inner)
+    page = set_social_links(page, company.get('social', {}))
+    return inline_data(page, data)
+
+
+def _link_or_copy(src, dst):
+    """
+    Hardlink unchanged files into the build; fall back to copying.
+    Build steps must therefore replace files in out_dir, never edit them in place.
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _ignore_unpublished(directory, names):
+    """copytree filter: skip scratch files and the organizer's input images"""
+    ignored = shutil.ignore_patterns('tmp', '.*')(directory, names)
+    if Path(directory) == IMAGES_ROOT:
+        ignored |= {name for name in names
+                    if is_image_name(name) and (IMAGES_ROOT / name).is_file()}
+    return ignored
+
+
+def build_site(out_dir=SITE_DIR, fingerprint=True):
+    """Build the pre-rendered site into out_dir"""
+    out_dir = Path(out_dir)
+    print(f"🏗️  Building site into {out_dir}/...")
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.mkdir(parents=True)
+
+    for folder in STATIC_DIRS:
+        shutil.copytree(folder, out_dir / folder, copy_function=_link_or_copy,
+                        ignore=_ignore_unpublished)
+
+    store = CatalogStore()
+    company = json.loads(Path('data/company.json').read_text(encoding='utf-8'))
+    version_file = Path('data/version.json')
+    version = json.loads(version_file.read_text(encoding='utf-8')) if version_file.exists() else None
+    for name in PAGES:
+        source = Path(name).read_text(encoding='utf-8')
+        (out_dir / name).write_text(render_page(name, source, store, company, version), encoding='utf-8')
+        print(f"📄 {name}")
+
+    if fingerprint:
+        pages = [out_dir / name for name in PAGES]
+        build_assets(out_dir, pages, compress=False)
+        inline_critical_css(out_dir, pages)
+        build_service_worker(out_dir, pages)
+        precompress(out_dir)
+    print(f"✅ Site built in {out_dir}/")
+    return out_dir
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Build the pre-rendered site")
+    parser.add_argument('--out', default=str(SITE_DIR), help="output directory (default: _site)")
+    parser.add_argument('--no-fingerprint', action='store_true',
+                        help="skip bundling and fingerprinting (keeps plain asset names)")
+    args = parser.parse_args()
+    build_site(args.out, fingerprint=not args.no_fingerprint)
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Catalog Database
+Optional SQLite backend for the tours, destinations, gallery and testimonials
+catalogs, for authoring large catalogs without rewriting whole JSON files.
+
+Every item is a row holding its JSON plus indexed id, image path, image
+content hash and category columns, so lookups (and ad-hoc queries with the
+sqlite3 shell) do not need the JSON parsed. A commit upserts only the rows
+that changed, then re-exports only the catalogs whose revision moved since
+their last export to data/*.json, which stay the files the site reads.
+
+Set CATALOG_DB to a database path and the import scripts use it through
+open_store(); unset, they work on the JSON files as before. A JSON file
+edited by hand (or by a tool not using the database) is noticed by its size
+and mtime and imported again, so the JSON edit wins.
+
+Run: python3 catalog_db.py import|export [--db PATH] [--force] [--shards]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from pathlib import Path
+
+from catalog_shards import report_shards
+from catalog_store import CATALOGS, Catalog, CatalogStore, atomic_write_text, dumps
+from scan_manifest import ScanManifest, hash_file
+
+DEFAULT_DB = Path('.cache/catalog.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalogs (
+    name TEXT PRIMARY KEY,
+    fields TEXT NOT NULL,            -- the other top-level keys (nextId, ...)
+    revision INTEGER NOT NULL DEFAULT 0,
+    exported INTEGER NOT NULL DEFAULT -1,
+    file_size INTEGER,               -- the JSON file as last imported/exported
+    file_mtime_ns INTEGER
+);
+CREATE TABLE IF NOT EXISTS items (
+    rowid INTEGER PRIMARY KEY,
+    catalog TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    id INTEGER,
+    image TEXT,
+    hash TEXT,
+    category TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_by_position ON items (catalog, position);
+CREATE INDEX IF NOT EXISTS items_by_id ON items (catalog, id);
+CREATE INDEX IF NOT EXISTS items_by_image ON items (image);
+CREATE INDEX IF NOT EXISTS items_by_hash ON items (hash);
+CREATE INDEX IF NOT EXISTS items_by_category ON items (catalog, category);
+"""
+
+
+def connect(path=DEFAULT_DB):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=NORMAL')
+    db.executescript(SCHEMA)
+    return db
+
+
+def file_state(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None, None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class SqliteCatalog(Catalog):
+    """A Catalog whose items are rows; remembers which rows changed"""
+
+    def __init__(self, name, path, list_key, image_key, has_ids, data, rows, db):
+        super().__init__(name, path, list_key, image_key, has_ids, data)
+        self.db = db
+        # Items are dicts, so rows are tracked by object identity
+        self.rows = {id(item): row for item, row in zip(self.items, rows)}
+        self.positions = {id(item): position for item, (_, position) in zip(self.items, rows)}
+        self.next_position = max(self.positions.values(), default=-1) + 1
+        self.changed = {}
+        self.deleted = []
+
+    def add(self, item, min_id=None):
+        item = super().add(item, min_id)
+        if item is not None:
+            self.positions[id(item)] = self.next_position
+            self.next_position += 1
+            self.changed[id(item)] = item
+        return item
+
+    def update(self, item, **changes):
+        if not super().update(item, **changes):
+            return False
+        self.changed[id(item)] = item
+        return True
+
+    def remove(self, item):
+        super().remove(item)
+        self.changed.pop(id(item), None)
+        self.positions.pop(id(item), None)
+        row = self.rows.pop(id(item), None)
+        if row:
+            self.deleted.append(row[0])
+
+    def find_by_hash(self, digest):
+        """Return the committed items whose image has this content hash"""
+        rowids = {rowid for rowid, in self.db.execute(
+            'SELECT rowid FROM items WHERE hash = ? AND catalog = ?', (digest, self.name))}
+        return [item for item in self.items if self.rows.get(id(item), (None,))[0] in rowids]
+
+
+class SqliteCatalogStore(CatalogStore):
+    """CatalogStore on top of the catalog database"""
+
+    def __init__(self, root='.', db_path=DEFAULT_DB):
+        super().__init__(root)
+        self.db = connect(db_path)
+        self._manifest = None
+
+    def __getitem__(self, name):
+        if name not in self._catalogs:
+            path, list_key, image_key, has_ids = CATALOGS[name]
+            path = self.root / path
+            row = self.db.execute('SELECT fields, file_size, file_mtime_ns FROM catalogs WHERE name = ?',
+                                  (name,)).fetchone()
+            state = file_state(path)
+            if row is None or (state[0] is not None and tuple(row[1:]) != state):
+                self.import_json(name)
+                row = self.db.execute('SELECT fields FROM catalogs WHERE name = ?', (name,)).fetchone()
+            data = json.loads(row[0])
+            rows = self.db.execute('SELECT rowid, position, data FROM items WHERE catalog = ? '
+                                   'ORDER BY position', (name,)).fetchall()
+            data[list_key] = [json.loads(text) for _, _, text in rows]
+            self._catalogs[name] = SqliteCatalog(name, path, list_key, image_key, has_ids, data,
+                                                 [(rowid, position) for rowid, position, _ in rows], self.db)
+        return self._catalogs[name]
+
+    def image_hash(self, image):
+        """Content hash of an image, from the scan manifest when it is current"""
+        if not image or not os.path.isfile(image):
+            return None
+        if self._manifest is None:
+            self._manifest = ScanManifest.load()
+        entry = self._manifest.entries.get(image)
+        stat = os.stat(image)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+        return hash_file(image)
+
+    def _columns(self, catalog, item):
+        image = item.get(catalog.image_key)
+        item_id = item.get('id') if catalog.has_ids else None
+        return (catalog.name, catalog.positions[id(item)], item_id, image, self.image_hash(image),
+                item.get('category'), dumps(item, compact=True))
+
+    def import_json(self, name):
+        """Replace a catalog's rows with the contents of its JSON file"""
+        catalog = Catalog.load(name, self.root)
+        fields = dict(catalog.data, **{catalog.list_key: None})
+        with self.db:
+            self.db.execute('DELETE FROM items WHERE catalog = ?', (name,))
+            self.db.executemany(
+                'INSERT INTO items (catalog, position, id, image, hash, category, data) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(name, position, item.get('id') if catalog.has_ids else None, item.get(catalog.image_key),
+                  self.image_hash(item.get(catalog.image_key)), item.get('category'), dumps(item, compact=True))
+                 for position, item in enumerate(catalog.items)])
+            self.db.execute(
+                'INSERT INTO catalogs (name, fields, revision, exported, file_size, file_mtime_ns) '
+                'VALUES (?, ?, 0, 0, ?, ?) ON CONFLICT (name) DO UPDATE SET fields = excluded.fields, '
+                'revision = revision + 1, exported = revision + 1, file_size = excluded.file_size, '
+                'file_mtime_ns = excluded.file_mtime_ns',
+                (name, json.dumps(fields), *file_state(catalog.path)))
+        self._catalogs.pop(name, None)
+
+    def commit(self, compact=False):
+        """Upsert changed rows, then export changed catalogs; returns the written paths"""
+        with self.db:
+            for catalog in self._catalogs.values():
+                if not catalog.dirty:
+                    continue
+                for item in catalog.changed.values():
+                    row = catalog.rows.get(id(item))
+                    columns = self._columns(catalog, item)
+                    if row:
+                        self.db.execute('UPDATE items SET catalog = ?, position = ?, id = ?, image = ?, '
+                                        'hash = ?, category = ?, data = ? WHERE rowid = ?', columns + (row[0],))
+                    else:
+                        cursor = self.db.execute(
+                            'INSERT INTO items (catalog, position, id, image, hash, category, data) '
+                            'VALUES (?, ?, ?, ?, ?, ?, ?)', columns)
+                        catalog.rows[id(item)] = (cursor.lastrowid, columns[1])
+                self.db.executemany('DELETE FROM items WHERE rowid = ?', [(rowid,) for rowid in catalog.deleted])
+                fields = dict(catalog.data, **{catalog.list_key: None})
+                self.db.execute('UPDATE catalogs SET fields = ?, revision = revision + 1 WHERE name = ?',
+                                (json.dumps(fields), catalog.name))
+                catalog.changed.clear()
+                catalog.deleted.clear()
+                catalog.dirty = False
+        return self.export_changed(compact=compact)
+
+    def export_changed(self, names=None, compact=False, force=False):
+        """Write data/*.json for catalogs changed since their last export"""
+        written = []
+        for name in names or CATALOGS:
+            revision, exported = self.db.execute('SELECT revision, exported FROM catalogs WHERE name = ?',
+                                                 (name,)).fetchone() or (None, None)
+            if revision is None or (revision == exported and not force):
+                continue
+            catalog = self[name]
+            atomic_write_text(catalog.path, dumps(catalog.data, compact))
+            with self.db:
+                self.db.execute('UPDATE catalogs SET exported = ?, file_size = ?, file_mtime_ns = ? '
+                                'WHERE name = ?', (revision, *file_state(catalog.path), name))
+            written.append(catalog.path)
+        return written
+
+
+def open_store(root='.'):
+    """The catalog store the scripts should use: SQLite if CATALOG_DB is set, else JSON"""
+    if os.environ.get('CATALOG_DB'):
+        return SqliteCatalogStore(root, os.environ['CATALOG_DB'])
+    return CatalogStore(root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the SQLite catalog database")
+    parser.add_argument('command', choices=('import', 'export'),
+                        help="import: load data/*.json into the database; export: write changed catalogs back")
+    parser.add_argument('--db', default=os.environ.get('CATALOG_DB') or str(DEFAULT_DB),
+                        help=f"database path (default: $CATALOG_DB or {DEFAULT_DB})")
+    parser.add_argument('--force', action='store_true', help="export every catalog, changed or not")
+    parser.add_argument('--shards', action='store_true', help="regenerate the data shards after exporting")
+    args = parser.parse_args()
+
+    store = SqliteCatalogStore(db_path=args.db)
+    if args.command == 'import':
+        for name in CATALOGS:
+            store.import_json(name)
+            print(f"✅ Imported {len(store[name])} {name} into {args.db}")
+        return
+    written = store.export_changed(force=args.force)
+    for path in written:
+        print(f"✅ Exported {path}")
+    if not written:
+        print("ℹ️  All catalogs up to date")
+    if args.shards:
+        report_shards(store, written)
+
+
+if __name__ == '__main__':
+    main()
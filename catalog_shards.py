@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Catalog Shards
+Splits the tours and gallery catalogs into small JSON files so pages only
+download what they show:
+
+  data/tours/<id>.json                          one tour (tour-detail.html)
+  data/tours/by-category/<category>.json        tours in one category
+  data/gallery/index.json                       page counts per category
+  data/gallery/page-<n>.json                    one page of the gallery
+  data/gallery/by-category/<category>/page-<n>.json
+  data/related-tours.json                       top related tours per tour
+  data/search/index.json, data/search/<xx>.json search index (see search_index.py)
+  data/version.json                             content version for DataLoader's cache
+
+Only shards whose content changed are rewritten, and shards for removed
+tours or categories are deleted. Callers that know which catalogs changed
+(e.g. the organizer's watch mode) only regenerate the shard families built
+from those; the other families' digests are kept in SHARD_DIGESTS so the
+content version still covers them.
+
+Run: python3 catalog_shards.py
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+
+from catalog_store import CatalogStore, atomic_write_text, dumps
+from related_tours import related_index
+from search_index import search_shards
+
+DATA_DIR = Path('data')
+SHARD_DIGESTS = Path('.cache/shard-digests.json')
+GALLERY_PAGE_SIZE = 24
+
+# family: (catalogs it is built from, folder holding only its shards)
+SHARD_FAMILIES = {
+    'tours': (('tours',), 'tours'),
+    'gallery': (('gallery',), 'gallery'),
+    'related': (('tours',), None),
+    'search': (('tours', 'destinations'), 'search'),
+}
+
+
+def slugify(text):
+    """Match DataLoader.slugify"""
+    return re.sub(r'[^a-z0-9]+', '-', str(text).lower()).strip('-')
+
+
+def paginate(items, page_size):
+    return [items[i:i + page_size] for i in range(0, len(items), page_size)] or [[]]
+
+
+def tour_shards(tours):
+    """Yield (relative path, payload) for every tour shard"""
+    by_category = {}
+    for tour in tours:
+        yield f"tours/{tour['id']}.json", tour
+        by_category.setdefault(tour.get('category', ''), []).append(tour)
+    for category, items in by_category.items():
+        yield f"tours/by-category/{slugify(category)}.json", {'category': category, 'tours': items}
+
+
+def group_by_category(items):
+    by_category = {}
+    for item in items:
+        by_category.setdefault(item.get('category', ''), []).append(item)
+    return by_category
+
+
+def gallery_index(items, page_size=GALLERY_PAGE_SIZE):
+    """Page counts for the gallery, overall and per category (data/gallery/index.json)"""
+    index = {
+        'pageSize': page_size,
+        'total': len(items),
+        'pages': len(paginate(items, page_size)),
+        'categories': {},
+    }
+    for category, category_items in group_by_category(items).items():
+        index['categories'][slugify(category)] = {'category': category, 'total': len(category_items),
+                                                  'pages': len(paginate(category_items, page_size))}
+    return index
+
+
+def gallery_shards(items, page_size=GALLERY_PAGE_SIZE):
+    """Yield (relative path, payload) for every gallery shard"""
+    for number, page in enumerate(paginate(items, page_size), 1):
+        yield f"gallery/page-{number}.json", {'page': number, 'galleryImages': page}
+    for category, category_items in group_by_category(items).items():
+        slug = slugify(category)
+        for number, page in enumerate(paginate(category_items, page_size), 1):
+            yield f"gallery/by-category/{slug}/page-{number}.json", {'page': number, 'galleryImages': page}
+    yield 'gallery/index.json', gallery_index(items, page_size)
+
+
+def family_shards(family, store):
+    """Return [(relative path, payload)] for one shard family"""
+    if family == 'tours':
+        return list(tour_shards(store['tours'].items))
+    if family == 'gallery':
+        return list(gallery_shards(store['gallery'].items))
+    if family == 'related':
+        return [('related-tours.json', related_index(store['tours'].items))]
+    return list(search_shards(store))
+
+
+def content_version(data_dir, family_digests):
+    """Hash the top-level data files and every shard family into a short version id"""
+    digest = hashlib.sha256()
+    for path in sorted(Path(data_dir).glob('*.json')):
+        if path.name != 'version.json':
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+    for family in sorted(family_digests):
+        digest.update(family.encode())
+        digest.update(family_digests[family].encode())
+    return digest.hexdigest()[:16]
+
+
+def load_family_digests(data_dir, path=SHARD_DIGESTS):
+    """{family: digest of its shards} from the last run on data_dir"""
+    try:
+        cached = json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+    return cached.get('families', {}) if cached.get('dataDir') == str(data_dir) else {}
+
+
+def write_shards(store, data_dir=DATA_DIR, changed=None):
+    """
+    Write changed shards and remove stale ones; returns (written, removed).
+    changed names the catalogs that changed (default: all); only the shard
+    families built from them are regenerated.
+    """
+    data_dir = Path(data_dir)
+    digests = load_family_digests(data_dir)
+    families = [family for family, (sources, _) in SHARD_FAMILIES.items()
+                if changed is None or family not in digests or set(sources) & set(changed)]
+
+    written = 0
+    removed = 0
+    for family in families:
+        expected = set()
+        digest = hashlib.sha256()
+        for relative, payload in family_shards(family, store):
+            path = data_dir / relative
+            expected.add(path)
+            text = dumps(payload, compact=True)
+            digest.update(relative.encode())
+            digest.update(text.encode('utf-8'))
+            try:
+                if path.read_text(encoding='utf-8') == text:
+                    continue
+            except FileNotFoundError:
+                pass
+            atomic_write_text(path, text)
+            written += 1
+        digests[family] = digest.hexdigest()
+
+        folder = SHARD_FAMILIES[family][1]
+        if folder:
+            for path in (data_dir / folder).rglob('*.json'):
+                if path not in expected:
+                    path.unlink()
+                    removed += 1
+
+    if families:
+        SHARD_DIGESTS.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(SHARD_DIGESTS, json.dumps({'dataDir': str(data_dir), 'families': digests},
+                                                    indent=1, sort_keys=True) + '\n')
+
+    # Bumping the version makes DataLoader drop its session cache once
+    version_file = data_dir / 'version.json'
+    version = dumps({'version': content_version(data_dir, digests)}, compact=True)
+    try:
+        unchanged = version_file.read_text(encoding='utf-8') == version
+    except FileNotFoundError:
+        unchanged = False
+    if not unchanged:
+        atomic_write_text(version_file, version)
+        written += 1
+    return written, removed
+
+
+def report_shards(store, committed=None):
+    """
+    Regenerate shards after a catalog commit and print a one-line summary.
+    committed is the list of paths the commit wrote: only the shards built
+    from those catalogs are regenerated, and nothing at all when it is empty.
+    None regenerates everything.
+    """
+    changed = None
+    if committed is not None:
+        committed = {Path(path) for path in committed}
+        changed = [catalog.name for catalog in store.loaded() if catalog.path in committed]
+        if not changed:
+            return
+    written, removed = write_shards(store, changed=changed)
+    if written or removed:
+        print(f"🧩 Updated {written} data shards, removed {removed}")
+
+
+if __name__ == '__main__':
+    written, removed = write_shards(CatalogStore())
+    print(f"✅ Shards up to date ({written} written, {removed} removed)")
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Catalog Store
+Shared access to the data/*.json catalogs for the organizer scripts.
+
+Each catalog is loaded once and indexed by id, image and category. Changes
+are kept in memory and written by a single commit() at the end of a run: every
+changed file is written to a temporary file and renamed over the original, so
+a crash can never leave a half-written catalog behind.
+"""
+
+import json
+import os
+import tempfile
+from pathlib import Path
+
+# name: (file, list key, image key, has ids)
+CATALOGS = {
+    'tours': ('data/tours.json', 'tours', 'image', True),
+    'destinations': ('data/destinations.json', 'destinations', 'image', True),
+    'gallery': ('data/gallery.json', 'galleryImages', 'src', False),
+    'testimonials': ('data/testimonials.json', 'testimonials', 'image', True),
+}
+
+# Items imported from Instagram get ids from 100 up (see SharedUtils.sortByInstagram)
+INSTAGRAM_ID_START = 100
+
+
+def dumps(data, compact=False):
+    """Serialize catalog data: indented for editing, compact for deploying"""
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def atomic_write_text(path, text):
+    """Write text to path via a temporary file and rename"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class Catalog:
+    """One catalog file, with indexes and a monotonic id allocator"""
+
+    def __init__(self, name, path, list_key, image_key, has_ids, data):
+        self.name = name
+        self.path = Path(path)
+        self.list_key = list_key
+        self.image_key = image_key
+        self.has_ids = has_ids
+        self.data = data
+        self.dirty = False
+        self.by_id = {}
+        self.by_image = {}
+        self.by_category = {}
+        for item in self.items:
+            self._index(item)
+        # nextId is stored in the file so ids of deleted items are never reused
+        max_id = max(self.by_id, default=0)
+        self.next_id = max(data.get('nextId', 0), max_id + 1)
+
+    @classmethod
+    def load(cls, name, root='.'):
+        path, list_key, image_key, has_ids = CATALOGS[name]
+        path = Path(root) / path
+        data = json.loads(path.read_text(encoding='utf-8'))
+        return cls(name, path, list_key, image_key, has_ids, data)
+
+    @property
+    def items(self):
+        return self.data[self.list_key]
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def _index(self, item):
+        if self.has_ids and isinstance(item.get('id'), int):
+            self.by_id[item['id']] = item
+        if item.get(self.image_key):
+            self.by_image[item[self.image_key]] = item
+        if item.get('category'):
+            self.by_category.setdefault(item['category'], []).append(item)
+
+    def _unindex(self, item):
+        if self.has_ids:
+            self.by_id.pop(item.get('id'), None)
+        if self.by_image.get(item.get(self.image_key)) is item:
+            del self.by_image[item[self.image_key]]
+        siblings = self.by_category.get(item.get('category'))
+        if siblings and item in siblings:
+            siblings.remove(item)
+
+    def allocate_id(self, minimum=None):
+        """Return a new id, never reusing one handed out before"""
+        new_id = max(self.next_id, minimum or 0)
+        self.next_id = new_id + 1
+        self.data['nextId'] = self.next_id
+        self.dirty = True
+        return new_id
+
+    def get(self, item_id):
+        return self.by_id.get(item_id)
+
+    def find_by_image(self, image):
+        return self.by_image.get(image)
+
+    def in_category(self, category):
+        return list(self.by_category.get(category, []))
+
+    def add(self, item, min_id=None):
+        """Add an item unless its image is already in the catalog; returns it or None"""
+        if item.get(self.image_key) in self.by_image:
+            return None
+        if self.has_ids and not isinstance(item.get('id'), int):
+            item['id'] = self.allocate_id(min_id)
+        self.items.append(item)
+        self._index(item)
+        self.dirty = True
+        return item
+
+    def update(self, item, **changes):
+        """Change fields of an item, keeping the indexes in sync"""
+        if all(item.get(key) == value for key, value in changes.items()):
+            return False
+        self._unindex(item)
+        item.update(changes)
+        self._index(item)
+        self.dirty = True
+        return True
+
+    def remove(self, item):
+        self._unindex(item)
+        self.items.remove(item)
+        self.dirty = True
+
+    def rename_images(self, renames):
+        """Point items at the new paths of renamed images; returns the count"""
+        renamed = 0
+        for old, new in renames.items():
+            item = self.by_image.get(old)
+            if item:
+                self.update(item, **{self.image_key: new})
+                renamed += 1
+        return renamed
+
+
+class CatalogStore:
+    """Lazily loaded catalogs plus a single commit for the whole run"""
+
+    def __init__(self, root='.'):
+        self.root = Path(root)
+        self._catalogs = {}
+
+    def __getitem__(self, name):
+        if name not in self._catalogs:
+            self._catalogs[name] = Catalog.load(name, self.root)
+        return self._catalogs[name]
+
+    def loaded(self):
+        return list(self._catalogs.values())
+
+    def commit(self, compact=False):
+        """Atomically write every changed catalog; returns the written paths"""
+        written = []
+        for catalog in self._catalogs.values():
+            if catalog.dirty:
+                atomic_write_text(catalog.path, dumps(catalog.data, compact))
+                catalog.dirty = False
+                written.append(catalog.path)
+        return written
+
+    def export(self, dest_dir, names=None, compact=True):
+        """Write (compact) copies of catalogs into dest_dir, e.g. for deploying"""
+        dest_dir = Path(dest_dir)
+        written = []
+        for name in names or CATALOGS:
+            catalog = self[name]
+            dest = dest_dir / catalog.path.name
+            atomic_write_text(dest, dumps(catalog.data, compact))
+            written.append(dest)
+        return written
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Asset Integrity Check
+Cross-checks every image referenced by the data files, pages and styles
+against what is actually under assets/images/ and reports:
+
+  missing     referenced, but not on disk (every visitor pays a 404)
+  orphaned    on disk, but referenced by nothing
+  duplicate   identical content stored more than once (not hardlinked)
+
+The directory listing is kept in .cache/asset-index.json and only folders
+whose mtime changed are listed again (files in the others are just
+stat'ed for their current size); folders are processed concurrently.
+With --fix, dead references in the catalogs and pages are pointed at
+PLACEHOLDER_IMAGE, so the deployed site makes no failing image requests.
+
+Run: python3 check_assets.py [--fix]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from catalog_shards import report_shards
+from catalog_store import CatalogStore, atomic_write_text
+from image_scanner import is_image_name
+from scan_manifest import ScanManifest
+
+IMAGES_ROOT = 'assets/images'
+ASSET_INDEX_FILE = Path('.cache/asset-index.json')
+ASSET_HASHES_FILE = Path('.cache/asset-hashes.json')
+PLACEHOLDER_IMAGE = 'assets/images/placeholder.svg'
+
+# Images straight under assets/images/ are inputs waiting for
+# analyze-and-organize.py, and tmp/ is scratch space; neither is deployed content
+UNPUBLISHED = ('tmp',)
+
+REFERENCE_PATTERN = re.compile(r"assets/images/[^\s\"'(),;<>]+")
+
+
+class AssetIndex:
+    """Cached listing of a directory tree, refreshed one folder at a time"""
+
+    def __init__(self, path=ASSET_INDEX_FILE):
+        self.path = Path(path)
+        self.dirs = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path=ASSET_INDEX_FILE):
+        index = cls(path)
+        try:
+            index.dirs = json.loads(index.path.read_text(encoding='utf-8'))['dirs']
+        except (OSError, ValueError, KeyError):
+            pass
+        return index
+
+    def _list(self, folder):
+        """Return the listing of one folder, reusing the cached names if its mtime is unchanged"""
+        try:
+            mtime_ns = os.stat(folder).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self.dirs.get(folder)
+        if cached and cached['mtime_ns'] == mtime_ns:
+            # Editing a file in place leaves the folder's mtime alone, so
+            # only the names are reused: sizes and inodes are taken afresh
+            files = {}
+            for name in cached['files']:
+                try:
+                    stat = os.stat(f"{folder}/{name}")
+                except FileNotFoundError:
+                    continue
+                files[name] = [stat.st_size, stat.st_ino]
+            return {'mtime_ns': mtime_ns, 'dirs': cached['dirs'], 'files': files}
+        files = {}
+        subdirs = []
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir():
+                    subdirs.append(entry.name)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files[entry.name] = [stat.st_size, stat.st_ino]
+        return {'mtime_ns': mtime_ns, 'dirs': sorted(subdirs), 'files': files}
+
+    def refresh(self, root=IMAGES_ROOT, workers=8):
+        """Bring the index up to date, listing each level of folders in parallel"""
+        fresh = {}
+        level = [root]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while level:
+                next_level = []
+                for folder, listing in zip(level, pool.map(self._list, level)):
+                    if listing is None:
+                        continue
+                    fresh[folder] = listing
+                    next_level += [f"{folder}/{name}" for name in listing['dirs']]
+                level = next_level
+        if fresh != self.dirs:
+            self.dirs = fresh
+            self.dirty = True
+        return self
+
+    def exists(self, path):
+        folder, _, name = path.rpartition('/')
+        return name in self.dirs.get(folder, {}).get('files', {})
+
+    def files(self):
+        """Yield (path, size, inode) for every indexed file"""
+        for folder, listing in self.dirs.items():
+            for name, (size, inode) in listing['files'].items():
+                yield f"{folder}/{name}", size, inode
+
+    def save(self):
+        if not self.dirty:
+            return False
+        atomic_write_text(self.path, json.dumps({'dirs': self.dirs}, separators=(',', ':')))
+        self.dirty = False
+        return True
+
+
+def _strings(value):
+    """Yield every string inside a JSON value"""
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _strings(item)
+
+
+def find_references(data_dir='data', pages=None, styles=None):
+    """Return {image path: set of files referencing it}"""
+    references = defaultdict(set)
+    # Shards under data/*/ repeat the top-level catalogs, so only those are read
+    for path in sorted(Path(data_dir).glob('*.json')):
+        data = json.loads(path.read_text(encoding='utf-8'))
+        for text in _strings(data):
+            for ref in REFERENCE_PATTERN.findall(text):
+                references[ref].add(str(path))
+    for path in (pages or sorted(Path('.').glob('*.html'))) + (styles or sorted(Path('assets/css').glob('*.css'))):
+        for ref in REFERENCE_PATTERN.findall(Path(path).read_text(encoding='utf-8')):
+            references[ref].add(str(path))
+    return references
+
+
+def is_published(path):
+    """Whether a file under assets/images is site content (see UNPUBLISHED)"""
+    relative = path[len(IMAGES_ROOT) + 1:]
+    return '/' in relative and relative.split('/', 1)[0] not in UNPUBLISHED
+
+
+def find_duplicates(index):
+    """Return [[paths...]] of published images with identical content on separate inodes"""
+    by_size = defaultdict(list)
+    for path, size, inode in index.files():
+        if size and is_image_name(path) and is_published(path):
+            by_size[size].append((path, inode))
+
+    manifest = ScanManifest.load(ASSET_HASHES_FILE)
+    by_hash = defaultdict(list)
+    for candidates in by_size.values():
+        # Only files sharing a size can be identical, and hardlinks are one file
+        if len({inode for _, inode in candidates}) < 2:
+            continue
+        for path, inode in candidates:
+            manifest.check(path)
+            by_hash[manifest.hash_of(path)].append((path, inode))
+    manifest.save()
+    return [sorted(path for path, _ in group) for group in by_hash.values()
+            if len({inode for _, inode in group}) > 1]
+
+
+def fix_references(missing, references):
+    """Point dead references at PLACEHOLDER_IMAGE; returns the number rewritten"""
+    store = CatalogStore()
+    fixed = 0
+    for name in ('tours', 'destinations', 'gallery', 'testimonials'):
+        catalog = store[name]
+        for item in list(catalog):
+            if item.get(catalog.image_key) in missing:
+                catalog.update(item, **{catalog.image_key: PLACEHOLDER_IMAGE})
+                fixed += 1
+    report_shards(store, store.commit())
+
+    pages = {page for path in missing for page in references[path] if page.endswith(('.html', '.css'))}
+
+    def replace(match):
+        nonlocal fixed
+        if match.group(0) not in missing:
+            return match.group(0)
+        fixed += 1
+        return PLACEHOLDER_IMAGE
+
+    for page in sorted(pages):
+        text = Path(page).read_text(encoding='utf-8')
+        updated = REFERENCE_PATTERN.sub(replace, text)
+        if updated != text:
+            atomic_write_text(page, updated)
+    return fixed
+
+
+def check_assets(fix=False, workers=8):
+    """Run the integrity check; returns True if no dead references remain"""
+    print("🔍 Checking image references...")
+    index = AssetIndex.load().refresh(workers=workers)
+    index.save()
+    references = find_references()
+
+    missing = {path for path in references if not index.exists(path)}
+    orphaned = sorted(path for path, _, _ in index.files()
+                      if is_image_name(path) and is_published(path) and path not in references)
+    duplicates = find_duplicates(index)
+
+    for path in sorted(missing):
+        print(f"❌ Missing: {path} (in {', '.join(sorted(references[path]))})")
+    for path in orphaned:
+        print(f"🗑️  Orphaned: {path}")
+    for group in duplicates:
+        print(f"👯 Duplicate: {', '.join(group)}")
+    print(f"\n📋 {len(references)} referenced, {len(missing)} missing, "
+          f"{len(orphaned)} orphaned, {len(duplicates)} duplicate groups")
+    if duplicates:
+        print("💡 Tip: python3 image_store.py links duplicates to a single copy")
+
+    if missing and fix:
+        if not index.exists(PLACEHOLDER_IMAGE):
+            print(f"❌ {PLACEHOLDER_IMAGE} not found; cannot fix references")
+            return False
+        print(f"🔧 Rewrote {fix_references(missing, references)} references to {PLACEHOLDER_IMAGE}")
+        return True
+    return not missing
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check image references before deploying")
+    parser.add_argument('--fix', action='store_true',
+                        help=f"point missing images at {PLACEHOLDER_IMAGE}")
+    parser.add_argument('--workers', type=int, default=8, help="folders listed in parallel")
+    args = parser.parse_args()
+    sys.exit(0 if check_assets(fix=args.fix, workers=args.workers) else 1)
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Critical CSS
+Keeps the stylesheet from blocking the first paint of a built site:
+
+  - rules no page can use are dropped from the style bundle (build_assets.py
+    calls prune_css). A selector is in use when every tag, class and id in
+    it appears in some page, or anywhere in the scripts, which build cards
+    and toggle classes at runtime
+  - each page gets the rules for what is above the fold (the header and the
+    first FOLD_BLOCKS - 1 blocks after it, usually the hero) inlined in a
+    <style> in its <head>, and loads the bundle without blocking rendering
+
+The matching is deliberately generous: pseudo-classes and attribute
+selectors are ignored, so a rule is only dropped when it cannot apply.
+
+Run: python3 critical_css.py [--site DIR]  (build_site.py runs it for you)
+"""
+
+import argparse
+import os
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+
+from catalog_store import atomic_write_text
+
+SITE_DIR = Path('_site')
+
+# Top-level body elements treated as above the fold: the header and the hero
+FOLD_BLOCKS = 2
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                 'source', 'track', 'wbr'}
+STYLESHEET_TAG = re.compile(r'<link rel="stylesheet" href="(assets/css/[^"]+\.css)">')
+CSS_URL = re.compile(r"url\((['\"]?)([^'\")]+)\1\)")
+WORD = re.compile(r'[A-Za-z_][\w-]*')
+
+
+# --- Parsing ---------------------------------------------------------------
+
+def _skip_string(css, i):
+    """Index just past the string starting at i"""
+    end = css.find(css[i], i + 1)
+    while end > 0 and css[end - 1] == '\\':
+        end = css.find(css[i], end + 1)
+    return len(css) if end < 0 else end + 1
+
+
+def _find_top(css, i, chars):
+    """Index of the first of `chars` at or after i outside strings and blocks"""
+    depth = 0
+    while i < len(css):
+        char = css[i]
+        if char in '"\'':
+            i = _skip_string(css, i)
+            continue
+        if depth == 0 and char in chars:
+            return i
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        i += 1
+    return len(css)
+
+
+def parse_css(css):
+    """
+    Split minified CSS into (prelude, body) rules. body is the declaration
+    text, a list of nested rules for @media/@supports, or None for
+    statements such as @import
+    """
+    rules = []
+    i = 0
+    while i < len(css):
+        start = _find_top(css, i, '{;')
+        prelude = css[i:start].strip()
+        if start == len(css) or css[start] == ';':
+            if prelude:
+                rules.append((prelude, None))
+            i = start + 1
+            continue
+        end = _find_top(css, start + 1, '}')
+        body = css[start + 1:end]
+        if re.match(r'@(?:media|supports|layer)\b', prelude):
+            body = parse_css(body)
+        rules.append((prelude, body))
+        i = end + 1
+    return rules
+
+
+def serialize_css(rules):
+    out = []
+    for prelude, body in rules:
+        if body is None:
+            out.append(prelude + ';')
+        elif isinstance(body, list):
+            out.append(prelude + '{' + serialize_css(body) + '}')
+        else:
+            out.append(prelude + '{' + body + '}')
+    return ''.join(out)
+
+
+def split_selectors(prelude):
+    """Split a selector list on its top-level commas"""
+    selectors = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(prelude):
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        elif char == ',' and not depth:
+            selectors.append(prelude[start:i].strip())
+            start = i + 1
+    selectors.append(prelude[start:].strip())
+    return selectors
+
+
+_selector_cache = {}
+
+
+def selector_tokens(selector):
+    """The tags, .classes and #ids a selector needs, e.g. {'nav', '.logo'}"""
+    if selector not in _selector_cache:
+        text = re.sub(r'\[[^\]]*\]', '', selector)
+        text = re.sub(r'::?[\w-]+(?:\([^()]*\))?', '', text)
+        tokens = {'.' + name for name in re.findall(r'\.(-?[_a-zA-Z][\w-]*)', text)}
+        tokens |= {'#' + name for name in re.findall(r'#(-?[_a-zA-Z][\w-]*)', text)}
+        tokens |= {name.lower() for name in re.findall(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)', text)}
+        _selector_cache[selector] = frozenset(tokens)
+    return _selector_cache[selector]
+
+
+def filter_rules(rules, tokens, keep_at_rules=True):
+    """Keep the selectors whose tokens are all in `tokens`, and the rules that still have one"""
+    kept = []
+    for prelude, body in rules:
+        if isinstance(body, list):
+            children = filter_rules(body, tokens, keep_at_rules)
+            if children:
+                kept.append((prelude, children))
+        elif body is None or prelude.startswith('@'):
+            # @font-face, @keyframes, @import: needed by the full stylesheet only
+            if keep_at_rules:
+                kept.append((prelude, body))
+        else:
+            selectors = [s for s in split_selectors(prelude) if selector_tokens(s) <= tokens]
+            if selectors:
+                kept.append((','.join(selectors), body))
+    return kept
+
+
+def count_rules(rules):
+    return sum(count_rules(body) if isinstance(body, list) else 1 for _, body in rules)
+
+
+# --- What the pages use ----------------------------------------------------
+
+class _PageTokens(HTMLParser):
+    """Collect the tags, classes and ids of a page, and those above the fold"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tokens = set()
+        self.fold = set()
+        self.scripts = []
+        self.stack = []
+        self.body_depth = None
+        self.blocks = 0
+        self.in_script = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        tokens = {tag}
+        tokens |= {'.' + name for name in (attrs.get('class') or '').split()}
+        if attrs.get('id'):
+            tokens.add('#' + attrs['id'])
+        self.tokens |= tokens
+
+        if tag == 'body':
+            self.body_depth = len(self.stack) + 1
+        elif self.body_depth is not None and len(self.stack) == self.body_depth and tag != 'script':
+            self.blocks += 1
+        if self.body_depth is None or self.blocks <= FOLD_BLOCKS:
+            self.fold |= tokens
+        self.in_script = tag == 'script'
+        if tag not in VOID_ELEMENTS:
+            self.stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.stack.pop()
+
+    def handle_endtag(self, tag):
+        if tag in self.stack:
+            while self.stack.pop() != tag:
+                pass
+        self.in_script = False
+
+    def handle_data(self, data):
+        if self.in_script:
+            self.scripts.append(data)
+
+
+def page_tokens(html):
+    """Return (tokens used anywhere on the page, tokens above the fold)"""
+    parser = _PageTokens()
+    parser.feed(html)
+    parser.close()
+    tokens = parser.tokens | script_tokens(' '.join(parser.scripts))
+    return tokens, parser.fold | {'html', 'body'}
+
+
+def script_tokens(source):
+    """Every word in a script, as a possible tag, class or id"""
+    tokens = set()
+    for word in set(WORD.findall(source)):
+        tokens.update((word.lower(), '.' + word, '#' + word))
+    return tokens
+
+
+def used_tokens(pages, scripts):
+    """Tokens of every page (HTML text) and script (source text) together"""
+    tokens = set()
+    for html in pages:
+        tokens |= page_tokens(html)[0]
+    for source in scripts:
+        tokens |= script_tokens(source)
+    return tokens
+
+
+def prune_css(css, tokens):
+    """Drop the rules of minified CSS that nothing in `tokens` can match"""
+    rules = parse_css(css)
+    kept = filter_rules(rules, tokens)
+    return serialize_css(kept) + '\n', count_rules(rules) - count_rules(kept)
+
+
+# --- Inlining --------------------------------------------------------------
+
+def rebase_urls(css, css_path):
+    """Make url()s relative to the site root instead of the stylesheet"""
+    base = Path(css_path).parent
+
+    def replace(match):
+        url = match.group(2)
+        if re.match(r'(?:[a-z]+:|/|#)', url):
+            return match.group(0)
+        return f"url({match.group(1)}{os.path.normpath(base / url).replace(os.sep, '/')}{match.group(1)})"
+    return CSS_URL.sub(replace, css)
+
+
+def critical_css(css, html):
+    """The rules of minified CSS that apply above the fold of a page"""
+    fold = page_tokens(html)[1]
+    return serialize_css(filter_rules(parse_css(css), fold, keep_at_rules=False))
+
+
+def inline_critical_css(site_dir=SITE_DIR, pages=None):
+    """Inline each page's critical CSS and load its stylesheet without blocking"""
+    site = Path(site_dir)
+    print("🎨 Inlining critical CSS...")
+    stylesheets = {}
+    for page_path in pages or sorted(site.glob('*.html')):
+        page = page_path.read_text(encoding='utf-8')
+        match = STYLESHEET_TAG.search(page)
+        if not match or 'media="print" onload=' in page:
+            continue
+        href = match.group(1)
+        if href not in stylesheets:
+            stylesheets[href] = (site / href).read_text(encoding='utf-8')
+        css = stylesheets[href]
+        critical = rebase_urls(critical_css(css, page), href)
+        tags = (f'<style>{critical}</style>\n'
+                f'    <link rel="stylesheet" href="{href}" media="print" onload="this.media=\'all\'">\n'
+                f'    <noscript><link rel="stylesheet" href="{href}"></noscript>')
+        atomic_write_text(page_path, page[:match.start()] + tags + page[match.end():])
+        blocking = len(css.encode('utf-8'))
+        inlined = len(critical.encode('utf-8'))
+        print(f"   {page_path.name:<20} {inlined / 1024:5.1f} KB inlined, "
+              f"{(blocking - inlined) / 1024:5.1f} KB of render-blocking CSS saved")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Inline critical CSS into a built site's pages")
+    parser.add_argument('--site', default=str(SITE_DIR), help="built site directory (default: _site)")
+    args = parser.parse_args()
+    inline_critical_css(args.site)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+File Watcher
+Reports images that are added, replaced, moved or deleted in a set of
+folders, for the organizer's --watch mode.
+
+On Linux the kernel's inotify is used directly through ctypes, so nothing
+has to be installed and idle folders cost nothing. Elsewhere (or if inotify
+is unavailable) the folders are polled with os.scandir instead. Bursts of
+events are debounced into one batch, so copying a hundred photos at once
+triggers a single catalog update.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+from image_scanner import is_image_name, scan_images
+
+# Returned in a batch when events were lost and the folders must be rescanned
+RESCAN = '*'
+
+DEBOUNCE_SECONDS = 0.3      # quiet time that ends a burst
+MAX_BATCH_DELAY = 1.0       # never hold a batch back longer than this
+POLL_INTERVAL = 0.5
+
+# From <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyWatcher:
+    """Watch folders (not recursively) with Linux inotify"""
+
+    def __init__(self, folders):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.folders = {}
+        for folder in folders:
+            folder = str(folder).replace('\\', '/').rstrip('/')
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(folder), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"cannot watch {folder}")
+            self.folders[wd] = folder
+
+    def read(self, timeout=None):
+        """Wait up to timeout seconds (forever if None); return changed paths"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', 'surrogateescape')
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    changed.add(RESCAN)
+                elif not mask & IN_ISDIR and wd in self.folders and is_image_name(name):
+                    changed.add(f"{self.folders[wd]}/{name}")
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Portable fallback: compare folder listings every POLL_INTERVAL seconds"""
+
+    def __init__(self, folders, interval=POLL_INTERVAL):
+        self.folders = [str(folder) for folder in folders]
+        self.interval = interval
+        self.snapshot = self._scan()
+        self.unsettled = {}
+
+    def _scan(self):
+        return {record.path: (record.size, record.stat.st_mtime_ns)
+                for folder in self.folders for record in scan_images(folder, report=None)}
+
+    def read(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            time.sleep(self.interval if deadline is None
+                       else max(0, min(self.interval, deadline - time.monotonic())))
+            current = self._scan()
+            changed = {path for path in current.keys() | self.snapshot.keys()
+                       if current.get(path) != self.snapshot.get(path)}
+            self.snapshot = current
+            # Report a file once it looks the same on two polls in a row, so
+            # files still being copied are not picked up half-written
+            for path in changed:
+                self.unsettled[path] = current.get(path)
+            settled = {path for path, state in self.unsettled.items()
+                       if path not in changed and current.get(path) == state}
+            for path in settled:
+                del self.unsettled[path]
+            if settled or (deadline is not None and time.monotonic() >= deadline):
+                return settled
+
+    def close(self):
+        pass
+
+
+def open_watcher(folders):
+    """Return an inotify watcher if the platform has one, else a polling watcher"""
+    try:
+        return InotifyWatcher(folders)
+    except (OSError, AttributeError):
+        return PollingWatcher(folders)
+
+
+def batches(watcher, debounce=DEBOUNCE_SECONDS, max_delay=MAX_BATCH_DELAY):
+    """Yield sets of changed paths, merging events that arrive close together"""
+    while True:
+        changed = watcher.read()
+        if not changed:
+            continue
+        deadline = time.monotonic() + max_delay
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            more = watcher.read(min(debounce, remaining))
+            if not more:
+                break
+            changed |= more
+        yield changed
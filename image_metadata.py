@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Image Metadata
+Reads width, height, orientation, capture date and GPS position from JPEG
+and PNG headers without decoding any pixels, and writes width/height into
+the catalog entries so cards can reserve their space before images load.
+
+Only the segments in front of the image data are read: JPEG markers up to
+the frame header, PNG chunks up to the first IDAT. Results are cached per
+image and reused while its content hash is unchanged, and new images are
+read in parallel on a process pool.
+
+GPS positions are mapped to the nearest place in the "coordinates" table of
+data/keywords.json, so photos named like imgi_19_554635326_n.jpg still get
+a location.
+
+Run: python3 image_metadata.py [--workers N]
+"""
+
+import argparse
+import json
+import math
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from catalog_shards import report_shards
+from catalog_store import CatalogStore
+from keyword_classifier import KEYWORDS_FILE
+from scan_manifest import ScanManifest, to_key
+
+METADATA_MANIFEST = Path('.cache/metadata-manifest.json')
+
+# Below this many unread images a process pool costs more than it saves
+POOL_THRESHOLD = 32
+
+# GPS positions further than this from every known place get no location
+MAX_PLACE_DISTANCE_KM = 150
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# TIFF field type -> (struct code, size)
+TIFF_TYPES = {1: ('B', 1), 2: ('s', 1), 3: ('H', 2), 4: ('L', 4),
+              5: ('LL', 8), 7: ('B', 1), 9: ('l', 4), 10: ('ll', 8)}
+
+TAG_ORIENTATION = 0x0112
+TAG_DATETIME = 0x0132
+TAG_EXIF_IFD = 0x8769
+TAG_GPS_IFD = 0x8825
+TAG_DATETIME_ORIGINAL = 0x9003
+
+
+def _read_ifd(tiff, offset, endian):
+    """Return {tag: value} for one TIFF directory, skipping unreadable fields"""
+    fields = {}
+    try:
+        count, = struct.unpack_from(endian + 'H', tiff, offset)
+    except struct.error:
+        return fields
+    for i in range(count):
+        entry = offset + 2 + i * 12
+        try:
+            tag, kind, n = struct.unpack_from(endian + 'HHL', tiff, entry)
+            code, size = TIFF_TYPES[kind]
+            start = entry + 8
+            if size * n > 4:
+                start, = struct.unpack_from(endian + 'L', tiff, start)
+            if kind == 2:
+                value = tiff[start:start + n].split(b'\0', 1)[0].decode('ascii', 'replace')
+            elif kind in (5, 10):
+                pairs = struct.unpack_from(endian + code * n, tiff, start)
+                value = [a / b if b else 0.0 for a, b in zip(pairs[::2], pairs[1::2])]
+            else:
+                value = list(struct.unpack_from(endian + code * n, tiff, start))
+        except (KeyError, struct.error):
+            continue
+        fields[tag] = value[0] if isinstance(value, list) and len(value) == 1 else value
+    return fields
+
+
+def _gps_degrees(values, ref):
+    if not isinstance(values, list) or len(values) != 3:
+        return None
+    degrees = values[0] + values[1] / 60 + values[2] / 3600
+    return -degrees if ref in ('S', 'W') else degrees
+
+
+def parse_exif(tiff):
+    """Pull orientation, capture date and GPS position out of an EXIF (TIFF) block"""
+    if tiff[:2] not in (b'II', b'MM'):
+        return {}
+    endian = '<' if tiff[:2] == b'II' else '>'
+    try:
+        ifd0, = struct.unpack_from(endian + 'L', tiff, 4)
+    except struct.error:
+        return {}
+    fields = _read_ifd(tiff, ifd0, endian)
+    exif = _read_ifd(tiff, fields[TAG_EXIF_IFD], endian) if isinstance(fields.get(TAG_EXIF_IFD), int) else {}
+    gps = _read_ifd(tiff, fields[TAG_GPS_IFD], endian) if isinstance(fields.get(TAG_GPS_IFD), int) else {}
+
+    meta = {}
+    if isinstance(fields.get(TAG_ORIENTATION), int):
+        meta['orientation'] = fields[TAG_ORIENTATION]
+    taken = exif.get(TAG_DATETIME_ORIGINAL) or fields.get(TAG_DATETIME)
+    if isinstance(taken, str) and len(taken) >= 19:
+        # EXIF writes "2024:01:15 09:30:00"
+        meta['taken'] = taken[:10].replace(':', '-') + 'T' + taken[11:19]
+    lat = _gps_degrees(gps.get(2), gps.get(1))
+    lon = _gps_degrees(gps.get(4), gps.get(3))
+    if lat is not None and lon is not None and (lat or lon):
+        meta['gps'] = [round(lat, 6), round(lon, 6)]
+    return meta
+
+
+def _read_jpeg(f):
+    meta = {}
+    while True:
+        byte = f.read(1)
+        if not byte:
+            return meta
+        if byte != b'\xff':
+            continue
+        marker = f.read(1)
+        while marker == b'\xff':
+            marker = f.read(1)
+        if not marker:
+            return meta
+        code = marker[0]
+        # Standalone markers carry no length
+        if code == 0x01 or 0xD0 <= code <= 0xD8:
+            continue
+        if code in (0xD9, 0xDA):
+            return meta
+        header = f.read(2)
+        if len(header) < 2:
+            return meta
+        length, = struct.unpack('>H', header)
+        if length < 2:
+            return meta         # corrupt: a length always counts its own two bytes
+        segment = f.read(length - 2)
+        if code == 0xE1 and segment[:6] == b'Exif\0\0':
+            meta.update(parse_exif(segment[6:]))
+        elif 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC) and len(segment) >= 5:
+            meta['height'], meta['width'] = struct.unpack('>HH', segment[1:5])
+            return meta
+
+
+def _read_png(f):
+    meta = {}
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            return meta
+        length, kind = struct.unpack('>L4s', header)
+        if kind in (b'IDAT', b'IEND'):
+            return meta
+        if kind == b'IHDR':
+            size = f.read(8)
+            if length < 8 or len(size) < 8:
+                return meta
+            meta['width'], meta['height'] = struct.unpack('>LL', size)
+            f.seek(length - 8 + 4, 1)
+        elif kind == b'eXIf':
+            meta.update(parse_exif(f.read(length)))
+            f.seek(4, 1)
+        else:
+            f.seek(length + 4, 1)
+
+
+def read_metadata(path):
+    """
+    Read metadata from an image's headers. Width and height are as displayed,
+    i.e. swapped when the EXIF orientation rotates the image by 90 degrees.
+    """
+    with open(path, 'rb') as f:
+        signature = f.read(8)
+        f.seek(0)
+        if signature[:2] == b'\xff\xd8':
+            meta = _read_jpeg(f)
+        elif signature == PNG_SIGNATURE:
+            f.seek(8)
+            meta = _read_png(f)
+        else:
+            return {}
+    if meta.get('orientation', 1) in (5, 6, 7, 8) and 'width' in meta:
+        meta['width'], meta['height'] = meta['height'], meta['width']
+    return meta
+
+
+def extract_metadata(paths, manifest=None, workers=None):
+    """
+    Return {path: metadata} for the given images, reading only those whose
+    content changed since the cached result
+    """
+    own_manifest = manifest is None
+    if own_manifest:
+        manifest = ScanManifest.load(METADATA_MANIFEST)
+    results = {}
+    pending = {}
+    for path in paths:
+        manifest.check(path)
+        digest = manifest.hash_of(path)
+        entry = manifest.entries[to_key(path)]
+        if 'metadata' in entry and entry.get('metadata_from') == digest:
+            results[path] = entry['metadata']
+        else:
+            pending[path] = (entry, digest)
+
+    if len(pending) < POOL_THRESHOLD:
+        read = {path: _safe_read(path) for path in pending}
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            read = dict(zip(pending, pool.map(_safe_read, pending, chunksize=16)))
+
+    for path, meta in read.items():
+        entry, digest = pending[path]
+        entry['metadata'] = meta
+        entry['metadata_from'] = digest
+        manifest.dirty = True
+        results[path] = meta
+    if own_manifest:
+        manifest.save()
+    return results
+
+
+def _safe_read(path):
+    try:
+        return read_metadata(path)
+    except (OSError, ValueError, struct.error):
+        return {}
+
+
+def load_place_coordinates(path=KEYWORDS_FILE):
+    """Return {place: (lat, lon)} from the coordinates table of the keywords file"""
+    data = json.loads(Path(path).read_text(encoding='utf-8'))
+    return {place: tuple(position) for place, position in data.get('coordinates', {}).items()}
+
+
+def distance_km(a, b):
+    """Great-circle distance between two (lat, lon) points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * 6371 * math.asin(math.sqrt(h))
+
+
+def nearest_place(gps, coordinates, max_km=MAX_PLACE_DISTANCE_KM):
+    """Return the known place closest to a GPS position, or None if none is near"""
+    if not gps or not coordinates:
+        return None
+    distance, place = min((distance_km(gps, position), place) for place, position in coordinates.items())
+    return place if distance <= max_km else None
+
+
+def update_dimensions(workers=None):
+    """Write width/height into every tour, destination and gallery entry"""
+    manifest = ScanManifest.load(METADATA_MANIFEST)
+    store = CatalogStore()
+    catalogs = [store[name] for name in ('tours', 'destinations', 'gallery')]
+    paths = sorted({entry[c.image_key] for c in catalogs for entry in c
+                    if entry.get(c.image_key) and Path(entry[c.image_key]).is_file()})
+
+    print(f"📐 Reading headers of {len(paths)} images...")
+    metadata = extract_metadata(paths, manifest, workers)
+    for catalog in catalogs:
+        updated = 0
+        for entry in catalog:
+            meta = metadata.get(entry.get(catalog.image_key), {})
+            if 'width' in meta and catalog.update(entry, width=meta['width'], height=meta['height']):
+                updated += 1
+        if updated:
+            print(f"✅ Updated {updated} entries in {catalog.path}")
+
+    report_shards(store, store.commit())
+    manifest.save()
+    print("✅ Image dimensions up to date")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Write image dimensions into the catalogs")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+    update_dimensions(workers=args.workers)
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Image Scanner
+Single-pass, streaming directory scanner shared by the organizer scripts.
+
+Each folder is enumerated exactly once with os.scandir, which gets the file
+type from the directory listing itself, and matching images are yielded as
+they are found instead of being collected into lists first.
+"""
+
+import os
+from dataclasses import dataclass
+
+# Extensions are matched case-insensitively, so IMG_01.JPG is picked up too
+IMAGE_EXTENSIONS = frozenset({'.jpg', '.jpeg', '.png'})
+
+
+@dataclass(frozen=True)
+class ImageRecord:
+    """An image file found by the scanner"""
+    path: str       # forward-slash path, as stored in the JSON files
+    name: str
+    folder: str
+    stat: os.stat_result
+
+    @property
+    def stem(self):
+        return os.path.splitext(self.name)[0]
+
+    @property
+    def suffix(self):
+        return os.path.splitext(self.name)[1].lower()
+
+    @property
+    def size(self):
+        return self.stat.st_size
+
+
+def is_image_name(name):
+    """Check whether a filename has one of the supported image extensions"""
+    return os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+
+
+def print_count(folder, count, done):
+    """Default progress reporter, printing the final count per folder"""
+    if done:
+        print(f"📸 Found {count} images in {os.path.basename(str(folder).rstrip('/'))}/")
+
+
+def scan_images(folder, report=print_count, report_every=1000):
+    """
+    Yield an ImageRecord for every image directly inside folder.
+
+    report(folder, count, done) is called every report_every images and once
+    more when the folder is exhausted. Missing folders yield nothing.
+    """
+    folder = str(folder).replace('\\', '/')
+    count = 0
+    try:
+        entries = os.scandir(folder)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if not is_image_name(entry.name) or not entry.is_file():
+                continue
+            count += 1
+            yield ImageRecord(
+                path=f"{folder.rstrip('/')}/{entry.name}",
+                name=entry.name,
+                folder=folder,
+                stat=entry.stat(),
+            )
+            if report and count % report_every == 0:
+                report(folder, count, False)
+    if report:
+        report(folder, count, True)
+
+
+def index_folder(folder):
+    """Return the set of image filenames in a folder, in one scan"""
+    return {record.name for record in scan_images(folder, report=None)}
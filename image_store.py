@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Image Store
+Keeps one blob per unique image (named by its SHA-256) and materialises the
+files under assets/images/ as links to those blobs instead of full copies.
+
+Link methods are tried in order: hardlink, reflink (copy-on-write clone on
+filesystems that support it), and finally a plain copy. Symlinks are never
+used: the store lives in the untracked .cache/, so a symlinked image would
+dangle once committed or copied into a build. Hardlinked
+blobs share an inode with the files pointing at them, so images must be
+replaced (write a new file and rename it) rather than edited in place.
+
+Run: python3 image_store.py [--link MODE] [folder ...]
+to deduplicate images that are already in place.
+"""
+
+import argparse
+import os
+import shutil
+from collections import Counter
+from pathlib import Path
+
+from image_scanner import scan_images
+from scan_manifest import hash_file
+
+STORE_DIR = Path('.cache/image-store')
+LINK_METHODS = ('hardlink', 'reflink', 'copy')
+DEFAULT_FOLDERS = [
+    'assets/images',
+    'assets/images/tours',
+    'assets/images/destinations',
+    'assets/images/gallery',
+]
+
+# Linux ioctl used by cp --reflink
+FICLONE = 0x40049409
+
+
+def _reflink(src, dst):
+    """Clone src into dst sharing the same extents (btrfs, XFS, APFS-on-Linux...)"""
+    import fcntl
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.unlink(dst)
+            raise
+
+
+def _link(src, dst, method):
+    if method == 'hardlink':
+        os.link(src, dst)
+    elif method == 'reflink':
+        _reflink(src, dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+class DedupReport:
+    """Tally of what the store saved compared to plain copies"""
+
+    def __init__(self):
+        self.files = 0
+        self.bytes_total = 0
+        self.bytes_stored = 0
+        self.blobs = set()
+        self.methods = Counter()
+
+    def record(self, digest, size, method):
+        self.files += 1
+        self.bytes_total += size
+        if digest not in self.blobs:
+            self.blobs.add(digest)
+            self.bytes_stored += size
+        self.methods[method] += 1
+
+    @property
+    def duplicates(self):
+        return self.files - len(self.blobs)
+
+    @property
+    def bytes_saved(self):
+        return self.bytes_total - self.bytes_stored
+
+    def print_summary(self):
+        print("\n🗄️  Image store report:")
+        print(f"   Files: {self.files} ({len(self.blobs)} unique, {self.duplicates} duplicates)")
+        print(f"   Size as copies: {self.bytes_total / 1024:.0f} KB")
+        print(f"   Size in store: {self.bytes_stored / 1024:.0f} KB")
+        print(f"   Saved: {self.bytes_saved / 1024:.0f} KB")
+        if self.methods:
+            print("   Links: " + ', '.join(f"{name} {count}" for name, count in sorted(self.methods.items())))
+
+
+class ImageStore:
+    """One blob per unique image hash, with links wherever the image is used"""
+
+    def __init__(self, root=STORE_DIR, link='auto'):
+        if link != 'auto' and link not in LINK_METHODS:
+            raise ValueError(f"Unknown link method: {link}")
+        self.root = Path(root)
+        self.methods = LINK_METHODS if link == 'auto' else (link,)
+        self.report = DedupReport()
+
+    def blob_path(self, digest, suffix):
+        return self.root / digest[:2] / f"{digest}{suffix.lower()}"
+
+    def _materialise(self, src, dst, methods=None):
+        """Create dst from src using the first link method that works"""
+        dst = Path(dst)
+        tmp = dst.with_name(f".{dst.name}.tmp")
+        if tmp.exists() or tmp.is_symlink():
+            tmp.unlink()
+        for method in methods or self.methods:
+            try:
+                _link(src, tmp, method)
+            except OSError:
+                continue
+            os.replace(tmp, dst)
+            return method
+        raise OSError(f"Could not link {src} to {dst}")
+
+    def add(self, source, digest=None):
+        """Store source as a blob (if not already stored) and return its path"""
+        digest = digest or hash_file(source)
+        blob = self.blob_path(digest, Path(source).suffix)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            self._materialise(source, blob)
+        return digest, blob
+
+    def place(self, source, dest, digest=None):
+        """Make dest a link to the blob holding source's content"""
+        size = os.path.getsize(source)
+        digest, blob = self.add(source, digest)
+        dest = Path(dest)
+        # Symlinks left by earlier versions are replaced with real files
+        if dest.exists() and not dest.is_symlink() and os.path.samefile(dest, blob):
+            method = 'existing'
+        else:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            method = self._materialise(blob, dest)
+        self.report.record(digest, size, method)
+        return blob
+
+
+def dedup_folders(store, folders):
+    """Replace every image in folders with a link into the store"""
+    for folder in folders:
+        for record in scan_images(folder):
+            store.place(record.path, record.path)
+    return store.report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicate site images into a content-addressed store")
+    parser.add_argument('folders', nargs='*', default=DEFAULT_FOLDERS,
+                        help="folders to deduplicate (default: assets/images and its category folders)")
+    parser.add_argument('--link', default='auto', choices=('auto',) + LINK_METHODS,
+                        help="how to link files to their blob (default: first method that works)")
+    parser.add_argument('--store', default=str(STORE_DIR), help="blob store directory")
+    args = parser.parse_args()
+
+    print("🔍 Deduplicating images...")
+    store = ImageStore(args.store, link=args.link)
+    dedup_folders(store, args.folders)
+    store.report.print_summary()
+
+
+if __name__ == '__main__':
+    main()
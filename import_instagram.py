@@ -3,13 +3,33 @@
 Instagram Content Import Helper
 
 This script helps you organize and import Instagram content into the website.
-Run: python3 import_instagram.py
+Either fill in INSTAGRAM_CONTENT below, or point it at an Instagram data
+export (Settings > Your activity > Download your information, JSON format):
+posts are read straight from the zip, their photos extracted into the image
+folders, and captions, locations and dates mapped onto tours, destinations
+and gallery items. An interrupted import resumes where it stopped.
+
+Run: python3 import_instagram.py [instagram-export.zip] [--profile] [--metrics-json FILE]
 """
 
+import argparse
+import itertools
 import json
-import os
+import re
+import zipfile
+from datetime import datetime, timezone
 from pathlib import Path
 
+import instrumentation
+from catalog_db import open_store
+from catalog_shards import report_shards
+from catalog_store import INSTAGRAM_ID_START, atomic_write_text
+from image_metadata import load_place_coordinates, nearest_place, read_metadata
+from image_scanner import index_folder, is_image_name
+from instagram_archive import extract_members, fix_text, iter_posts, posts_members
+from instrumentation import METRICS
+from keyword_classifier import KeywordClassifier
+
 # Instagram content data - Fill this with your Instagram posts
 # Copy this format for each Instagram post you want to add
 INSTAGRAM_CONTENT = [
@@ -30,35 +50,50 @@ INSTAGRAM_CONTENT = [
     # Add more posts here...
 ]
 
-
-def load_json_file(filepath):
-    """Load JSON file"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        return json.load(f)
+# Where the downloaded image for each content type is expected to live
+IMAGE_FOLDERS = {
+    "tour": "assets/images/tours",
+    "destination": "assets/images/destinations",
+    "gallery": "assets/images/gallery",
+}
 
 
-def save_json_file(filepath, data):
-    """Save JSON file with pretty formatting"""
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+def check_images():
+    """Warn about posts whose image has not been downloaded into its folder"""
+    folder_index = {}
+    missing = []
+    for item in INSTAGRAM_CONTENT:
+        folder = IMAGE_FOLDERS.get(item.get('type'))
+        if not folder:
+            continue
+        # Each folder is scanned once, however many posts point into it
+        if folder not in folder_index:
+            folder_index[folder] = index_folder(folder)
+        if item['image_name'] not in folder_index[folder]:
+            missing.append(f"{folder}/{item['image_name']}")
+    
+    if missing:
+        print(f"⚠️  {len(missing)} image(s) not found:")
+        for path in missing:
+            print(f"   - {path}")
+        print()
+    return missing
 
 
-def update_tours():
-    """Update tours.json with Instagram tour content"""
-    tours_file = Path('data/tours.json')
-    tours_data = load_json_file(tours_file)
+def update_tours(store, content=INSTAGRAM_CONTENT):
+    """Add Instagram tour content to the tours catalog"""
+    tours = store['tours']
     
     instagram_tours = []
-    for idx, item in enumerate(INSTAGRAM_CONTENT):
+    for item in content:
         if item.get('type') == 'tour':
             tour = {
-                "id": len(tours_data['tours']) + len(instagram_tours) + 1,
                 "title": item.get('title', f'Instagram Tour {len(instagram_tours) + 1}'),
                 "subtitle": f"{item.get('duration', '2-3 days')}",
                 "price": item.get('price', 499),
                 "duration": item.get('duration', '2-3 days'),
                 "difficulty": "Easy",
-                "image": f"assets/images/tours/{item['image_name']}",
+                "image": f"{IMAGE_FOLDERS['tour']}/{item['image_name']}",
                 "description": item.get('description') or item.get('caption', ''),
                 "highlights": item.get('highlights', []),
                 "includes": [
@@ -69,68 +104,262 @@ def update_tours():
                 ],
                 "category": item.get('category', 'Cultural')
             }
-            instagram_tours.append(tour)
+            add_post_details(tour, item)
+            if tours.add(tour, min_id=INSTAGRAM_ID_START):
+                instagram_tours.append(tour)
     
     if instagram_tours:
-        tours_data['tours'].extend(instagram_tours)
-        save_json_file(tours_file, tours_data)
         print(f"✅ Added {len(instagram_tours)} tours to data/tours.json")
-        return True
-    return False
+    return len(instagram_tours)
 
 
-def update_destinations():
-    """Update destinations.json with Instagram destination content"""
-    dest_file = Path('data/destinations.json')
-    dest_data = load_json_file(dest_file)
+def update_destinations(store, content=INSTAGRAM_CONTENT):
+    """Add Instagram destination content to the destinations catalog"""
+    destinations = store['destinations']
     
     instagram_dests = []
-    for idx, item in enumerate(INSTAGRAM_CONTENT):
+    for item in content:
         if item.get('type') == 'destination':
             dest = {
-                "id": len(dest_data['destinations']) + len(instagram_dests) + 1,
                 "name": item.get('title') or item.get('location', f'Instagram Destination {len(instagram_dests) + 1}'),
                 "region": item.get('region', 'Various'),
-                "image": f"assets/images/destinations/{item['image_name']}",
+                "image": f"{IMAGE_FOLDERS['destination']}/{item['image_name']}",
                 "description": item.get('description') or item.get('caption', ''),
                 "bestTime": item.get('best_time', 'Year-round'),
                 "highlights": item.get('highlights', [])
             }
-            instagram_dests.append(dest)
+            add_post_details(dest, item)
+            if destinations.add(dest, min_id=INSTAGRAM_ID_START):
+                instagram_dests.append(dest)
     
     if instagram_dests:
-        dest_data['destinations'].extend(instagram_dests)
-        save_json_file(dest_file, dest_data)
         print(f"✅ Added {len(instagram_dests)} destinations to data/destinations.json")
-        return True
-    return False
+    return len(instagram_dests)
 
 
-def generate_gallery_updates():
-    """Generate gallery items for manual update"""
+def update_gallery(store, content=INSTAGRAM_CONTENT):
+    """Add Instagram gallery content to the gallery catalog"""
+    gallery = store['gallery']
+    
     gallery_items = []
-    for item in INSTAGRAM_CONTENT:
+    for item in content:
         if item.get('type') == 'gallery':
             gallery_item = {
-                "src": f"assets/images/gallery/{item['image_name']}",
+                "src": f"{IMAGE_FOLDERS['gallery']}/{item['image_name']}",
                 "category": item.get('category', 'tours').lower(),
                 "title": item.get('title') or item.get('location', 'Instagram Photo')
             }
-            gallery_items.append(gallery_item)
+            add_post_details(gallery_item, item)
+            if gallery.add(gallery_item):
+                gallery_items.append(gallery_item)
     
     if gallery_items:
-        print("\n📸 Gallery items to add to gallery.html:")
-        print("   Add these to the galleryImages array:")
-        for item in gallery_items:
-            print(f"   {json.dumps(item)},")
-        return True
-    return False
+        print(f"✅ Added {len(gallery_items)} items to data/gallery.json")
+    return len(gallery_items)
 
 
-def main():
+# Data-export imports: progress is saved here after every committed batch
+CHECKPOINT_FILE = Path('.cache/instagram-import.json')
+IMPORT_BATCH_SIZE = 200
+TAG_PATTERN = re.compile(r'[#@][\w.]+')
+
+
+def add_post_details(entry, item):
+    """Copy the post date and image size onto a catalog entry, when known"""
+    for key in ('date', 'width', 'height'):
+        if item.get(key):
+            entry[key] = item[key]
+
+
+def caption_title(text, fallback, limit=60):
+    """First sentence of a caption, cut at a word boundary"""
+    first = re.split(r'(?<=[.!?])\s|\n', text.strip(), maxsplit=1)[0].strip()
+    if len(first) > limit:
+        first = first[:limit].rsplit(' ', 1)[0].rstrip(',;:-') + '…'
+    return first or fallback
+
+
+def media_gps(media):
+    """Return [lat, lon] from a media item's exported EXIF data, if any"""
+    exif = media.get('media_metadata', {}).get('photo_metadata', {}).get('exif_data', [])
+    for fields in exif:
+        if 'latitude' in fields and 'longitude' in fields:
+            return [fields['latitude'], fields['longitude']]
+    return None
+
+
+def post_to_items(post, classifier, coordinates, known_places):
+    """
+    Turn one exported post into INSTAGRAM_CONTENT-style items.
+
+    The first photo of a post that names both a place and a category becomes
+    a tour, one naming only a new place becomes a destination, anything else
+    goes to the gallery; further photos of a carousel go to the gallery.
+    """
+    media = [m for m in post.get('media', []) if is_image_name(m.get('uri', ''))]
+    if not media:
+        return []
+    caption = fix_text(post.get('title') or media[0].get('title') or '')
+    timestamp = post.get('creation_timestamp') or media[0].get('creation_timestamp')
+    date = datetime.fromtimestamp(timestamp, timezone.utc).date().isoformat() if timestamp else None
+
+    # Hashtags often carry the place and activity, so classify the full caption
+    matches = classifier.classify(caption)
+    locations = [value for _, value in matches['locations']]
+    location = locations[0] if locations else None
+    if not location:
+        location = next(filter(None, (nearest_place(media_gps(m), coordinates) for m in media)), None)
+    categories = matches['categories']
+    category = categories[0][1] if categories else None
+    highlights = [categories[0][0].title()] if categories else []
+    highlights += [value for _, value in matches['activities'] if value not in highlights]
+
+    description = re.sub(r'\s+', ' ', TAG_PATTERN.sub('', caption)).strip()
+    place = location.split(',')[0] if location else None
+    if location and category:
+        kind = 'tour'
+    elif place and place not in known_places:
+        kind = 'destination'
+        known_places.add(place)
+    else:
+        kind = 'gallery'
+
+    items = []
+    for number, m in enumerate(media):
+        item = {
+            "type": kind if number == 0 else 'gallery',
+            "member": m['uri'],
+            "image_name": f"ig-{Path(m['uri']).name}",
+            "title": place if kind == 'destination' and number == 0
+                     else caption_title(description, place or 'Instagram Photo'),
+            "caption": caption,
+            "location": location,
+            "description": description,
+            "highlights": highlights[:3],
+            "date": date,
+        }
+        if category:
+            item['category'] = category
+        if kind == 'destination' and ',' in location:
+            item['region'] = location.split(',', 1)[1].strip()
+        items.append(item)
+    return items
+
+
+def load_checkpoint(archive_path, restart=False):
+    """Return the saved progress for this archive, or a fresh one"""
+    stat = Path(archive_path).stat()
+    signature = {'name': Path(archive_path).name, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if not restart:
+        try:
+            checkpoint = json.loads(CHECKPOINT_FILE.read_text(encoding='utf-8'))
+            if checkpoint.get('archive') == signature:
+                return checkpoint
+        except (OSError, ValueError):
+            pass
+    return {'archive': signature, 'posts': {}}
+
+
+def resolve_member(names, uri):
+    """Find the archive member for a media uri (exports may add a top-level folder)"""
+    if uri in names:
+        return uri
+    return next((name for name in names if name.endswith('/' + uri)), None)
+
+
+def import_batch(archive, names, store, items, workers):
+    """
+    Extract the photos of a batch of items and add them to the catalogs.
+    Returns (items added per catalog, paths the commit wrote).
+    """
+    jobs = []
+    for item in items:
+        member = resolve_member(names, item['member'])
+        if member:
+            item['member'] = member
+            jobs.append((member, f"{IMAGE_FOLDERS[item['type']]}/{item['image_name']}"))
+    with METRICS.phase('extract') as phase:
+        metadata, failed = extract_members(archive, jobs, workers=workers, after=read_metadata)
+        phase.add(files=len(metadata), bytes=sum(archive.getinfo(member).file_size for member in metadata))
+    for member, error in failed.items():
+        print(f"⚠️  Could not extract {member}: {error}")
+
+    extracted = [item for item in items if item['member'] in metadata]
+    for item in extracted:
+        item.update({key: metadata[item['member']][key] for key in ('width', 'height')
+                     if key in metadata[item['member']]})
+    with METRICS.phase('merge') as phase:
+        counts = (update_tours(store, extracted), update_destinations(store, extracted),
+                  update_gallery(store, extracted))
+        phase.add(items=sum(counts))
+    with METRICS.phase('write') as phase:
+        committed = store.commit()
+        phase.add(files=len(committed))
+    return counts, committed
+
+
+def import_archive(archive_path, workers=4, batch_size=IMPORT_BATCH_SIZE, restart=False):
+    """Import every photo post of an Instagram data export"""
+    print(f"📦 Importing {archive_path}...\n")
+    checkpoint = load_checkpoint(archive_path, restart)
+    classifier = KeywordClassifier.from_file()
+    coordinates = load_place_coordinates()
+    store = open_store()
+    known_places = {dest['name'] for dest in store['destinations']}
+    totals = [0, 0, 0]
+    committed = set()
+
+    with zipfile.ZipFile(archive_path) as archive:
+        names = set(archive.namelist())
+        members = posts_members(archive)
+        if not members:
+            print("❌ No content/posts_N.json found; is this an Instagram JSON export?")
+            return False
+        for member in members:
+            done = checkpoint['posts'].get(member, 0)
+            if done:
+                print(f"⏩ {member}: resuming after {done} posts")
+            posts = iter_posts(archive, member, skip=done)
+            while True:
+                with METRICS.phase('parse') as phase:
+                    batch = []
+                    read = 0
+                    for number, post in itertools.islice(posts, batch_size):
+                        batch += post_to_items(post, classifier, coordinates, known_places)
+                        done = number + 1
+                        read += 1
+                    phase.add(posts=read, items=len(batch))
+                counts, written = import_batch(archive, names, store, batch, workers)
+                totals = [a + b for a, b in zip(totals, counts)]
+                committed.update(written)
+                # Catalogs are committed before the checkpoint moves on, so a crash
+                # re-imports at most one batch (and duplicates are skipped)
+                checkpoint['posts'][member] = done
+                atomic_write_text(CHECKPOINT_FILE, json.dumps(checkpoint))
+                if read < batch_size:
+                    break
+            print(f"📄 {member}: {done} posts")
+
+    with METRICS.phase('shards'):
+        report_shards(store, committed)
+    print("\n" + "=" * 50)
+    print("✅ Import Summary:")
+    print(f"   Tours added: {totals[0]}")
+    print(f"   Destinations added: {totals[1]}")
+    print(f"   Gallery items added: {totals[2]}")
+    print("\n💡 Tip: You can now refine titles, prices and descriptions in the JSON files")
+    return True
+
+
+def run_import(args):
+    """Import from the archive given on the command line, or from INSTAGRAM_CONTENT"""
     print("🚀 Instagram Content Import Tool\n")
     print("=" * 50)
     
+    if args.archive:
+        import_archive(args.archive, args.workers, args.batch_size, args.restart)
+        return
+    
     if not INSTAGRAM_CONTENT or len(INSTAGRAM_CONTENT) == 0:
         print("⚠️  No Instagram content found!")
         print("\nPlease edit this script and fill in INSTAGRAM_CONTENT array with:")
@@ -141,23 +370,49 @@ def main():
     
     print(f"\n📊 Processing {len(INSTAGRAM_CONTENT)} Instagram posts...\n")
     
-    tours_updated = update_tours()
-    destinations_updated = update_destinations()
-    gallery_updated = generate_gallery_updates()
+    check_images()
+    
+    # All changes are written together at the end of the run
+    store = open_store()
+    with METRICS.phase('merge') as phase:
+        tours_updated = update_tours(store)
+        destinations_updated = update_destinations(store)
+        gallery_updated = update_gallery(store)
+        phase.add(items=tours_updated + destinations_updated + gallery_updated)
+    with METRICS.phase('write') as phase:
+        committed = store.commit()
+        phase.add(files=len(committed))
+    with METRICS.phase('shards'):
+        report_shards(store, committed)
     
     print("\n" + "=" * 50)
     print("✅ Import Summary:")
     print(f"   Tours: {'Updated' if tours_updated else 'No tours found'}")
     print(f"   Destinations: {'Updated' if destinations_updated else 'No destinations found'}")
-    print(f"   Gallery: {'See items above' if gallery_updated else 'No gallery items found'}")
+    print(f"   Gallery: {'Updated' if gallery_updated else 'No gallery items found'}")
     
     print("\n📝 Next Steps:")
     print("   1. Make sure all images are in the correct folders:")
     print("      - assets/images/tours/")
     print("      - assets/images/destinations/")
     print("      - assets/images/gallery/")
-    print("   2. If you have gallery items, update gallery.html manually")
-    print("   3. Test the website to verify everything displays correctly")
+    print("   2. Test the website to verify everything displays correctly")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import Instagram content into the website")
+    parser.add_argument('archive', nargs='?', help="Instagram data-export zip (JSON format)")
+    parser.add_argument('--workers', type=int, default=4, help="photos extracted in parallel")
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE,
+                        help="posts per catalog commit / checkpoint")
+    parser.add_argument('--restart', action='store_true', help="ignore the saved checkpoint")
+    instrumentation.add_arguments(parser)
+    args = parser.parse_args()
+    instrumentation.configure(args)
+    try:
+        run_import(args)
+    finally:
+        instrumentation.finish(args)
 
 
 if __name__ == '__main__':
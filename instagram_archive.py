@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Instagram Archive Reader
+Reads posts and media straight out of an Instagram data-export zip, without
+unpacking it.
+
+The posts_N.json files are parsed incrementally: the archive member is read
+in chunks and each post is decoded as soon as it is complete, so memory use
+does not grow with the size of the account. Media files are extracted by a
+small thread pool that never has more than a few files in flight.
+"""
+
+import codecs
+import json
+import os
+import re
+import shutil
+import struct
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# Newer exports use your_instagram_activity/content/, older ones content/
+POSTS_MEMBER = re.compile(r'(?:^|/)content/posts_\d+\.json$')
+
+CHUNK_SIZE = 1 << 16
+
+
+def posts_members(archive):
+    """Return the posts_N.json members of an open archive, in numeric order"""
+    names = [name for name in archive.namelist() if POSTS_MEMBER.search(name)]
+    return sorted(names, key=lambda name: int(re.search(r'(\d+)\.json$', name).group(1)))
+
+
+def iter_json_array(stream, chunk_size=CHUNK_SIZE):
+    """
+    Yield the elements of a top-level JSON array from a binary stream,
+    decoding one element at a time. Elements must be objects or arrays
+    (as Instagram's are), since a number cut off at a chunk boundary would
+    otherwise parse as a shorter one.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buffer = buffer[pos:] + text_decoder.decode(chunk, final=eof)
+        pos = 0
+
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+
+    skip(' \t\r\n\ufeff')
+    if buffer[pos:pos + 1] != '[':
+        raise ValueError("Expected a JSON array")
+    pos += 1
+    while True:
+        skip(' \t\r\n,')
+        if pos >= len(buffer) or buffer[pos] == ']':
+            return
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            fill()
+            continue
+        pos = end
+        yield value
+
+
+def iter_posts(archive, member, skip=0):
+    """Yield (number, post) for the posts in one member, skipping the first `skip`"""
+    with archive.open(member) as stream:
+        for number, post in enumerate(iter_json_array(stream)):
+            if number >= skip:
+                yield number, post
+
+
+def fix_text(text):
+    """Undo the export's mojibake (UTF-8 bytes escaped as Latin-1 code points)"""
+    try:
+        return text.encode('latin-1').decode('utf-8')
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return text
+
+
+def extract_member(archive, member, dest):
+    """Copy one member to dest via a temporary file; skipped if already there"""
+    info = archive.getinfo(member)
+    try:
+        if os.path.getsize(dest) == info.file_size:
+            return dest
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+    tmp = f"{dest}.tmp"
+    with archive.open(info) as src, open(tmp, 'wb') as out:
+        shutil.copyfileobj(src, out, CHUNK_SIZE)
+    os.replace(tmp, dest)
+    return dest
+
+
+def extract_members(archive, jobs, workers=4, in_flight=16, after=None):
+    """
+    Extract (member, dest) pairs with a bounded thread pool.
+
+    At most `in_flight` extractions are queued at once, so a long job list is
+    never turned into futures all at the same time. after(dest) runs in the
+    worker once a file is in place. Returns ({member: after's result},
+    {member: error}) with an entry per member in one of the two.
+    """
+    results = {}
+    failed = {}
+
+    def run(member, dest):
+        extract_member(archive, member, dest)
+        return after(dest) if after else None
+
+    def collect(future, member):
+        try:
+            results[member] = future.result()
+        except (OSError, KeyError, ValueError, struct.error, zipfile.BadZipFile) as e:
+            # A corrupt member (or one after() cannot read) fails alone
+            failed[member] = e
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for member, dest in jobs:
+            if len(pending) >= in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future, pending.pop(future))
+            pending[pool.submit(run, member, dest)] = member
+        for future in list(pending):
+            collect(future, pending.pop(future))
+    return results, failed
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Instrumentation
+Per-phase timings and counters for the image tools, so a slow run shows
+where the time went (scanning, hashing, classifying, writing JSON...).
+
+Each phase records wall time, CPU time, peak RSS and any counters the tool
+adds (files, bytes). Phases that run more than once (import batches, watch
+mode) accumulate. The tools expose this through these flags:
+
+  --metrics-json FILE   write the numbers as JSON ('-' prints them last on stdout)
+  --profile             run cProfile per phase; writes <tool>-<phase>.prof and
+                        a .txt with the top functions to --profile-dir
+                        (default .cache/profile)
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import resource
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from catalog_store import atomic_write_text
+
+PROFILE_DIR = Path('.cache/profile')
+PROFILE_TOP = 25
+
+
+def peak_rss():
+    """Peak resident set size of this process in bytes"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def reset_peak_rss():
+    """Start a new peak RSS measurement (Linux only; elsewhere peaks are cumulative)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+class Phase:
+    """Totals for one named phase"""
+
+    def __init__(self):
+        self.calls = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.peak_rss = 0
+        self.counts = Counter()
+
+    def add(self, **counts):
+        """Add to counters such as files=, bytes="""
+        self.counts.update(counts)
+
+    def to_dict(self):
+        return {'calls': self.calls, 'wall': round(self.wall, 4), 'cpu': round(self.cpu, 4),
+                'peak_rss': self.peak_rss, **self.counts}
+
+
+class Metrics:
+    """Phase timings for one run of a tool"""
+
+    # Phases open across all instances: a nested phase must not reset the
+    # outer phase's peak RSS, and only one profiler can be active at a time
+    _depth = 0
+
+    def __init__(self, tool):
+        self.tool = tool
+        self.phases = {}
+        self.profile_dir = None
+        self.profiles = {}
+        self.started = datetime.now(timezone.utc)
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+
+    def enable_profiling(self, directory=PROFILE_DIR):
+        self.profile_dir = Path(directory)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the block as phase `name`; yields the Phase for counters"""
+        phase = self.phases.setdefault(name, Phase())
+        # Nested phases are timed, but only the outermost one is profiled
+        outermost = not Metrics._depth
+        profiler = None
+        if self.profile_dir and outermost:
+            profiler = self.profiles.setdefault(name, cProfile.Profile())
+        if outermost:
+            reset_peak_rss()
+        Metrics._depth += 1
+        wall, cpu = time.perf_counter(), time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield phase
+        finally:
+            if profiler:
+                profiler.disable()
+            Metrics._depth -= 1
+            phase.calls += 1
+            phase.wall += time.perf_counter() - wall
+            phase.cpu += time.process_time() - cpu
+            phase.peak_rss = max(phase.peak_rss, peak_rss())
+
+    def to_dict(self):
+        return {
+            'tool': self.tool,
+            'started': self.started.isoformat(timespec='seconds'),
+            'wall': round(time.perf_counter() - self._wall, 4),
+            'cpu': round(time.process_time() - self._cpu, 4),
+            'peak_rss': max([peak_rss()] + [phase.peak_rss for phase in self.phases.values()]),
+            'phases': {name: phase.to_dict() for name, phase in self.phases.items()},
+        }
+
+    def write_profiles(self):
+        """Dump one .prof (for snakeviz etc.) and one .txt summary per profiled phase"""
+        written = []
+        for name, profiler in self.profiles.items():
+            base = self.profile_dir / f"{self.tool}-{name}"
+            base.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(f"{base}.prof")
+            text = io.StringIO()
+            pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(PROFILE_TOP)
+            atomic_write_text(f"{base}.txt", text.getvalue())
+            written.append(f"{base}.prof")
+        return written
+
+    def write_json(self, path):
+        text = json.dumps(self.to_dict(), indent=2)
+        if path == '-':
+            print(text)
+        else:
+            atomic_write_text(path, text + '\n')
+
+    def print_summary(self):
+        print("\n⏱️  Phases:")
+        for name, phase in self.phases.items():
+            counts = ''.join(f", {value} {key}" for key, value in phase.counts.items())
+            print(f"   {name:<12} {phase.wall:>8.2f}s wall {phase.cpu:>8.2f}s cpu "
+                  f"{phase.peak_rss / 2**20:>7.1f} MB{counts}")
+
+
+# Tools time their phases through this; it is cheap enough to be always on
+METRICS = Metrics(Path(sys.argv[0]).stem)
+
+
+def add_arguments(parser):
+    """Add --profile, --profile-dir and --metrics-json to a tool's argparse parser"""
+    parser.add_argument('--profile', action='store_true',
+                        help="profile each phase with cProfile")
+    parser.add_argument('--profile-dir', default=str(PROFILE_DIR), metavar='DIR',
+                        help=f"where --profile writes its output (default: {PROFILE_DIR})")
+    parser.add_argument('--metrics-json', metavar='FILE',
+                        help="write phase timings and counters as JSON ('-' for stdout)")
+
+
+def configure(args, metrics=METRICS):
+    """Apply the parsed --profile flags before the tool runs"""
+    if args.profile:
+        metrics.enable_profiling(args.profile_dir)
+
+
+def finish(args, metrics=METRICS):
+    """Report metrics and profiles after the tool ran (call from a finally block)"""
+    if args.profile:
+        metrics.print_summary()
+        for path in metrics.write_profiles():
+            print(f"📈 Profile: {path}")
+    if args.metrics_json:
+        metrics.write_json(args.metrics_json)
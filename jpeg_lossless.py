@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+"""
+Lossless JPEG Recompression
+Rewrites a JPEG without touching its image data, the way jpegtran
+-optimize -progressive does, for machines where jpegtran is not installed:
+
+  - metadata segments are dropped (XMP, comments, thumbnails, maker notes,
+    MPF extra images); the JFIF header, ICC colour profile and Adobe colour
+    transform are kept, and the EXIF orientation when the image is rotated
+  - baseline (sequential Huffman) images are re-coded as progressive JPEGs
+    with Huffman tables built for each scan's own symbol counts
+
+The DCT coefficients are decoded and written back unchanged, so the result
+decodes to exactly the same pixels. Progressive and arithmetic-coded inputs
+only have their metadata stripped.
+
+Run: python3 jpeg_lossless.py input.jpg output.jpg
+"""
+
+import argparse
+import re
+
+SOI = b'\xff\xd8'
+EOI = b'\xff\xd9'
+DHT, DRI, SOS, APP1, APP2, APP14, COM = 0xC4, 0xDD, 0xDA, 0xE1, 0xE2, 0xEE, 0xFE
+SEQUENTIAL_HUFFMAN = (0xC0, 0xC1)
+PROGRESSIVE_HUFFMAN = 0xC2
+FRAME_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# End of entropy-coded data: a marker other than stuffing (FF00) or RSTn
+ENTROPY_END = re.compile(rb'\xff[^\x00\xd0-\xd7]')
+RESTART = re.compile(rb'\xff[\xd0-\xd7]')
+
+# Longest end-of-band run one EOBn symbol can carry
+MAX_EOB_RUN = 0x7FFF
+
+
+# --- Segments --------------------------------------------------------------
+
+def read_segments(data):
+    """
+    Yield (marker, payload) for each segment of a JPEG up to EOI, with
+    (None, entropy-coded data) after each SOS
+    """
+    if data[:2] != SOI:
+        raise ValueError("not a JPEG")
+    i = 2
+    while True:
+        if i >= len(data) or data[i] != 0xFF:
+            raise ValueError("corrupt or truncated JPEG")
+        while i < len(data) and data[i] == 0xFF:
+            i += 1              # fill bytes
+        if i >= len(data):
+            raise ValueError("truncated JPEG")
+        marker = data[i]
+        i += 1
+        if marker == 0xD9:
+            return
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            yield marker, b''
+            continue
+        length = int.from_bytes(data[i:i + 2], 'big')
+        payload = data[i + 2:i + length]
+        if length < 2 or len(payload) != length - 2:
+            raise ValueError("truncated JPEG segment")
+        i += length
+        yield marker, payload
+        if marker == SOS:
+            match = ENTROPY_END.search(data, i)
+            end = match.start() if match else len(data)
+            yield None, data[i:end]
+            i = end
+
+
+def write_segment(marker, payload):
+    if marker is None:
+        return payload
+    if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+        return bytes((0xFF, marker))
+    return bytes((0xFF, marker)) + (len(payload) + 2).to_bytes(2, 'big') + payload
+
+
+def is_metadata(marker, payload):
+    """Whether a segment only carries metadata that rendering does not need"""
+    if marker == COM:
+        return True
+    if marker == APP2:
+        return not payload.startswith(b'ICC_PROFILE\x00')
+    return 0xE1 <= marker <= 0xEF and marker != APP14
+
+
+def orientation_exif(orientation):
+    """A minimal APP1 EXIF payload holding only the orientation tag"""
+    return (b'Exif\x00\x00MM\x00\x2a\x00\x00\x00\x08\x00\x01'
+            + b'\x01\x12\x00\x03\x00\x00\x00\x01' + orientation.to_bytes(2, 'big') + b'\x00\x00'
+            + b'\x00\x00\x00\x00')
+
+
+def strip_metadata(segments, orientation=1):
+    """Drop metadata segments, re-adding the orientation when the image is rotated"""
+    kept = []
+    for marker, payload in segments:
+        if marker is not None and is_metadata(marker, payload):
+            continue
+        kept.append((marker, payload))
+    if orientation != 1:
+        at = 1 if kept and kept[0][0] == 0xE0 else 0
+        kept.insert(at, (APP1, orientation_exif(orientation)))
+    return kept
+
+
+# --- Huffman coding --------------------------------------------------------
+
+def parse_huffman_tables(payload, tables):
+    """Add the tables of a DHT payload to tables as {(class, id): (counts, symbols)}"""
+    i = 0
+    while i < len(payload):
+        kind = payload[i]
+        counts = list(payload[i + 1:i + 17])
+        symbols = payload[i + 17:i + 17 + sum(counts)]
+        tables[(kind >> 4, kind & 15)] = (counts, symbols)
+        i += 17 + sum(counts)
+
+
+def canonical_codes(counts, symbols):
+    """Return {symbol: code as a '0'/'1' string} for a table in DHT form"""
+    codes = {}
+    code = 0
+    k = 0
+    for length, count in enumerate(counts, 1):
+        for _ in range(count):
+            codes[symbols[k]] = format(code, f'0{length}b')
+            code += 1
+            k += 1
+        code <<= 1
+    return codes
+
+
+def decoding_table(counts, symbols):
+    """A 65536-entry lookup from the next 16 bits to symbol << 5 | code length"""
+    table = [0] * 65536
+    for symbol, code in canonical_codes(counts, symbols).items():
+        length = len(code)
+        start = int(code, 2) << (16 - length)
+        table[start:start + (1 << (16 - length))] = [symbol << 5 | length] * (1 << (16 - length))
+    return table
+
+
+def optimal_table(frequencies):
+    """
+    Build (counts, symbols) for a Huffman table with code lengths of at most
+    16 bits, following ITU T.81 Annex K.2
+    """
+    freq = [0] * 257
+    for symbol, count in frequencies.items():
+        freq[symbol] = count
+    freq[256] = 1               # reserved, so no real code is all ones
+    sizes = [0] * 257
+    others = [-1] * 257
+    while True:
+        live = [s for s in range(257) if freq[s]]
+        if len(live) < 2:
+            break
+        c1 = min(live, key=lambda s: (freq[s], -s))
+        c2 = min((s for s in live if s != c1), key=lambda s: (freq[s], -s))
+        freq[c1] += freq[c2]
+        freq[c2] = 0
+        for c in (c1, c2):
+            sizes[c] += 1
+            while others[c] >= 0:
+                c = others[c]
+                sizes[c] += 1
+        while others[c1] >= 0:
+            c1 = others[c1]
+        others[c1] = c2
+
+    bits = [0] * 33
+    for size in sizes:
+        if size:
+            bits[size] += 1
+    for i in range(32, 16, -1):
+        while bits[i] > 0:
+            j = i - 2
+            while bits[j] == 0:
+                j -= 1
+            bits[i] -= 2
+            bits[i - 1] += 1
+            bits[j + 1] += 2
+            bits[j] -= 1
+    i = 16
+    while bits[i] == 0:
+        i -= 1
+    bits[i] -= 1                # drop the reserved symbol
+
+    symbols = [s for size in range(1, 33) for s in range(256) if sizes[s] == size]
+    return bits[1:17], symbols
+
+
+def huffman_segment(tables):
+    """DHT payload for [(class, id, counts, symbols), ...]"""
+    payload = b''
+    for table_class, table_id, counts, symbols in tables:
+        payload += bytes([table_class << 4 | table_id]) + bytes(counts) + bytes(symbols)
+    return payload
+
+
+def to_bits(data):
+    """Unstuffed entropy-coded bytes as a '0'/'1' string"""
+    data = data.replace(b'\xff\x00', b'\xff')
+    return bin(int.from_bytes(data, 'big'))[2:].zfill(len(data) * 8) if data else ''
+
+
+def from_bits(bits):
+    """Pad a bit string with ones to a whole byte and stuff it"""
+    bits += '1' * (-len(bits) % 8)
+    if not bits:
+        return b''
+    return int(bits, 2).to_bytes(len(bits) // 8, 'big').replace(b'\xff', b'\xff\x00')
+
+
+def value_bits(value):
+    """(size category, extra bits) for a DC difference or coefficient"""
+    if not value:
+        return 0, ''
+    size = abs(value).bit_length()
+    return size, format(value if value > 0 else value + (1 << size) - 1, f'0{size}b')
+
+
+# --- Transcoding -----------------------------------------------------------
+
+def _ceil_div(a, b):
+    return -(-a // b)
+
+
+class Frame:
+    """Components and block grids of a baseline frame"""
+
+    def __init__(self, payload):
+        if payload[0] != 8:
+            raise ValueError("only 8-bit JPEGs are supported")
+        self.height = int.from_bytes(payload[1:3], 'big')
+        self.width = int.from_bytes(payload[3:5], 'big')
+        if not self.height or not self.width:
+            raise ValueError("missing image size")
+        self.ids = [payload[6 + 3 * i] for i in range(payload[5])]
+        sampling = [payload[7 + 3 * i] for i in range(payload[5])]
+        if len(self.ids) == 1:
+            sampling = [0x11]   # a single component is always coded one block at a time
+        self.h = [s >> 4 for s in sampling]
+        self.v = [s & 15 for s in sampling]
+        hmax, vmax = max(self.h), max(self.v)
+        self.mcu_cols = _ceil_div(self.width, 8 * hmax)
+        self.mcu_rows = _ceil_div(self.height, 8 * vmax)
+        # Blocks per row in each component's grid, MCU padding included
+        self.grid_width = [self.mcu_cols * h for h in self.h]
+        # Blocks that cover the image, coded by non-interleaved scans
+        self.blocks_wide = [_ceil_div(_ceil_div(self.width * h, hmax), 8) for h in self.h]
+        self.blocks_high = [_ceil_div(_ceil_div(self.height * v, vmax), 8) for v in self.v]
+
+
+def decode_baseline(frame, scan, entropy, tables, restart_interval):
+    """
+    Decode a baseline scan covering every component into per-component
+    lists of DC values and of [(position, size, extra bits), ...] AC terms
+    """
+    order = [frame.ids.index(scan[1 + 2 * i]) for i in range(scan[0])]
+    selectors = [scan[2 + 2 * i] for i in range(scan[0])]
+    if sorted(order) != list(range(len(frame.ids))):
+        raise ValueError("multi-scan baseline JPEGs are not supported")
+    dc_tables = [decoding_table(*tables[(0, s >> 4)]) for s in selectors]
+    ac_tables = [decoding_table(*tables[(1, s & 15)]) for s in selectors]
+    size = [frame.grid_width[c] * frame.mcu_rows * frame.v[c] for c in range(len(frame.ids))]
+    dc = [[0] * n for n in size]
+    ac = [[None] * n for n in size]
+
+    mcus = frame.mcu_cols * frame.mcu_rows
+    intervals = RESTART.split(entropy)
+    if restart_interval and len(intervals) < -(-mcus // restart_interval):
+        raise ValueError("missing restart markers")
+
+    mcu = 0
+    pos = 0
+    for part in intervals:
+        bits = to_bits(part) + '1' * 32
+        pos = 0
+        predictions = [0] * len(order)
+        end = min(mcus, mcu + restart_interval) if restart_interval else mcus
+        while mcu < end:
+            row, col = divmod(mcu, frame.mcu_cols)
+            for n, c in enumerate(order):
+                dc_table, ac_table = dc_tables[n], ac_tables[n]
+                for by in range(frame.v[c]):
+                    base = (row * frame.v[c] + by) * frame.grid_width[c] + col * frame.h[c]
+                    for bx in range(frame.h[c]):
+                        entry = dc_table[int(bits[pos:pos + 16], 2)]
+                        if not entry:
+                            raise ValueError("invalid Huffman code")
+                        pos += entry & 31
+                        s = entry >> 5
+                        if s:
+                            extra = bits[pos:pos + s]
+                            pos += s
+                            diff = int(extra, 2)
+                            if extra[0] == '0':
+                                diff -= (1 << s) - 1
+                            predictions[n] += diff
+                        dc[c][base + bx] = predictions[n]
+
+                        terms = []
+                        k = 1
+                        while k < 64:
+                            entry = ac_table[int(bits[pos:pos + 16], 2)]
+                            if not entry:
+                                raise ValueError("invalid Huffman code")
+                            pos += entry & 31
+                            rs = entry >> 5
+                            s = rs & 15
+                            if not s:
+                                if rs != 0xF0:
+                                    break
+                                k += 16
+                                continue
+                            k += rs >> 4
+                            terms.append((k, s, bits[pos:pos + s]))
+                            pos += s
+                            k += 1
+                        if k > 64:
+                            raise ValueError("corrupt coefficient data")
+                        ac[c][base + bx] = terms
+            mcu += 1
+        if pos > len(bits) - 32:
+            raise ValueError("truncated scan data")
+        if mcu == mcus:
+            break
+    if mcu < mcus:
+        raise ValueError("truncated scan data")
+    return order, dc, ac
+
+
+def progressive_script(components):
+    """(component, first, last) bands after the DC scan, luma detail last"""
+    if components == 1:
+        return [(0, 1, 5), (0, 6, 63)]
+    return [(0, 1, 5)] + [(c, 1, 63) for c in range(1, components)] + [(0, 6, 63)]
+
+
+def dc_scan_tokens(frame, order, dc):
+    tokens = []
+    predictions = [0] * len(order)
+    for row in range(frame.mcu_rows):
+        for col in range(frame.mcu_cols):
+            for n, c in enumerate(order):
+                table = 0 if c == 0 else 1
+                for by in range(frame.v[c]):
+                    base = (row * frame.v[c] + by) * frame.grid_width[c] + col * frame.h[c]
+                    for bx in range(frame.h[c]):
+                        value = dc[c][base + bx]
+                        size, extra = value_bits(value - predictions[n])
+                        predictions[n] = value
+                        tokens.append((table, size, extra))
+    return tokens
+
+
+def ac_scan_tokens(frame, blocks, component, first, last):
+    tokens = []
+    eob_run = 0
+
+    def flush():
+        n = eob_run.bit_length() - 1
+        tokens.append((0, n << 4, format(eob_run, 'b')[1:]))
+
+    width = frame.grid_width[component]
+    for row in range(frame.blocks_high[component]):
+        for col in range(frame.blocks_wide[component]):
+            previous = first - 1
+            for k, size, extra in blocks[row * width + col]:
+                if k < first or k > last:
+                    continue
+                if eob_run:
+                    flush()
+                    eob_run = 0
+                run = k - previous - 1
+                while run > 15:
+                    tokens.append((0, 0xF0, ''))
+                    run -= 16
+                tokens.append((0, run << 4 | size, extra))
+                previous = k
+            if previous < last:
+                eob_run += 1
+                if eob_run == MAX_EOB_RUN:
+                    flush()
+                    eob_run = 0
+    if eob_run:
+        flush()
+    return tokens
+
+
+def encode_scan(tokens, table_class):
+    """Return (DHT payload, entropy-coded bytes) with tables optimal for tokens"""
+    frequencies = {}
+    for table, symbol, _ in tokens:
+        counts = frequencies.setdefault(table, {})
+        counts[symbol] = counts.get(symbol, 0) + 1
+    tables = []
+    codes = {}
+    for table in sorted(frequencies):
+        counts, symbols = optimal_table(frequencies[table])
+        tables.append((table_class, table, counts, symbols))
+        codes[table] = canonical_codes(counts, symbols)
+    bits = ''.join([codes[table][symbol] + extra for table, symbol, extra in tokens])
+    return huffman_segment(tables), from_bits(bits)
+
+
+def to_progressive(segments):
+    """Re-code the single scan of a baseline JPEG as optimized progressive scans"""
+    tables = {}
+    restart_interval = 0
+    header = []
+    frame = scan = entropy = None
+    for marker, payload in segments:
+        if marker == DHT:
+            parse_huffman_tables(payload, tables)
+        elif marker == DRI:
+            restart_interval = int.from_bytes(payload[:2], 'big')
+        elif marker == SOS:
+            if scan is not None:
+                raise ValueError("multi-scan baseline JPEGs are not supported")
+            scan = payload
+        elif marker is None:
+            entropy = payload
+        elif scan is not None:
+            raise ValueError("segments after the scan")
+        else:
+            if marker in SEQUENTIAL_HUFFMAN:
+                frame = Frame(payload)
+                marker = PROGRESSIVE_HUFFMAN
+            header.append((marker, payload))
+    if frame is None or scan is None:
+        raise ValueError("no baseline frame")
+
+    order, dc, ac = decode_baseline(frame, scan, entropy, tables, restart_interval)
+    out = [SOI] + [write_segment(marker, payload) for marker, payload in header]
+
+    dht, data = encode_scan(dc_scan_tokens(frame, order, dc), table_class=0)
+    selectors = b''.join(bytes((frame.ids[c], (0 if c == 0 else 1) << 4)) for c in order)
+    out += [write_segment(DHT, dht),
+            write_segment(SOS, bytes([len(order)]) + selectors + b'\x00\x00\x00'), data]
+    for component, first, last in progressive_script(len(frame.ids)):
+        tokens = ac_scan_tokens(frame, ac[component], component, first, last)
+        dht, data = encode_scan(tokens, table_class=1)
+        out += [write_segment(DHT, dht),
+                write_segment(SOS, bytes((1, frame.ids[component], 0, first, last, 0))), data]
+    out.append(EOI)
+    return b''.join(out)
+
+
+def optimize_jpeg(data, orientation=1, progressive=True):
+    """
+    Return the JPEG in data without metadata and, for baseline images,
+    re-coded as an optimized progressive JPEG. orientation is the image's
+    EXIF orientation, kept when it is not 1 (upright).
+    """
+    segments = strip_metadata(list(read_segments(data)), orientation)
+    frames = [marker for marker, _ in segments if marker in FRAME_MARKERS]
+    if progressive and len(frames) == 1 and frames[0] in SEQUENTIAL_HUFFMAN:
+        try:
+            return to_progressive(segments)
+        except (ValueError, KeyError, IndexError):
+            pass                # unusual layout: fall back to stripping only
+    return SOI + b''.join(write_segment(marker, payload) for marker, payload in segments) + EOI
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Losslessly strip and re-code a JPEG as progressive")
+    parser.add_argument('input')
+    parser.add_argument('output')
+    parser.add_argument('--keep-baseline', action='store_true', help="only strip metadata")
+    args = parser.parse_args()
+    with open(args.input, 'rb') as f:
+        original = f.read()
+    optimized = optimize_jpeg(original, progressive=not args.keep_baseline)
+    with open(args.output, 'wb') as f:
+        f.write(optimized)
+    print(f"✅ {len(original) / 1024:.1f} KB -> {len(optimized) / 1024:.1f} KB")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Keyword Classifier
+Finds location, category and activity keywords in image filenames.
+
+All keywords from data/keywords.json are compiled once into an Aho-Corasick
+automaton, so classifying a name is a single pass over its characters no
+matter how many keywords the tables hold.
+"""
+
+import json
+from collections import deque
+from pathlib import Path
+
+KEYWORDS_FILE = Path('data/keywords.json')
+
+# Tables in the keywords file that are not keyword -> value maps
+NON_KEYWORD_TABLES = {'coordinates'}
+
+
+class KeywordClassifier:
+    """Multi-table substring matcher built on an Aho-Corasick automaton"""
+
+    def __init__(self, tables):
+        """tables maps a table name to an ordered {keyword: value} dict"""
+        self.tables = {name: dict(mapping) for name, mapping in tables.items()}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for table, mapping in self.tables.items():
+            for priority, (keyword, value) in enumerate(mapping.items()):
+                self._insert(keyword.lower(), (table, priority, keyword, value))
+        self._link()
+
+    @classmethod
+    def from_file(cls, path=KEYWORDS_FILE):
+        """Build a classifier from a JSON file of keyword tables"""
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+        return cls({name: table for name, table in data.items() if name not in NON_KEYWORD_TABLES})
+
+    def _insert(self, keyword, match):
+        node = 0
+        for char in keyword:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][char] = child
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = child
+        self._out[node].append(match)
+
+    def _link(self):
+        """Compute failure links breadth-first and merge their outputs"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def matches(self, text):
+        """Yield (table, priority, keyword, value) for every keyword found in text"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for char in text.lower():
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                yield from out[node]
+
+    def classify(self, text):
+        """
+        Return {table: [(keyword, value), ...]} with every match in each table,
+        ordered by the keyword's position in its table
+        """
+        found = {name: {} for name in self.tables}
+        for table, priority, keyword, value in self.matches(text):
+            found[table][priority] = (keyword, value)
+        return {table: [hits[p] for p in sorted(hits)] for table, hits in found.items()}
+
+    def classify_many(self, names):
+        """Classify a batch of names, returning results in the same order"""
+        return [self.classify(name) for name in names]
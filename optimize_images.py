@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Image Optimizer
+Losslessly recompresses the published images (tours, destinations, gallery
+and logo) and checks each category against a byte budget:
+
+  - JPEGs lose their metadata (the ICC profile and a rotated image's EXIF
+    orientation are kept) and are re-coded as progressive JPEGs with
+    optimized Huffman tables: by jpegtran when it is installed, otherwise
+    by jpeg_lossless.py
+  - PNGs are re-packed by oxipng or optipng when installed, otherwise by
+    Pillow (pip install Pillow)
+  - a result is only kept when it is smaller and, with Pillow installed,
+    decodes to exactly the same pixels
+
+Images are recompressed on a process pool. Results are cached by content
+hash in .cache/optimize-results.json, with the optimized files kept in the
+image store (see image_store.py), so no image is recompressed twice and
+copies of an image end up linked to the same optimized blob. The originals
+at the top of assets/images/ are the organizer's input: they are left alone
+and build_site.py does not ship them.
+
+Each category has a byte budget (CATEGORY_BUDGETS) and every image a size
+limit (MAX_IMAGE_BYTES); the report lists the bytes saved and the files
+that break them, and the exit status is 1 when any budget is exceeded.
+
+Run: python3 optimize_images.py [--workers N] [--budget gallery=3MB] [--max-image-size 500KB] [--dry-run]
+"""
+
+import argparse
+import io
+import json
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from catalog_store import atomic_write_text
+from image_metadata import read_metadata
+from image_scanner import scan_images
+from image_store import LINK_METHODS, STORE_DIR, ImageStore
+from jpeg_lossless import optimize_jpeg
+from scan_manifest import ScanManifest, hash_file
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+OPTIMIZE_MANIFEST = Path('.cache/optimize-manifest.json')
+OPTIMIZE_RESULTS = Path('.cache/optimize-results.json')
+WORK_DIR = Path('.cache/optimize-tmp')
+
+CATEGORY_FOLDERS = {
+    'tours': 'assets/images/tours',
+    'destinations': 'assets/images/destinations',
+    'gallery': 'assets/images/gallery',
+    'logo': 'assets/images/logo',
+}
+
+# Total bytes each category may ship, after optimization
+CATEGORY_BUDGETS = {
+    'tours': 1536 * 1024,
+    'destinations': 1536 * 1024,
+    'gallery': 3 * 1024 * 1024,
+    'logo': 100 * 1024,
+}
+
+# No single image should be larger than this
+MAX_IMAGE_BYTES = 500 * 1024
+
+JPEG_SUFFIXES = ('.jpg', '.jpeg')
+PNG_SUFFIXES = ('.png',)
+SIZE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*([KM]?)B?$', re.IGNORECASE)
+
+
+def parse_size(text):
+    """Parse '500KB', '1.5MB' or a plain byte count"""
+    match = SIZE_PATTERN.match(text.strip())
+    if not match:
+        raise ValueError(f"Not a size: {text}")
+    number, unit = match.groups()
+    return int(float(number) * {'': 1, 'K': 1024, 'M': 1024 * 1024}[unit.upper()])
+
+
+def find_tools():
+    """External optimizers on PATH: {'jpegtran': path, 'oxipng': path, 'optipng': path}"""
+    return {name: shutil.which(name) for name in ('jpegtran', 'oxipng', 'optipng') if shutil.which(name)}
+
+
+def same_pixels(original, optimized):
+    """Whether two encoded images decode identically (True without Pillow)"""
+    if Image is None:
+        return True
+    with Image.open(io.BytesIO(original)) as a, Image.open(io.BytesIO(optimized)) as b:
+        return a.mode == b.mode and a.size == b.size and a.tobytes() == b.tobytes()
+
+
+def optimize_jpeg_file(source, tools):
+    """Return (optimized bytes, method) for a JPEG"""
+    try:
+        orientation = read_metadata(source).get('orientation', 1)
+    except (OSError, ValueError, struct.error):
+        orientation = 1
+    if 'jpegtran' in tools:
+        data = subprocess.run([tools['jpegtran'], '-copy', 'all', '-optimize', '-progressive', source],
+                              capture_output=True, check=True).stdout
+        # jpegtran's output is already progressive: this only strips metadata
+        return optimize_jpeg(data, orientation), 'jpegtran'
+    with open(source, 'rb') as f:
+        return optimize_jpeg(f.read(), orientation), 'jpeg_lossless'
+
+
+def optimize_png_file(source, tools, out):
+    """Return (optimized bytes or None, method) for a PNG"""
+    if 'oxipng' in tools or 'optipng' in tools:
+        if 'oxipng' in tools:
+            command, method = [tools['oxipng'], '-q', '-o', '4', '--strip', 'safe', '--out', out, source], 'oxipng'
+        else:
+            command, method = [tools['optipng'], '-quiet', '-o2', '-strip', 'all', '-out', out, source], 'optipng'
+        subprocess.run(command, capture_output=True, check=True)
+        with open(out, 'rb') as f:
+            return f.read(), method
+    if Image is None:
+        return None, 'none (install oxipng or Pillow)'
+    with open(source, 'rb') as f:
+        bit_depth = f.read(25)[-1]      # from the IHDR chunk
+    with Image.open(source) as img:
+        # Pillow reads 16-bit PNGs as 8-bit and only re-saves the first frame
+        if bit_depth == 16 or getattr(img, 'is_animated', False):
+            return None, 'pillow'
+        options = {'optimize': True}
+        for key in ('icc_profile', 'transparency'):
+            if key in img.info:
+                options[key] = img.info[key]
+        buffer = io.BytesIO()
+        img.save(buffer, format='PNG', **options)
+    return buffer.getvalue(), 'pillow'
+
+
+def optimize_file(source, digest, tools):
+    """
+    Worker: write a losslessly smaller version of source to WORK_DIR.
+    Returns (path or None when nothing was gained, method).
+    """
+    suffix = Path(source).suffix.lower()
+    out = WORK_DIR / f"{digest}{suffix}"
+    tmp = out.with_name(f".{out.name}.tmp")
+    with open(source, 'rb') as f:
+        original = f.read()
+    if suffix in JPEG_SUFFIXES:
+        optimized, method = optimize_jpeg_file(source, tools)
+    elif suffix in PNG_SUFFIXES:
+        optimized, method = optimize_png_file(source, tools, tmp)
+    else:
+        return None, 'unsupported'
+    if optimized is None or len(optimized) >= len(original):
+        return None, method
+    if not same_pixels(original, optimized):
+        return None, f"{method} (pixels differ, kept original)"
+    tmp.write_bytes(optimized)
+    os.replace(tmp, out)
+    return str(out), method
+
+
+def load_results(path=OPTIMIZE_RESULTS):
+    """{original hash: optimized hash}; optimized images map to themselves"""
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_results(results, path=OPTIMIZE_RESULTS):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(path, json.dumps(results, indent=1, sort_keys=True) + '\n')
+
+
+class BudgetReport:
+    """Bytes before and after per category, and the files that break the budgets"""
+
+    def __init__(self, budgets, max_image_bytes):
+        self.budgets = budgets
+        self.max_image_bytes = max_image_bytes
+        self.files = {category: [] for category in CATEGORY_FOLDERS}
+
+    def record(self, category, path, before, after):
+        self.files[category].append((path, before, after))
+
+    def over_budget(self, category):
+        budget = self.budgets.get(category)
+        total = sum(after for _, _, after in self.files[category])
+        return total - budget if budget is not None and total > budget else 0
+
+    def oversized(self):
+        return [(path, after) for files in self.files.values() for path, _, after in files
+                if after > self.max_image_bytes]
+
+    @property
+    def passed(self):
+        return not any(self.over_budget(category) for category in self.files) and not self.oversized()
+
+    def print_summary(self):
+        print("\n📊 Image budget report:")
+        print(f"   {'category':<14}{'files':>6}{'before':>12}{'after':>12}{'saved':>11}{'budget':>12}")
+        totals = [0, 0]
+        for category, files in self.files.items():
+            before = sum(item[1] for item in files)
+            after = sum(item[2] for item in files)
+            totals[0] += before
+            totals[1] += after
+            budget = self.budgets.get(category)
+            excess = self.over_budget(category)
+            status = f"❌ {excess / 1024:.0f} KB over" if excess else '✅'
+            print(f"   {category:<14}{len(files):>6}{before / 1024:>9.0f} KB{after / 1024:>9.0f} KB"
+                  f"{(before - after) / 1024:>8.0f} KB"
+                  f"{(f'{budget / 1024:.0f} KB' if budget is not None else '-'):>12}  {status}")
+        print(f"   Saved: {(totals[0] - totals[1]) / 1024:.0f} KB of {totals[0] / 1024:.0f} KB")
+
+        for category in self.files:
+            excess = self.over_budget(category)
+            if not excess:
+                continue
+            # The largest files, until dropping them would fit the budget
+            largest = sorted(self.files[category], key=lambda item: -item[2])
+            offenders = []
+            for path, _, after in largest:
+                offenders.append((path, after))
+                excess -= after
+                if excess <= 0:
+                    break
+            print(f"\n❌ {category} is over its {self.budgets[category] / 1024:.0f} KB budget; largest files:")
+            for path, size in offenders:
+                print(f"   {path} ({size / 1024:.0f} KB)")
+
+        oversized = self.oversized()
+        if oversized:
+            print(f"\n⚠️  Over the {self.max_image_bytes / 1024:.0f} KB per-image limit "
+                  "(resize or re-export these):")
+            for path, size in sorted(oversized, key=lambda item: -item[1]):
+                print(f"   {path} ({size / 1024:.0f} KB)")
+
+
+def optimize_images(budgets=CATEGORY_BUDGETS, max_image_bytes=MAX_IMAGE_BYTES, workers=None,
+                    dry_run=False, link='auto'):
+    """Optimize every published image and report on the budgets; returns whether they are met"""
+    tools = find_tools()
+    print(f"🛠️  JPEG: {'jpegtran' if 'jpegtran' in tools else 'jpeg_lossless.py'}; "
+          f"PNG: {next((t for t in ('oxipng', 'optipng') if t in tools), 'Pillow' if Image else 'none')}")
+    if 'jpegtran' not in tools:
+        print("💡 Install jpegtran (libjpeg-turbo) for faster JPEG recompression")
+
+    manifest = ScanManifest.load(OPTIMIZE_MANIFEST)
+    results = load_results()
+    store = ImageStore(STORE_DIR, link=link)
+
+    images = []                 # (category, path, digest, size before)
+    for category, folder in CATEGORY_FOLDERS.items():
+        for record in scan_images(folder):
+            manifest.check(record.path, record.stat)
+            images.append((category, record.path, manifest.hash_of(record.path), record.size))
+    manifest.prune(CATEGORY_FOLDERS.values())
+
+    def cached(digest, suffix):
+        target = results.get(digest)
+        return target == digest or (target and store.blob_path(target, suffix).exists())
+
+    pending = {}
+    for _, path, digest, _ in images:
+        if digest not in pending and not cached(digest, Path(path).suffix):
+            pending[digest] = path
+    print(f"📸 {len(images)} images, {len(pending)} to recompress")
+
+    if pending:
+        WORK_DIR.mkdir(parents=True, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {digest: pool.submit(optimize_file, path, digest, tools) for digest, path in pending.items()}
+            for digest, future in futures.items():
+                try:
+                    out, method = future.result()
+                except (OSError, ValueError, subprocess.CalledProcessError) as e:
+                    print(f"⚠️  Skipped {pending[digest]}: {e}")
+                    continue
+                if out is None:
+                    results[digest] = digest
+                    continue
+                optimized, _ = store.add(out, hash_file(out))
+                os.unlink(out)
+                results[digest] = optimized
+                results[optimized] = optimized
+                before = os.path.getsize(pending[digest])
+                after = os.path.getsize(store.blob_path(optimized, Path(out).suffix))
+                print(f"   {pending[digest]}: {before / 1024:.0f} KB -> {after / 1024:.0f} KB ({method})")
+        save_results(results)
+
+    report = BudgetReport(budgets, max_image_bytes)
+    replaced = 0
+    for category, path, digest, before in images:
+        target = results.get(digest, digest)
+        after = before
+        if target != digest:
+            blob = store.blob_path(target, Path(path).suffix)
+            after = os.path.getsize(blob)
+            if not dry_run:
+                store.place(blob, path, target)
+                manifest.check(path)
+                replaced += 1
+        report.record(category, path, before, after)
+    manifest.save()
+
+    if dry_run:
+        print("🔎 Dry run: no images were replaced")
+    elif replaced:
+        print(f"✅ Replaced {replaced} images with their optimized versions")
+    report.print_summary()
+    return report.passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Losslessly recompress images and check byte budgets")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    parser.add_argument('--budget', action='append', default=[], metavar='CATEGORY=SIZE',
+                        help="override a category's budget, e.g. gallery=4MB (repeatable)")
+    parser.add_argument('--max-image-size', default=None, metavar='SIZE',
+                        help=f"per-image limit (default: {MAX_IMAGE_BYTES // 1024}KB)")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="recompress into the cache and report, but leave the images in place")
+    parser.add_argument('--link', default='auto', choices=('auto',) + LINK_METHODS,
+                        help="how images are linked to their optimized blob (default: first method that works)")
+    args = parser.parse_args()
+
+    budgets = dict(CATEGORY_BUDGETS)
+    try:
+        for item in args.budget:
+            category, _, size = item.partition('=')
+            if category not in CATEGORY_FOLDERS:
+                parser.error(f"unknown category {category!r} (choose from {', '.join(CATEGORY_FOLDERS)})")
+            budgets[category] = parse_size(size)
+        max_image_bytes = parse_size(args.max_image_size) if args.max_image_size else MAX_IMAGE_BYTES
+    except ValueError as e:
+        parser.error(str(e))
+
+    passed = optimize_images(budgets, max_image_bytes, args.workers, args.dry_run, args.link)
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == '__main__':
+    main()
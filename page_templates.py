@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Page Templates (Python)
+Build-time twin of assets/js/page-templates.js, used by build_site.py to
+pre-render cards into the HTML pages. The markup must match what the browser
+renders (whitespace aside), so keep the two files in sync.
+"""
+
+from datetime import date
+from urllib.parse import quote
+
+# Instagram items have ids from 100 up (see SharedUtils.sortByInstagram)
+INSTAGRAM_ID_START = 100
+
+
+def encode_uri_component(text):
+    """Python equivalent of JavaScript's encodeURIComponent"""
+    return quote(str(text), safe="-_.!~*'()")
+
+
+def format_price(price):
+    """Match DataLoader.formatPrice (USD, no decimals)"""
+    return f"${price:,.0f}"
+
+
+def format_date(date_string):
+    """Match DataLoader.formatDate (e.g. January 15, 2024)"""
+    d = date.fromisoformat(date_string[:10])
+    return f"{d:%B} {d.day}, {d.year}"
+
+
+def star_rating(rating):
+    return '★' * rating + '☆' * (5 - rating)
+
+
+def sort_by_instagram(items):
+    """Match SharedUtils.sortByInstagram"""
+    return sorted(items, key=lambda item: (item.get('id', 0) < INSTAGRAM_ID_START, item.get('id', 0)))
+
+
+def get_prioritized_items(items, count=3):
+    """Match SharedUtils.getPrioritizedItems"""
+    instagram_items = [item for item in items if item.get('id', 0) >= INSTAGRAM_ID_START]
+    return instagram_items[:count] if instagram_items else items[:count]
+
+
+def create_image_placeholder(width, height, text):
+    """Match SharedUtils.createImagePlaceholder"""
+    encoded_text = encode_uri_component(text or 'Image')
+    font_size = '20' if width >= 400 else '18'
+
+    if width == height or abs(width - height) < 50:
+        return (f"data:image/svg+xml,%3Csvg xmlns=\\'http://www.w3.org/2000/svg\\' width=\\'{width}\\' height=\\'{height}\\' viewBox=\\'0 0 {width} {height}\\' preserveAspectRatio=\\'none\\'%3E"
+                f"%3Cdefs%3E%3ClinearGradient id=\\'grad\\' x1=\\'0%25\\' y1=\\'0%25\\' x2=\\'100%25\\' y2=\\'100%25\\'%3E%3Cstop offset=\\'0%25\\' style=\\'stop-color:%232563eb;stop-opacity:1\\' /%3E%3Cstop offset=\\'100%25\\' style=\\'stop-color:%23f59e0b;stop-opacity:1\\' /%3E%3C/linearGradient%3E%3C/defs%3E"
+                f"%3Crect width=\\'{width}\\' height=\\'{height}\\' fill=\\'url(%23grad)\\'/%3E%3Ctext fill=\\'white\\' font-family=\\'Arial\\' font-size=\\'{font_size}\\' x=\\'50%25\\' y=\\'50%25\\' text-anchor=\\'middle\\' dominant-baseline=\\'middle\\'%3E{encoded_text}%3C/text%3E%3C/svg%3E")
+    return (f"data:image/svg+xml,%3Csvg xmlns=\\'http://www.w3.org/2000/svg\\' width=\\'{width}\\' height=\\'{height}\\' viewBox=\\'0 0 {width} {height}\\' preserveAspectRatio=\\'none\\'%3E"
+            f"%3Crect width=\\'{width}\\' height=\\'{height}\\' fill=\\'%232563eb\\'/%3E%3Ctext fill=\\'white\\' font-family=\\'Arial\\' font-size=\\'{font_size}\\' x=\\'50%25\\' y=\\'50%25\\' text-anchor=\\'middle\\' dominant-baseline=\\'middle\\'%3E{encoded_text}%3C/text%3E%3C/svg%3E")
+
+
+def image_placeholder(entry, width, height, text):
+    """Match SharedUtils.imagePlaceholder"""
+    if entry.get('placeholder'):
+        return entry['placeholder']['preview']
+    return create_image_placeholder(width, height, text)
+
+
+def render_image(entry, src, alt, attrs='', placeholder='', sizes=None, lazy=False):
+    """Match PageTemplates.renderImage"""
+    if entry.get('placeholder'):
+        preview = (f"background: {entry['placeholder']['color']} "
+                   f"url('{entry['placeholder']['preview']}') center / cover no-repeat;")
+        attrs = (attrs.replace('style="', f'style="{preview} ', 1) if 'style="' in attrs
+                 else f'{attrs}{" " if attrs else ""}style="{preview}"')
+    extra = (f" {attrs}" if attrs else '') + \
+        (f' width="{entry["width"]}" height="{entry["height"]}"' if entry.get('width') and entry.get('height') else '') + \
+        (f" onerror=\"SharedUtils.handleImageError(this, '{placeholder}')\"" if placeholder else '')
+    deferred = lazy and placeholder
+    # The placeholder is escaped for the onerror string; unescape it for src
+    unescaped = placeholder.replace("\\'", "'")
+    source = f'src="{unescaped}" data-src="{src}"' if deferred else f'src="{src}"'
+    srcset_attr = 'data-srcset' if deferred else 'srcset'
+    srcset = entry.get('srcset')
+    if not srcset:
+        return f'<img {source} alt="{alt}"{extra}>'
+
+    image_sizes = sizes or entry.get('sizes') or '100vw'
+    sources = ''.join(f'<source type="{mime}" {srcset_attr}="{value}" sizes="{image_sizes}">'
+                      for mime, value in srcset.items() if mime != 'image/jpeg')
+    img_srcset = (f' {srcset_attr}="{srcset["image/jpeg"]}" sizes="{image_sizes}"'
+                  if 'image/jpeg' in srcset else '')
+    return f'<picture>{sources}<img {source}{img_srcset} alt="{alt}"{extra}></picture>'
+
+
+def render_tour_card(tour, id=None, show_highlights=True, show_includes=False,
+                     show_book_button=False, show_meta=False, highlight_count=3):
+    """Match PageTemplates.renderTourCard"""
+    placeholder = image_placeholder(tour, 400, 200, tour['title'])
+    meta = f" • {tour.get('difficulty')} • {tour.get('category')}" if show_meta else ''
+    price = f'<div class="card-price">{format_price(tour["price"])}</div>' if tour.get('price') else ''
+    highlights = ''
+    if show_highlights and tour.get('highlights'):
+        items = ''.join(f'<li>{h}</li>' for h in tour['highlights'][:highlight_count])
+        highlights = f'<ul class="card-highlights">{items}</ul>'
+    includes = ''
+    if show_includes and tour.get('includes'):
+        items = ''.join(f'<li>{i}</li>' for i in tour['includes'])
+        includes = ('<div style="margin: 1rem 0; padding: 1rem; background-color: var(--bg-light); border-radius: 0.5rem;">'
+                    '<strong style="display: block; margin-bottom: 0.5rem; color: var(--text-dark);">Includes:</strong>'
+                    f'<ul class="card-highlights" style="margin: 0;">{items}</ul></div>')
+    details_style = ' style="margin-bottom: 0.5rem;"' if show_book_button else ''
+    book = (f'<a href="contact.html?tour={encode_uri_component(tour["title"])}" class="card-button" '
+            'style="background-color: var(--secondary-color);">Book Now</a>') if show_book_button else ''
+
+    return f'''
+      <div class="card" id="{id or f"tour-{tour['id']}"}">
+        {render_image(tour, tour['image'], tour['title'], 'class="card-image"', placeholder)}
+        <div class="card-content">
+          <h3 class="card-title">{tour['title']}</h3>
+          <p class="card-subtitle">{tour.get('subtitle')}{meta}</p>
+          {price}
+          <p class="card-description">{tour.get('description')}</p>
+          {highlights}
+          {includes}
+          <div class="card-actions">
+            <a href="tour-detail.html?id={tour['id']}" class="card-button"{details_style}>View Details</a>
+            {book}
+          </div>
+        </div>
+      </div>
+    '''
+
+
+def render_destination_card(dest, id=None, show_highlights=True, show_best_time=True,
+                            link=None, link_text=None):
+    """Match PageTemplates.renderDestinationCard"""
+    placeholder = image_placeholder(dest, 400, 200, dest['name'])
+    best_time = ''
+    if show_best_time:
+        best_time = ('<div style="margin: 1rem 0;"><strong style="color: var(--text-dark);">Best Time to Visit:</strong>'
+                     f'<p style="margin-top: 0.5rem; color: var(--text-light);">{dest.get("bestTime")}</p></div>')
+    highlights = ''
+    if show_highlights and dest.get('highlights'):
+        items = ''.join(f'<li>{h}</li>' for h in dest['highlights'])
+        highlights = ('<div style="margin: 1rem 0;"><strong style="color: var(--text-dark);">Highlights:</strong>'
+                      f'<ul class="card-highlights">{items}</ul></div>')
+
+    return f'''
+      <div class="card" id="{id or f"dest-{dest['id']}"}">
+        {render_image(dest, dest['image'], dest['name'], 'class="card-image"', placeholder)}
+        <div class="card-content">
+          <h3 class="card-title">{dest['name']}</h3>
+          <p class="card-subtitle">{dest.get('region')}</p>
+          <p class="card-description">{dest.get('description')}</p>
+          {best_time}
+          {highlights}
+          <div class="card-actions">
+            <a href="{link or 'tours.html'}" class="card-button">{link_text or 'Explore Tours'}</a>
+          </div>
+        </div>
+      </div>
+    '''
+
+
+def render_testimonial_card(test, show_date=False, show_tour=True):
+    """Match PageTemplates.renderTestimonialCard"""
+    placeholder = create_image_placeholder(60, 60, test['customerName'][:1])
+    tour = f'<div class="testimonial-tour">{test.get("tourName")}</div>' if show_tour else ''
+    when = (f'<div class="testimonial-tour" style="font-size: 0.75rem; margin-top: 0.25rem;">{format_date(test["date"])}</div>'
+            if show_date else '')
+
+    return f'''
+      <div class="testimonial-card">
+        <div class="testimonial-header">
+          <img src="{test.get('image')}" alt="{test['customerName']}" class="testimonial-image" onerror="this.src='{placeholder}'">
+          <div>
+            <div class="testimonial-rating">{star_rating(test['rating'])}</div>
+            <div class="testimonial-author">{test['customerName']}</div>
+            {tour}
+            {when}
+          </div>
+        </div>
+        <p class="testimonial-text">"{test.get('review')}"</p>
+      </div>
+    '''
+
+
+def render_gallery_item(img, lazy=False):
+    """Match PageTemplates.renderGalleryItem"""
+    placeholder = image_placeholder(img, 400, 400, img['title'])
+    attrs = 'decoding="async"' if lazy else 'loading="lazy" decoding="async"'
+
+    return f'''
+      <div class="gallery-item">
+        {render_image(img, img['src'], img['title'], attrs, placeholder, lazy=lazy)}
+        <div class="gallery-overlay">
+          <p style="margin: 0; font-weight: 500;">{img['title']}</p>
+        </div>
+      </div>
+    '''
+
+
+def render_gallery_page(images, page, lazy=False):
+    """Match PageTemplates.renderGalleryPage"""
+    items = ''.join(render_gallery_item(img, lazy) for img in images)
+    return f'''
+      <div class="gallery-grid gallery-page" data-page="{page}">
+        {items}
+      </div>
+    '''
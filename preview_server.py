@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Preview Server
+Serves a built site (see build_site.py) the way a production host would,
+so caching and transfer sizes can be checked before deploying:
+
+  - precompressed .br/.gz siblings written by build_assets.py are sent when
+    the browser accepts them (Content-Encoding, Vary: Accept-Encoding)
+  - every response has a strong ETag (a content hash) and Last-Modified,
+    and conditional requests get 304 Not Modified
+  - fingerprinted files (name.<hash>.ext) are sent with a year-long,
+    immutable Cache-Control; pages and other files must revalidate
+  - single byte ranges (Range/If-Range) are answered with 206, for large
+    images and video
+  - one log line per request with status, encoding, bytes and latency, and
+    a summary (requests, bytes, latency percentiles) on Ctrl+C
+
+Built on asyncio with keep-alive connections and loop.sendfile(), so it
+keeps up when a load generator opens many connections at once.
+
+Run: python3 preview_server.py [--root _site] [--port 8000] [--quiet]
+"""
+
+import argparse
+import asyncio
+import email.utils
+import hashlib
+import mimetypes
+import re
+import statistics
+import time
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from build_assets import FINGERPRINTED, SITE_DIR
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+KEEP_ALIVE_SECONDS = 15
+MAX_HEADER_BYTES = 16384
+RANGE_PATTERN = re.compile(r'bytes=(\d*)-(\d*)$')
+
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/avif', '.avif')
+mimetypes.add_type('application/manifest+json', '.webmanifest')
+
+STATUS_TEXT = {200: 'OK', 206: 'Partial Content', 304: 'Not Modified', 400: 'Bad Request',
+               404: 'Not Found', 405: 'Method Not Allowed',
+               416: 'Range Not Satisfiable'}
+
+
+def content_type(path):
+    kind = mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+    if kind.startswith('text/') or kind in ('application/javascript', 'application/json', 'image/svg+xml'):
+        kind += '; charset=utf-8'
+    return kind
+
+
+def accepted_encodings(header):
+    """Content codings from Accept-Encoding with a non-zero q value"""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        match = re.search(r'q=([\d.]+)', params)
+        if coding and not (match and float(match.group(1)) == 0):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def parse_range(header, size):
+    """Return (start, end) inclusive for a single byte range, 'invalid', or None to send everything"""
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None             # multiple ranges or another unit: send the whole file
+    first, last = match.groups()
+    if not first:
+        if not last:
+            return None
+        length = int(last)
+        if not length:
+            return 'invalid'
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return 'invalid'
+    return start, end
+
+
+class PreviewServer:
+    """Static file server for a built site"""
+
+    def __init__(self, root=SITE_DIR, quiet=False):
+        self.root = Path(root).resolve()
+        self.quiet = quiet
+        self.etags = {}         # (path, size, mtime_ns) -> strong ETag
+        self.latencies = []
+        self.sent = 0
+        self.statuses = {}
+
+    def resolve(self, target):
+        """Map a request path to a file under root (None if there is none)"""
+        path = unquote(urlsplit(target).path)
+        try:
+            candidate = (self.root / path.lstrip('/')).resolve()
+            if candidate != self.root and self.root not in candidate.parents:
+                return None
+            if candidate.is_dir():
+                candidate = candidate / 'index.html'
+            return candidate if candidate.is_file() else None
+        except (OSError, ValueError):
+            return None
+
+    def etag(self, path, stat):
+        key = (str(path), stat.st_size, stat.st_mtime_ns)
+        if key not in self.etags:
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            self.etags[key] = f'"{digest.hexdigest()[:32]}"'
+        return self.etags[key]
+
+    def select_variant(self, path, headers):
+        """Pick the precompressed sibling the client accepts, if any"""
+        if 'range' in headers:
+            return path, None   # ranges are always over the identity encoding
+        accepted = accepted_encodings(headers.get('accept-encoding'))
+        for coding, suffix in ENCODINGS:
+            sibling = path.with_name(path.name + suffix)
+            if coding in accepted and sibling.is_file():
+                return sibling, coding
+        return path, None
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), KEEP_ALIVE_SECONDS)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                        ConnectionError):
+                    return
+                started = time.perf_counter()
+                keep_alive = await self.respond(head, reader, writer, started)
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, head, reader, writer, started):
+        """Answer one request; returns whether the connection stays open"""
+        try:
+            request_line, *header_lines = head.decode('latin-1').split('\r\n')
+            method, target, version = request_line.split(' ')
+            headers = {}
+            for line in header_lines:
+                if line:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+            body_length = int(headers.get('content-length') or 0)
+            if body_length < 0:
+                raise ValueError(f"Negative Content-Length: {body_length}")
+        except ValueError:
+            await self.send(writer, 400, {}, b'Bad request\n', 'GET', started, '-', None)
+            return False
+
+        keep_alive = (version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close') \
+            or headers.get('connection', '').lower() == 'keep-alive'
+        if body_length:
+            try:
+                await asyncio.wait_for(reader.readexactly(body_length), KEEP_ALIVE_SECONDS)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError):
+                return False
+
+        if method not in ('GET', 'HEAD'):
+            await self.send(writer, 405, {'Allow': 'GET, HEAD'}, b'Method not allowed\n', method, started,
+                            target, None, keep_alive)
+            return keep_alive
+        path = self.resolve(target)
+        if path is None:
+            await self.send(writer, 404, {}, b'Not found\n', method, started, target, None, keep_alive)
+            return keep_alive
+
+        file, coding = self.select_variant(path, headers)
+        stat = file.stat()
+        etag = self.etag(file, stat)
+        response = {
+            'Content-Type': content_type(path),
+            'ETag': etag,
+            'Last-Modified': email.utils.formatdate(stat.st_mtime, usegmt=True),
+            'Cache-Control': IMMUTABLE if FINGERPRINTED.search(path.name) else REVALIDATE,
+            'Accept-Ranges': 'bytes',
+            'Vary': 'Accept-Encoding',
+        }
+        if coding:
+            response['Content-Encoding'] = coding
+
+        if self.not_modified(headers, etag, stat):
+            await self.send(writer, 304, response, b'', method, started, target, coding, keep_alive)
+            return keep_alive
+
+        status, start, length = 200, 0, stat.st_size
+        if 'range' in headers and headers.get('if-range', etag) == etag:
+            byte_range = parse_range(headers['range'], stat.st_size)
+            if byte_range == 'invalid':
+                response = {'Content-Range': f"bytes */{stat.st_size}"}
+                await self.send(writer, 416, response, b'', method, started, target, coding, keep_alive)
+                return keep_alive
+            if byte_range:
+                status, start = 206, byte_range[0]
+                length = byte_range[1] - start + 1
+                response['Content-Range'] = f"bytes {start}-{byte_range[1]}/{stat.st_size}"
+
+        await self.send(writer, status, response, None, method, started, target, coding, keep_alive,
+                        file=(file, start, length))
+        return keep_alive
+
+    @staticmethod
+    def not_modified(headers, etag, stat):
+        if 'if-none-match' in headers:
+            tags = [tag.strip() for tag in headers['if-none-match'].split(',')]
+            return '*' in tags or etag in tags or f"W/{etag}" in tags
+        since = headers.get('if-modified-since')
+        if since:
+            try:
+                return int(stat.st_mtime) <= email.utils.parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    async def send(self, writer, status, headers, body, method, started, target, coding,
+                   keep_alive=False, file=None):
+        """Write the status line, headers and body (bytes, or a file slice)"""
+        length = len(body) if file is None else file[2]
+        lines = [f"HTTP/1.1 {status} {STATUS_TEXT[status]}",
+                 f"Date: {email.utils.formatdate(usegmt=True)}",
+                 'Server: preview_server.py',
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        if status != 304:
+            lines.append(f"Content-Length: {length}")
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+
+        sent = 0
+        if method != 'HEAD' and status != 304:
+            if file is None:
+                writer.write(body)
+                sent = len(body)
+            else:
+                path, offset, count = file
+                await writer.drain()
+                with open(path, 'rb') as f:
+                    await asyncio.get_running_loop().sendfile(writer.transport, f, offset, count)
+                sent = count
+        await writer.drain()
+        self.log(method, target, status, coding, sent, started)
+
+    def log(self, method, target, status, coding, sent, started):
+        elapsed = time.perf_counter() - started
+        self.latencies.append(elapsed)
+        self.sent += sent
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not self.quiet:
+            print(f"{method} {target} {status} {coding or '-'} {sent} B {elapsed * 1000:.1f} ms", flush=True)
+
+    def print_summary(self):
+        if not self.latencies:
+            return
+        latencies = sorted(self.latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        statuses = ', '.join(f"{count} × {status}" for status, count in sorted(self.statuses.items()))
+        print(f"\n📊 {len(latencies)} requests ({statuses}), {self.sent / 1024:.1f} KB sent")
+        print(f"   latency: median {statistics.median(latencies) * 1000:.1f} ms, "
+              f"p95 {p95 * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms")
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        print(f"🌐 Serving {self.root} at http://{host}:{port}/ (Ctrl+C to stop)")
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a built site with compression, ETags, caching and ranges")
+    parser.add_argument('--root', default=str(SITE_DIR) if SITE_DIR.is_dir() else '.',
+                        help="directory to serve (default: _site if built, else the project)")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--quiet', action='store_true', help="no per-request log lines")
+    args = parser.parse_args()
+
+    server = PreviewServer(args.root, quiet=args.quiet)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.print_summary()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Related Tours Index
+Precomputes the "Other Tours You Might Like" list for every tour, so
+tour-detail.html reads three ids instead of filtering the whole catalog.
+
+Tours are scored against each other on shared category, overlapping
+highlights, location and price band. Candidates are found through inverted
+indexes on those features, so only tours sharing something are compared.
+Features most tours share (a category, a price band, stock highlights)
+only contribute the MAX_POSTING tours with ids nearest the tour's own as
+candidates, which keeps large catalogs from turning into all-pairs
+comparisons while new tours still meet the rest of their category;
+candidates are still scored on every feature they share.
+
+Run: python3 related_tours.py
+"""
+
+import bisect
+import heapq
+from collections import defaultdict
+
+from keyword_classifier import KeywordClassifier
+
+RELATED_COUNT = 3
+PRICE_BAND = 250
+
+# Candidates taken from any one feature, the ids nearest the tour's own
+MAX_POSTING = 200
+
+WEIGHTS = {
+    'category': 3.0,
+    'location': 2.0,
+    'highlight': 1.0,
+    'price': 0.5,
+}
+
+
+def tour_features(tour, classifier):
+    """Return the (kind, value) features a tour can share with others"""
+    features = set()
+    if tour.get('category'):
+        features.add(('category', tour['category']))
+    for highlight in tour.get('highlights', []):
+        features.add(('highlight', highlight.strip().lower()))
+    if tour.get('price') is not None:
+        features.add(('price', int(tour['price'] // PRICE_BAND)))
+    # Tours have no location field; find place names in the text instead
+    text = ' '.join(str(tour.get(key, '')) for key in ('location', 'title', 'description'))
+    for _, location in classifier.classify(text)['locations']:
+        features.add(('location', location))
+    return features
+
+
+def nearest(ids, tour_id, limit=MAX_POSTING):
+    """The (at most) limit ids of a sorted posting closest to tour_id"""
+    if len(ids) <= limit:
+        return ids
+    start = bisect.bisect_left(ids, tour_id) - limit // 2
+    start = min(max(start, 0), len(ids) - limit)
+    return ids[start:start + limit]
+
+
+def related_index(tours, k=RELATED_COUNT, classifier=None):
+    """Return {tour id: [related tour ids]} with the top-k matches for each tour"""
+    classifier = classifier or KeywordClassifier.from_file()
+    features = {tour['id']: tour_features(tour, classifier) for tour in tours}
+    postings = defaultdict(list)
+    for tour_id, tour_features_ in features.items():
+        for feature in tour_features_:
+            postings[feature].append(tour_id)
+    for ids in postings.values():
+        ids.sort()
+
+    order = [tour['id'] for tour in tours]
+    # Padding never needs more than k tours besides the tour itself
+    head = order[:k + 1]
+    related = {}
+    for tour_id in order:
+        own = features[tour_id]
+        candidates = set()
+        for feature in own:
+            candidates.update(nearest(postings[feature], tour_id))
+        candidates.discard(tour_id)
+        scores = {other: sum(WEIGHTS[feature[0]] for feature in own & features[other]) for other in candidates}
+        # Highest score first, lower id breaks ties so the output is stable
+        best = heapq.nsmallest(k, scores, key=lambda other: (-scores[other], other))
+        # Pad with the first other tours, as the page did before
+        for other in head:
+            if len(best) >= k:
+                break
+            if other != tour_id and other not in best:
+                best.append(other)
+        related[str(tour_id)] = best
+    return {'k': k, 'related': related}
+
+
+if __name__ == '__main__':
+    from catalog_shards import write_shards
+    from catalog_store import CatalogStore
+
+    written, removed = write_shards(CatalogStore())
+    print(f"✅ Related tours index up to date ({written} shards written)")
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Scan Manifest
+Remembers which images have already been processed so the organizer scripts
+only have to look at new, changed or moved files on each run.
+
+Each entry is keyed by the image path and records its size, mtime and
+content hash. Unchanged files are recognised from size + mtime alone, so a
+re-run costs one stat per file and one hash per *changed* file.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+MANIFEST_FILE = Path('.cache/scan-manifest.json')
+MANIFEST_VERSION = 1
+
+# Scan results
+UNCHANGED = 'unchanged'
+CHANGED = 'changed'
+NEW = 'new'
+MOVED = 'moved'
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def to_key(path):
+    """Normalise a path into the manifest key format (forward slashes)"""
+    return str(path).replace('\\', '/')
+
+
+class ScanManifest:
+    """Persistent path -> (size, mtime, hash) record of scanned images"""
+
+    def __init__(self, path=MANIFEST_FILE):
+        self.path = Path(path)
+        self.entries = {}
+        self._by_hash = {}
+        self._seen = set()
+        self.dirty = False
+        # Work done by check() this run, for instrumentation
+        self.hashed_files = 0
+        self.hashed_bytes = 0
+
+    @classmethod
+    def load(cls, path=MANIFEST_FILE):
+        """Load a manifest from disk, starting empty if missing or unreadable"""
+        manifest = cls(path)
+        try:
+            data = json.loads(manifest.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return manifest
+        if data.get('version') != MANIFEST_VERSION:
+            return manifest
+        for key, entry in data.get('files', {}).items():
+            manifest._add(key, entry)
+        return manifest
+
+    def _add(self, key, entry):
+        self.entries[key] = entry
+        self._by_hash.setdefault(entry['sha256'], set()).add(key)
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry:
+            paths = self._by_hash.get(entry['sha256'])
+            if paths:
+                paths.discard(key)
+                if not paths:
+                    del self._by_hash[entry['sha256']]
+
+    def check(self, path, stat=None):
+        """
+        Classify a file against the manifest and record its current state.
+
+        Returns a (status, previous_path) tuple where status is one of
+        UNCHANGED, CHANGED, NEW or MOVED. previous_path is only set for MOVED
+        files and holds the path the same content was last seen at.
+        """
+        key = to_key(path)
+        self._seen.add(key)
+        stat = stat or os.stat(path)
+        entry = self.entries.get(key)
+
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return UNCHANGED, None
+
+        digest = hash_file(path)
+        self.hashed_files += 1
+        self.hashed_bytes += stat.st_size
+        record = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        self.dirty = True
+
+        if entry:
+            self._remove(key)
+            self._add(key, record)
+            return (UNCHANGED if entry['sha256'] == digest else CHANGED), None
+
+        # A new path whose content we have seen at a path that no longer
+        # exists is a rename/move rather than a new image.
+        for old_key in sorted(self._by_hash.get(digest, ())):
+            if old_key != key and not os.path.exists(old_key):
+                self._remove(old_key)
+                self._add(key, record)
+                return MOVED, old_key
+
+        self._add(key, record)
+        return NEW, None
+
+    def hash_of(self, path):
+        """Return the recorded content hash for a path, if any"""
+        entry = self.entries.get(to_key(path))
+        return entry['sha256'] if entry else None
+
+    def forget(self, path):
+        """Drop a file that no longer exists"""
+        if to_key(path) in self.entries:
+            self._remove(to_key(path))
+            self.dirty = True
+
+    def prune(self, folders):
+        """Forget files under the given folders that were not seen this run"""
+        prefixes = tuple(to_key(folder).rstrip('/') + '/' for folder in folders)
+        stale = [key for key in self.entries
+                 if key.startswith(prefixes) and key not in self._seen]
+        for key in stale:
+            self._remove(key)
+        if stale:
+            self.dirty = True
+        return stale
+
+    def save(self):
+        """Write the manifest atomically if anything changed"""
+        if not self.dirty:
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {'version': MANIFEST_VERSION, 'files': dict(sorted(self.entries.items()))}
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        tmp_path.write_text(json.dumps(payload, separators=(',', ':')), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+        return True
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Search Index
+Builds the inverted index behind DataLoader.search, so a query downloads a
+few small shards instead of tours.json and destinations.json:
+
+  data/search/index.json        document count, average length, BM25
+                                parameters, stop words and the shard list
+  data/search/<prefix>.json     {term: [[doc, tf, length], ...]} for every
+                                term starting with those two characters
+
+Documents are tours ("t<id>") and destinations ("d<id>"). Terms are
+lowercased, stripped of accents and plurals ("beaches" is "beach"), counted
+per field, weighted by FIELD_WEIGHTS (a title word counts three times), and
+stored raw: DataLoader turns them into BM25 scores at query time from the
+posting list length and index.json. Because no shard holds corpus-wide
+numbers, editing one tour only changes the shards of its terms and
+index.json, and write_shards rewrites just those.
+
+The word being typed also matches every term it prefixes ("beac" finds
+"beach" and "beachfront"), which is why shards are keyed by the
+first two characters of a term.
+
+Run: python3 search_index.py
+"""
+
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+SHARD_PREFIX = 2
+MIN_TERM_LENGTH = 2
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# document kind: (catalog, id prefix, {field: weight})
+FIELD_WEIGHTS = {
+    'tour': ('tours', 't', {'title': 3, 'subtitle': 1, 'category': 2, 'highlights': 2, 'description': 1}),
+    'destination': ('destinations', 'd', {'name': 3, 'region': 2, 'highlights': 2, 'description': 1}),
+}
+
+STOP_WORDS = frozenset("""
+a an and are as at be by for from in into is it of on or our the their this to with your
+""".split())
+
+COMBINING_MARKS = re.compile('[\u0300-\u036f]')
+TERM = re.compile(r'[a-z0-9]+')
+
+
+def stem(term):
+    """Fold plurals onto the singular (matches DataLoader.stem)"""
+    if len(term) > 4 and term.endswith('ies'):
+        return term[:-3] + 'y'
+    if len(term) > 4 and term.endswith(('ches', 'shes', 'sses', 'xes')):
+        return term[:-2]
+    if len(term) > 3 and term.endswith('s') and not term.endswith(('ss', 'us', 'is')):
+        return term[:-1]
+    return term
+
+
+def tokenize(text):
+    """Split text into lowercase ASCII terms (matches DataLoader.tokenize)"""
+    text = COMBINING_MARKS.sub('', unicodedata.normalize('NFKD', str(text).lower()))
+    return [stem(term) for term in TERM.findall(text) if len(term) >= MIN_TERM_LENGTH]
+
+
+def document_terms(item, fields):
+    """Return (weighted term frequencies, weighted length) for one item"""
+    counts = Counter()
+    for field, weight in fields.items():
+        value = item.get(field)
+        if isinstance(value, list):
+            value = ' '.join(str(part) for part in value)
+        for term in tokenize(value or ''):
+            if term not in STOP_WORDS:
+                counts[term] += weight
+    return counts, sum(counts.values())
+
+
+def search_shards(store):
+    """Yield (relative path, payload) for the search index and its shards"""
+    postings = defaultdict(list)
+    documents = 0
+    total_length = 0
+    for catalog_name, prefix, fields in FIELD_WEIGHTS.values():
+        for item in store[catalog_name].items:
+            if not isinstance(item.get('id'), int):
+                continue
+            counts, length = document_terms(item, fields)
+            if not counts:
+                continue
+            documents += 1
+            total_length += length
+            doc = f"{prefix}{item['id']}"
+            for term, tf in counts.items():
+                postings[term].append([doc, tf, length])
+
+    shards = defaultdict(dict)
+    for term in sorted(postings):
+        shards[term[:SHARD_PREFIX]][term] = postings[term]
+    for key, terms in shards.items():
+        yield f"search/{key}.json", terms
+    yield 'search/index.json', {
+        'documents': documents,
+        'averageLength': round(total_length / documents, 3) if documents else 0,
+        'k1': BM25_K1,
+        'b': BM25_B,
+        'prefixLength': SHARD_PREFIX,
+        'kinds': {prefix: kind for kind, (_, prefix, _) in FIELD_WEIGHTS.items()},
+        'shards': sorted(shards),
+        'stopWords': sorted(STOP_WORDS),
+    }
+
+
+if __name__ == '__main__':
+    from catalog_shards import write_shards
+    from catalog_store import CatalogStore
+
+    written, removed = write_shards(CatalogStore())
+    print(f"✅ Search index up to date ({written} shards written, {removed} removed)")